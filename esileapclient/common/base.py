@@ -17,10 +17,12 @@ Base utilities to build API operation managers and objects on top of.
 import logging
 import abc
 import six
-import json
 
 from osc_lib import exceptions
 
+from esileapclient.common import jsonutils
+from esileapclient.common import timing
+
 
 LOG = logging.getLogger(__name__)
 
@@ -63,6 +65,32 @@ class Manager(object):
                 url_variables += k + '=' + v + '&'
         return url_variables[:-1]
 
+    def _json_request(self, method, url, **kwargs):
+        """Send a request through the API, timing it."""
+
+        with timing.phase('request'):
+            return self.api.json_request(method, url, **kwargs)
+
+    def _get_request(self, url, os_esileap_api_version=None):
+        """Send a GET and return the body of its 200 response."""
+
+        kwargs = {}
+        if os_esileap_api_version is not None:
+            kwargs['headers'] = {'X-OpenStack-ESI-Leap-API-Version':
+                                 os_esileap_api_version}
+
+        resp, body = self._json_request('GET', url, **kwargs)
+
+        if resp.status_code != 200:
+            raise exceptions.CommandError(self._faultstring(resp))
+        return body
+
+    @staticmethod
+    def _faultstring(resp):
+        """Returns the error message of a failed response."""
+
+        return jsonutils.loads(resp.text)['faultstring']
+
     def _create(self, os_esileap_api_version=None, **kwargs):
         """Create a resource based on a kwargs dictionary of attributes.
         :param kwargs: A dictionary containing the attributes of the resource
@@ -89,12 +117,12 @@ class Manager(object):
                                   os_esileap_api_version}
 
         url = self._path()
-        resp, body = self.api.json_request('POST', url, body=new, **headers)
+        resp, body = self._json_request('POST', url, body=new, **headers)
 
         if resp.status_code == 201:
             return self.resource_class(self, body)
         else:
-            raise exceptions.CommandError(json.loads(resp.text)['faultstring'])
+            raise exceptions.CommandError(self._faultstring(resp))
 
     def _update(self, resource_id, os_esileap_api_version=None, **kwargs):
         """Update a resource based on a kwargs dictionary of attributes.
@@ -122,56 +150,49 @@ class Manager(object):
                                   os_esileap_api_version}
 
         url = self._path(resource_id)
-        resp, body = self.api.json_request('PATCH', url, body=new, **headers)
+        resp, body = self._json_request('PATCH', url, body=new, **headers)
 
         if resp.status_code == 200:
             return self.resource_class(self, body)
         else:
-            raise exceptions.CommandError(json.loads(resp.text)['faultstring'])
+            raise exceptions.CommandError(self._faultstring(resp))
+
+    def _list(self, url, obj_class=None, os_esileap_api_version=None,
+              fields=None):
+        """Retrieve a list of resources.
+        :param fields: Optional list of the fields to keep on each resource;
+            the others are dropped as the resources are built.
+        """
 
-    def _list(self, url, obj_class=None, os_esileap_api_version=None):
         if obj_class is None:
             obj_class = self.resource_class
+        if fields is not None:
+            fields = tuple(fields)
 
-        kwargs = {}
-
-        if os_esileap_api_version is not None:
-            kwargs['headers'] = {'X-OpenStack-ESI-Leap-API-Version':
-                                 os_esileap_api_version}
+        body = self._get_request(url, os_esileap_api_version)
 
-        resp, body = self.api.json_request('GET', url, **kwargs)
+        with timing.phase('build'):
+            return [obj_class(self, res, fields=fields)
+                    for res in body[self._resource_name] if res]
 
-        if resp.status_code == 200:
-            body = body[self._resource_name]
-
-            return [obj_class(self, res) for res in body if res]
-        else:
-            raise exceptions.CommandError(json.loads(resp.text)['faultstring'])
-
-    def _get(self, resource_id, obj_class=None, os_esileap_api_version=None):
+    def _get(self, resource_id, obj_class=None, os_esileap_api_version=None,
+             fields=None):
         """Retrieve a resource.
         :param os_esileap_api_version: String version (e.g. "1.35") to use for
             the request.  If not specified, the client's default is used.
+        :param fields: Optional list of the fields to ask the server for.
         """
 
         url = self._path(resource_id)
+        if fields is not None:
+            fields = tuple(fields)
+            url += self._url_variables({'fields': ','.join(fields)})
 
         if obj_class is None:
             obj_class = self.resource_class
 
-        kwargs = {}
-
-        if os_esileap_api_version is not None:
-            kwargs['headers'] = {'X-OpenStack-ESI-Leap-API-Version':
-                                 os_esileap_api_version}
-
-        resp, body = self.api.json_request('GET', url, **kwargs)
-
-        if resp.status_code == 200:
-            return obj_class(self, body)
-
-        else:
-            raise exceptions.CommandError(json.loads(resp.text)['faultstring'])
+        body = self._get_request(url, os_esileap_api_version)
+        return obj_class(self, body, fields=fields)
 
     def _delete(self, resource_id, os_esileap_api_version=None):
         """Delete a resource.
@@ -187,10 +208,10 @@ class Manager(object):
             kwargs['headers'] = {'X-OpenStack-ESI-Leap-API-Version':
                                  os_esileap_api_version}
 
-        resp, _ = self.api.json_request('DELETE', url, **kwargs)
+        resp, _ = self._json_request('DELETE', url, **kwargs)
 
         if resp.status_code != 200:
-            raise exceptions.CommandError(json.loads(resp.text)['faultstring'])
+            raise exceptions.CommandError(self._faultstring(resp))
 
 
 @six.add_metaclass(abc.ABCMeta)
@@ -217,15 +238,19 @@ class Resource(object):
         """A list of required creation attributes for a resource type.
         """
 
-    def __init__(self, manager, info):
+    def __init__(self, manager, info, fields=None):
         """Populate and bind to a manager.
         :param manager: BaseManager object
         :param info: dictionary representing resource attributes
+        :param fields: Optional list of the attributes to keep; by default
+            all of detailed_fields are kept.
         """
 
         self.manager = manager
-        self._info = {k: v for (k, v) in info.items() if k
-                      in self.detailed_fields.keys()}
+        wanted = self.detailed_fields.keys()
+        if fields is not None:
+            wanted = wanted & set(fields)
+        self._info = {k: v for (k, v) in info.items() if k in wanted}
         self._add_details(self._info)
 
     def _add_details(self, info):
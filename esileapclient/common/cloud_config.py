@@ -0,0 +1,115 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Cached resolution of the clouds in clouds.yaml for the mdc commands.
+
+Building a CloudRegion for every region of every cloud is slow with many
+clouds, so only the clouds asked for are resolved. The parsed
+configuration and the resolved regions are kept until a configuration
+file or an OS_* environment variable changes.
+"""
+
+import logging
+import os
+import threading
+
+from openstack.config import loader
+
+LOG = logging.getLogger(__name__)
+
+_cache = {'key': None, 'config': None, 'regions': {}}
+_lock = threading.Lock()
+
+
+def _config_files():
+    # OpenStackConfig inserts the files named by the environment into the
+    # loader's lists, so the same file may be listed more than once
+    files = set(loader.CONFIG_FILES)
+    files.update(loader.SECURE_FILES, loader.VENDOR_FILES)
+    for var in ('OS_CLIENT_CONFIG_FILE', 'OS_CLIENT_SECURE_FILE'):
+        if os.environ.get(var):
+            files.add(os.environ[var])
+    return sorted(files)
+
+
+def _cache_key():
+    """Returns the modification times of the configuration files and the
+    OS_* environment variables the parsed configuration depends on."""
+
+    mtimes = []
+    for path in _config_files():
+        try:
+            mtimes.append((path, os.stat(path).st_mtime_ns))
+        except OSError:
+            pass
+    env = sorted((k, v) for k, v in os.environ.items()
+                 if k.startswith('OS_'))
+    return tuple(mtimes), tuple(env)
+
+
+def get_config():
+    """Returns the parsed configuration, parsing it again only when it has
+    changed."""
+
+    key = _cache_key()
+    with _lock:
+        if _cache['key'] != key:
+            LOG.debug('Loading cloud configuration')
+            _cache.update(key=key, config=loader.OpenStackConfig(),
+                          regions={})
+        return _cache['config']
+
+
+def _resolve(config, cloud, cloud_names):
+    """Returns the CloudRegions of a cloud, keyed by cloud name.
+
+    Listing the regions of a single cloud relies on a private method of
+    OpenStackConfig; without it every cloud is resolved at once.
+    """
+
+    get_regions = getattr(config, '_get_regions', None)
+    if get_regions is not None:
+        return {cloud: [config.get_one(cloud, region_name=region['name'])
+                        for region in get_regions(cloud) if region]}
+
+    LOG.debug('Resolving all clouds: OpenStackConfig has no _get_regions')
+    resolved = {name: [] for name in cloud_names}
+    for cloud_region in config.get_all_clouds():
+        resolved.setdefault(cloud_region.name, []).append(cloud_region)
+    return resolved
+
+
+def get_cloud_regions(names=None):
+    """Returns the CloudRegion of each region of the given clouds.
+
+    :param names: Names of the clouds to resolve; all clouds by default.
+        Clouds are returned in the order of the configuration.
+    """
+
+    config = get_config()
+    cloud_names = config.get_cloud_names()
+    if names:
+        unknown = set(names).difference(cloud_names)
+        if unknown:
+            LOG.warning('Clouds not found in clouds.yaml: %s',
+                        ', '.join(sorted(unknown)))
+        cloud_names = [c for c in cloud_names if c in names]
+
+    cloud_regions = []
+    with _lock:
+        regions = _cache['regions']
+        for cloud in cloud_names:
+            if cloud not in regions:
+                regions.update(_resolve(config, cloud, cloud_names))
+            cloud_regions.extend(regions[cloud])
+    return cloud_regions
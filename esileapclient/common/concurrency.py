@@ -0,0 +1,319 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Helpers to run many API calls concurrently over a shared client.
+"""
+
+from concurrent import futures
+import logging
+import queue
+import threading
+import time
+import weakref
+
+LOG = logging.getLogger(__name__)
+
+# Default number of concurrent API calls
+DEFAULT_WORKERS = 8
+
+# Adaptive limits start here, and never go below MIN_LIMIT or above
+# MAX_LIMIT concurrent calls
+INITIAL_LIMIT = 4
+MIN_LIMIT = 1
+MAX_LIMIT = 64
+
+# Factor applied to the limit when the server is overloaded
+BACKOFF = 0.5
+
+# A call is slow when its latency exceeds the baseline by this factor,
+# and by at least MIN_SLOWDOWN seconds
+LATENCY_TOLERANCE = 2.0
+MIN_SLOWDOWN = 0.05
+
+# Weight of each call in the moving average of latencies
+BASELINE_WEIGHT = 0.1
+
+# HTTP statuses with which a server says it is overloaded
+OVERLOAD_STATUSES = (429, 503)
+
+# Default number of items prefetch() keeps ready
+PREFETCH_SIZE = 100
+
+_DONE = object()
+
+
+def is_overloaded(error):
+    """Returns whether an API error says the server is overloaded."""
+
+    status = getattr(error, 'status_code', None)
+    if status is None:
+        status = getattr(getattr(error, 'response', None), 'status_code',
+                         None)
+    return status in OVERLOAD_STATUSES
+
+
+class AdaptiveLimiter(object):
+    """Limits concurrent calls to an API, adapting the limit to its load.
+
+    The limit grows additively, by one for every limit calls that return
+    quickly, and is cut multiplicatively when a call fails because the
+    server is overloaded (429 or 503) or takes more than LATENCY_TOLERANCE
+    times the moving average of latencies. Calls that started before a cut
+    do not cut it again, so one burst of slow calls backs off only once.
+    """
+
+    def __init__(self, initial=INITIAL_LIMIT, minimum=MIN_LIMIT,
+                 maximum=MAX_LIMIT, clock=time.perf_counter):
+        self.minimum = minimum
+        self.maximum = maximum
+        self._limit = float(max(minimum, min(initial, maximum)))
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._baseline = None
+        self._cut_at = None
+
+    @property
+    def limit(self):
+        return int(self._limit)
+
+    def acquire(self):
+        """Wait for a free slot.
+
+        :returns: A token to pass to release().
+        """
+
+        with self._cond:
+            while self._in_flight >= int(self._limit):
+                self._cond.wait()
+            self._in_flight += 1
+            return self._clock()
+
+    def release(self, started, overloaded=False):
+        """Free a slot, adapting the limit to the outcome of its call."""
+
+        now = self._clock()
+        latency = now - started
+        with self._cond:
+            self._in_flight -= 1
+            if not overloaded:
+                baseline = latency if self._baseline is None \
+                    else self._baseline
+                overloaded = latency > max(baseline * LATENCY_TOLERANCE,
+                                           baseline + MIN_SLOWDOWN)
+                self._baseline = baseline + \
+                    (latency - baseline) * BASELINE_WEIGHT
+            if not overloaded:
+                self._limit = min(self.maximum,
+                                  self._limit + 1.0 / self._limit)
+            elif self._cut_at is None or started > self._cut_at:
+                self._limit = max(self.minimum, self._limit * BACKOFF)
+                self._cut_at = now
+                LOG.debug('Backing off to %d concurrent calls', self.limit)
+            self._cond.notify_all()
+
+    def call(self, func, *args, **kwargs):
+        """Call func in a slot, treating overload errors as back-off."""
+
+        started = self.acquire()
+        overloaded = False
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            overloaded = is_overloaded(e)
+            raise
+        finally:
+            self.release(started, overloaded)
+
+
+_limiters = weakref.WeakKeyDictionary()
+_limiters_lock = threading.Lock()
+
+
+def limiter_for(api):
+    """Returns the adaptive limiter shared by every user of an API client.
+
+    :param api: The client of a cloud, e.g. its lease proxy or the HTTP
+        client of the managers.
+    """
+
+    with _limiters_lock:
+        limiter = _limiters.get(api)
+        if limiter is None:
+            limiter = _limiters[api] = AdaptiveLimiter()
+        return limiter
+
+
+def map_concurrently(func, items, max_workers=DEFAULT_WORKERS, limiter=None):
+    """Call func on each item from a bounded pool of threads.
+
+    :param func: Called with a single item.
+    :param items: An iterable of items.
+    :param max_workers: Maximum number of concurrent calls.
+    :param limiter: Optional AdaptiveLimiter further limiting the
+        concurrent calls, e.g. from limiter_for().
+    :returns: A generator of (item, result, error) tuples in the order of
+        items, where error is the exception raised by func, if any.
+    """
+    items = list(items)
+    if not items:
+        return
+    if limiter is not None:
+        func = _limited(limiter, func)
+    with futures.ThreadPoolExecutor(
+            max_workers=max(1, min(max_workers, len(items)))) as executor:
+        pending = [executor.submit(func, item) for item in items]
+        for item, future in zip(items, pending):
+            try:
+                yield item, future.result(), None
+            except Exception as e:
+                yield item, None, e
+
+
+def prefetch(iterable, size=PREFETCH_SIZE):
+    """Iterate over iterable in a background thread, ahead of the caller.
+
+    Iteration starts at once, and up to size items are kept ready in a
+    bounded queue, so a slow consumer holds back the producer instead of
+    letting items pile up. An error raised by the iterable is raised to
+    the caller after the items produced before it. Closing the returned
+    generator stops the producer.
+    :returns: A generator of the items of iterable.
+    """
+
+    items = queue.Queue(maxsize=size)
+    stop = threading.Event()
+
+    def put(item, error=None):
+        while not stop.is_set():
+            try:
+                items.put((item, error), timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put(item):
+                    return
+        except Exception as e:
+            put(_DONE, e)
+        else:
+            put(_DONE)
+
+    threading.Thread(target=produce, daemon=True).start()
+
+    def consume():
+        try:
+            while True:
+                item, error = items.get()
+                if item is _DONE:
+                    if error is not None:
+                        raise error
+                    return
+                yield item
+        finally:
+            stop.set()
+
+    return consume()
+
+
+def _limited(limiter, func):
+    def call(item):
+        return limiter.call(func, item)
+    return call
+
+
+def hedge(func, delay, *args, **kwargs):
+    """Call func, calling it a second time if it is slow to return.
+
+    If the first call has not returned after delay seconds, a duplicate
+    call is started and whichever returns first wins. The loser is left to
+    finish in a daemon thread and its result is discarded, so func must be
+    safe to call twice (e.g. a GET).
+    :param delay: Seconds to wait before hedging, or None to never hedge.
+    :returns: The result of the first call to succeed.
+    :raises: The first error, once every call has failed.
+    """
+
+    results = queue.Queue()
+
+    def call():
+        try:
+            results.put((func(*args, **kwargs), None))
+        except Exception as e:
+            results.put((None, e))
+
+    def start():
+        threading.Thread(target=call, daemon=True).start()
+
+    start()
+    pending = 1
+    hedged = delay is None
+    first_error = None
+    while pending:
+        try:
+            result, error = results.get(timeout=None if hedged else delay)
+        except queue.Empty:
+            LOG.debug('Hedging call to %s after %.3f s', func, delay)
+            start()
+            pending += 1
+            hedged = True
+            continue
+        pending -= 1
+        if error is None:
+            return result
+        first_error = first_error or error
+    raise first_error
+
+
+class SingleFlight(object):
+    """Shares one call among concurrent callers asking for the same key.
+
+    The first caller for a key runs the call; callers arriving while it is
+    in flight wait for it and get the same result, or the same exception.
+    Results are not kept once the call finishes.
+
+    shared counts the calls that waited for one already in flight.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.shared = 0
+
+    def do(self, key, func, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = futures.Future()
+            else:
+                self.shared += 1
+        if not leader:
+            LOG.debug('Sharing in-flight call for %s', key)
+            return call.result()
+
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as e:
+            call.set_exception(e)
+            raise
+        else:
+            call.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
@@ -0,0 +1,193 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Differences between two inventories of leases or offers.
+
+Inventories are snapshots written by 'esi lease list -f json' (or
+'-f ndjson') or live listings. The older one is indexed by UUID and the
+newer one is streamed against the index, so a diff takes time linear in
+the size of both and holds only the older inventory in memory.
+"""
+
+import json
+import logging
+import sys
+
+from osc_lib import exceptions
+
+from esileapclient.common import jsonutils
+from esileapclient.common import utils
+
+LOG = logging.getLogger(__name__)
+
+ADDED = 'added'
+REMOVED = 'removed'
+CHANGED = 'changed'
+
+LABELS = ('Change', 'UUID', 'Field', 'Old Value', 'New Value')
+
+
+def _field_names(fields):
+    """Map the labels and names of fields, normalized, to the names."""
+
+    names = {}
+    for name, label in fields.items():
+        names[utils.normalize_column(label)] = name
+        names[utils.normalize_column(name)] = name
+    return names
+
+
+def read_snapshot(stream, fields):
+    """Read the records of a snapshot file, one at a time.
+
+    :param stream: A file holding a JSON list of objects, or one JSON
+        object per line.
+    :param fields: The fields of the resource, mapping names to labels.
+        Keys of the objects are mapped from labels (as written by -f
+        json) to field names; unknown keys are kept, normalized.
+    :returns: A generator of dicts.
+    """
+
+    names = _field_names(fields)
+
+    def record(item):
+        if not isinstance(item, dict):
+            raise exceptions.CommandError(
+                'Snapshot %s holds a %s, not an object' %
+                (getattr(stream, 'name', ''), type(item).__name__))
+        return {names.get(utils.normalize_column(k),
+                          utils.normalize_column(k)): v
+                for k, v in item.items()}
+
+    first = stream.read(1)
+    while first.isspace():
+        first = stream.read(1)
+    if first == '[':
+        # A list is decoded one item at a time as the file is read
+        try:
+            for item in jsonutils.iter_stream_list(stream, first):
+                yield record(item)
+        except ValueError as e:
+            raise exceptions.CommandError(
+                'Invalid JSON in snapshot %s: %s' %
+                (getattr(stream, 'name', ''), e))
+        return
+
+    lines = stream
+    if first:
+        lines = _prepend(first + stream.readline(), stream)
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            item = jsonutils.loads(line)
+        except ValueError as e:
+            raise exceptions.CommandError(
+                'Invalid JSON on line %d of snapshot %s: %s' %
+                (number, getattr(stream, 'name', ''), e))
+        yield record(item)
+
+
+def open_snapshot(path, fields):
+    """Open a snapshot file, or '-' for standard input.
+
+    :returns: A generator of the records of the snapshot, as read by
+        read_snapshot(). The file is closed once it is exhausted.
+    """
+
+    try:
+        stream = sys.stdin if path == '-' else open(path)
+    except OSError as e:
+        raise exceptions.CommandError('Cannot read snapshot %s: %s' %
+                                      (path, e))
+
+    def records():
+        try:
+            yield from read_snapshot(stream, fields)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+    return records()
+
+
+def _prepend(line, lines):
+    yield line
+    yield from lines
+
+
+def live_records(resources, fields):
+    """Returns the records of live resources, like those of a snapshot."""
+
+    for resource in resources:
+        yield {name: utils.get_resource_value(resource, name)
+               for name in fields}
+
+
+def _normalize(value):
+    # Values read from a snapshot went through JSON; live ones did not
+    if isinstance(value, str) or value is None:
+        return value
+    return json.loads(json.dumps(value, default=str))
+
+
+def _uuid(record):
+    uuid = record.get('uuid')
+    if not uuid:
+        raise exceptions.CommandError('Record without a UUID: %s' % record)
+    return uuid
+
+
+def diff_records(old, new):
+    """Compare two inventories of records keyed by UUID.
+
+    Only the fields present in both records of a UUID are compared, so a
+    short listing can be compared with a long one.
+    :returns: A generator of (change, uuid, field, old value, new value)
+        tuples, with a field only for changes. Changes and additions are
+        generated in the order of new; removals come last, in the order of
+        old.
+    """
+
+    index = {}
+    for record in old:
+        index[_uuid(record)] = record
+
+    for record in new:
+        uuid = _uuid(record)
+        previous = index.pop(uuid, None)
+        if previous is None:
+            yield ADDED, uuid, '', None, None
+            continue
+        for field, value in record.items():
+            if field not in previous:
+                continue
+            old_value = _normalize(previous[field])
+            new_value = _normalize(value)
+            if old_value != new_value:
+                yield CHANGED, uuid, field, old_value, new_value
+
+    for uuid in index:
+        yield REMOVED, uuid, '', None, None
+
+
+def _format(value):
+    if value is None:
+        return ''
+    return value if isinstance(value, str) else json.dumps(value)
+
+
+def diff_rows(old, new):
+    """Returns the rows of the diff of two inventories, under LABELS."""
+
+    for change, uuid, field, old_value, new_value in diff_records(old, new):
+        yield change, uuid, field, _format(old_value), _format(new_value)
@@ -0,0 +1,52 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Streaming output formatters.
+"""
+
+import json
+
+from cliff import columns
+from cliff.formatters import base
+
+
+def _machine_readable(value):
+    if isinstance(value, columns.FormattableColumn):
+        return value.machine_readable()
+    return value
+
+
+class NDJSONFormatter(base.ListFormatter, base.SingleFormatter):
+    """Write one JSON object per line (JSON Lines / NDJSON).
+
+    Unlike the table and json formatters, rows are written and flushed as
+    soon as they are produced, so the output can be consumed while a long
+    listing is still being read and memory use stays constant.
+    """
+
+    def add_argument_group(self, parser):
+        pass
+
+    def _emit(self, column_names, row, stdout):
+        stdout.write(json.dumps(
+            {n: _machine_readable(i) for n, i in zip(column_names, row)},
+            default=str))
+        stdout.write('\n')
+
+    def emit_list(self, column_names, data, stdout, parsed_args):
+        for row in data:
+            self._emit(column_names, row, stdout)
+            stdout.flush()
+
+    def emit_one(self, column_names, data, stdout, parsed_args):
+        self._emit(column_names, data, stdout)
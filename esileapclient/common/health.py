@@ -0,0 +1,222 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Health of the clouds queried by the multi-data-center commands.
+
+Outcomes and latencies of recent requests are kept per cloud region in a
+small JSON file shared by all invocations. A cloud region that fails
+FAILURE_THRESHOLD times in a row has its circuit opened and is skipped for
+RESET_TIMEOUT seconds; after that a single query probes it (half-open), and
+its circuit closes again on success. Only connection errors, timeouts and
+server errors count as failures of a cloud.
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from keystoneauth1 import exceptions as ks_exceptions
+import requests
+
+LOG = logging.getLogger(__name__)
+
+DEFAULT_PATH = os.path.join('~', '.cache', 'esileapclient', 'health.json')
+
+# Number of recent outcomes and latencies kept per cloud region
+WINDOW = 20
+
+# Consecutive failures that open a circuit
+FAILURE_THRESHOLD = 3
+
+# Seconds an open circuit skips its cloud region before a probe
+RESET_TIMEOUT = 300
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+_CONNECTION_ERRORS = (ConnectionError, TimeoutError,
+                      ks_exceptions.ConnectionError,
+                      requests.exceptions.ConnectionError,
+                      requests.exceptions.Timeout)
+
+
+def cloud_key(cloud_region):
+    """Returns the key of a cloud region in the health cache."""
+
+    return '%s:%s' % (cloud_region.name,
+                      cloud_region.config.get('region_name') or '')
+
+
+def is_failure(error):
+    """Returns whether an error says a cloud is unhealthy.
+
+    Connection errors, timeouts and 5xx responses are failures of the
+    cloud; other errors, such as a 400 for a bad filter or an
+    authentication error, are the caller's.
+    """
+
+    if isinstance(error, _CONNECTION_ERRORS):
+        return True
+    status = getattr(error, 'status_code', None)
+    if status is None:
+        status = getattr(error, 'http_status', None)
+    if status is None:
+        status = getattr(getattr(error, 'response', None), 'status_code',
+                         None)
+    return isinstance(status, int) and status >= 500
+
+
+def _percentile(values, percentile):
+    values = sorted(values)
+    index = int(round(percentile / 100.0 * (len(values) - 1)))
+    return values[index]
+
+
+class HealthCache(object):
+    """Per cloud region request outcomes, latencies and circuit state."""
+
+    def __init__(self, path=None, clock=time.time):
+        self.path = os.path.expanduser(path or DEFAULT_PATH)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._clouds = self._load()
+        # Keys of the cloud regions skipped by this invocation
+        self.skipped = []
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                clouds = json.load(f).get('clouds', {})
+        except (OSError, ValueError, AttributeError) as e:
+            LOG.debug('Not using health cache %s: %s', self.path, e)
+            return {}
+        return clouds if isinstance(clouds, dict) else {}
+
+    def save(self):
+        """Write the cache, replacing the file atomically."""
+
+        with self._lock:
+            data = json.dumps({'clouds': self._clouds})
+        directory = os.path.dirname(self.path)
+        try:
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            fd, tmp = tempfile.mkstemp(dir=directory, prefix='.health-')
+            with os.fdopen(fd, 'w') as f:
+                f.write(data)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            LOG.debug('Failed to write health cache %s: %s', self.path, e)
+
+    def _entry(self, key):
+        return self._clouds.setdefault(key, {
+            'outcomes': [], 'latencies': [], 'failures': 0,
+            'opened_at': None})
+
+    def state(self, key):
+        """Returns the circuit state of a cloud region."""
+
+        entry = self._clouds.get(key)
+        if not entry or entry['failures'] < FAILURE_THRESHOLD:
+            return CLOSED
+        if self._clock() - entry['opened_at'] < RESET_TIMEOUT:
+            return OPEN
+        return HALF_OPEN
+
+    def failure_rate(self, key):
+        """Returns the share of recent requests that failed."""
+
+        outcomes = self._clouds.get(key, {}).get('outcomes')
+        if not outcomes:
+            return 0.0
+        return 1.0 - float(sum(outcomes)) / len(outcomes)
+
+    def latency(self, key, percentile=50):
+        """Returns a percentile of recent latencies in seconds, or None."""
+
+        latencies = self._clouds.get(key, {}).get('latencies')
+        if not latencies:
+            return None
+        return _percentile(latencies, percentile)
+
+    def record_success(self, key, latency):
+        with self._lock:
+            entry = self._entry(key)
+            entry['outcomes'] = (entry['outcomes'] + [1])[-WINDOW:]
+            entry['latencies'] = (entry['latencies'] + [latency])[-WINDOW:]
+            entry['failures'] = 0
+            entry['opened_at'] = None
+
+    def record_failure(self, key):
+        with self._lock:
+            entry = self._entry(key)
+            entry['outcomes'] = (entry['outcomes'] + [0])[-WINDOW:]
+            entry['failures'] += 1
+            if entry['failures'] >= FAILURE_THRESHOLD:
+                entry['opened_at'] = self._clock()
+
+    def select(self, cloud_regions, ignore_open=False):
+        """Returns the cloud regions to query, healthiest first.
+
+        Cloud regions with an open circuit are left out unless ignore_open
+        is set. Half-open ones, and then ones with more recent failures or
+        higher latency, come last.
+        """
+
+        selected = []
+        for cloud_region in cloud_regions:
+            key = cloud_key(cloud_region)
+            state = self.state(key)
+            if state == OPEN and not ignore_open:
+                LOG.warning('Skipping cloud %s: it failed its last %d '
+                            'requests', key, self._clouds[key]['failures'])
+                self.skipped.append(key)
+                continue
+            selected.append(((state != CLOSED, self.failure_rate(key),
+                              self.latency(key) or 0.0), cloud_region))
+        # sorted() is stable, so clouds without history keep their order
+        return [c for _, c in sorted(selected, key=lambda s: s[0])]
+
+    def track(self, iterable, key, description):
+        """Record the outcome of iterating over results from a cloud.
+
+        The latency recorded is the time to the first result (or to the
+        end, if there are none). A failure of the cloud (see is_failure) is
+        logged, recorded and ends the iteration instead of being raised,
+        and the cloud region is added to skipped; other errors are raised.
+        The cache is saved once the iteration ends.
+        """
+
+        start = time.perf_counter()
+        latency = None
+        try:
+            for item in iterable:
+                if latency is None:
+                    latency = time.perf_counter() - start
+                yield item
+        except Exception as e:
+            if not is_failure(e):
+                self.save()
+                raise
+            LOG.warning('Failed to get %s: %s', description, e)
+            self.record_failure(key)
+            self.skipped.append(key)
+        else:
+            if latency is None:
+                latency = time.perf_counter() - start
+            self.record_success(key, latency)
+        self.save()
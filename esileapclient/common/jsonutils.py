@@ -0,0 +1,163 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+JSON decoding helpers.
+
+orjson is used to decode whole documents when it is installed; the
+standard library is used otherwise. iter_list decodes the items of a JSON
+list one at a time, so a large list response never has to be held in
+memory as decoded objects all at once; iter_stream_list does the same
+reading a file in chunks, so the text of the file is not held either.
+"""
+
+import json
+import re
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Characters read from a file at a time by iter_stream_list
+CHUNK_SIZE = 64 * 1024
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+def loads(data):
+    """Decode a JSON document from a string or bytes."""
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, (bytes, bytearray)):
+        data = data.decode('utf-8')
+    return json.loads(data)
+
+
+def _skip(text, idx):
+    return _WHITESPACE.match(text, idx).end()
+
+
+def _expect(text, idx, chars):
+    char = text[idx:idx + 1]
+    if not char or char not in chars:
+        raise ValueError("Expecting one of %r at char %d" % (chars, idx))
+    return char
+
+
+def _find_key(text, idx, key):
+    """Return the index of the value of key in the object at idx."""
+    _expect(text, idx, '{')
+    idx = _skip(text, idx + 1)
+    if text[idx:idx + 1] == '}':
+        raise KeyError(key)
+    while True:
+        name, idx = _DECODER.raw_decode(text, idx)
+        if not isinstance(name, str):
+            raise ValueError("Expecting property name at char %d" % idx)
+        idx = _skip(text, idx)
+        _expect(text, idx, ':')
+        idx = _skip(text, idx + 1)
+        if name == key:
+            return idx
+        _, idx = _DECODER.raw_decode(text, idx)
+        idx = _skip(text, idx)
+        if _expect(text, idx, ',}') == '}':
+            raise KeyError(key)
+        idx = _skip(text, idx + 1)
+
+
+def iter_list(data, key=None):
+    """Incrementally decode the items of a JSON list.
+
+    :param data: A JSON document as a string or bytes.
+    :param key: If given, the list is the value of this key in a
+        top-level object, e.g. ``{"leases": [...]}``. Otherwise the
+        document itself must be a list.
+    :returns: A generator of the decoded list items.
+    :raises: KeyError if key is not in the top-level object, ValueError if
+        the document is malformed.
+    """
+    if isinstance(data, (bytes, bytearray)):
+        data = data.decode('utf-8')
+
+    idx = _skip(data, 0)
+    if key is not None:
+        idx = _find_key(data, idx, key)
+
+    _expect(data, idx, '[')
+    idx = _skip(data, idx + 1)
+    if data[idx:idx + 1] == ']':
+        return
+    while True:
+        item, idx = _DECODER.raw_decode(data, idx)
+        yield item
+        idx = _skip(data, idx)
+        if _expect(data, idx, ',]') == ']':
+            return
+        idx = _skip(data, idx + 1)
+
+
+def iter_stream_list(stream, buffered='', chunk_size=CHUNK_SIZE):
+    """Incrementally decode the items of a JSON list read from a file.
+
+    The file is read in chunks, and only the text of the items not yet
+    decoded is kept, so memory use is bounded by the largest item rather
+    than by the file.
+    :param stream: A text file holding a JSON list.
+    :param buffered: Text already read from the start of the file.
+    :returns: A generator of the decoded list items.
+    :raises: ValueError if the document is malformed.
+    """
+    state = {'text': buffered, 'eof': False}
+
+    def read():
+        chunk = '' if state['eof'] else stream.read(chunk_size)
+        if not chunk:
+            state['eof'] = True
+        state['text'] += chunk
+        return bool(chunk)
+
+    def skip(idx):
+        idx = _skip(state['text'], idx)
+        while idx == len(state['text']) and read():
+            idx = _skip(state['text'], idx)
+        return idx
+
+    idx = skip(0)
+    _expect(state['text'], idx, '[')
+    idx = skip(idx + 1)
+    if state['text'][idx:idx + 1] == ']':
+        return
+    while True:
+        if idx >= chunk_size:
+            # Drop the text of the items already decoded
+            state['text'] = state['text'][idx:]
+            idx = 0
+        while True:
+            try:
+                item, end = _DECODER.raw_decode(state['text'], idx)
+            except ValueError:
+                # The item may continue in the next chunk
+                if read():
+                    continue
+                raise
+            # A number at the end of the text may continue, too
+            if end < len(state['text']) or not read():
+                break
+        yield item
+        idx = skip(end)
+        if _expect(state['text'], idx, ',]') == ']':
+            return
+        idx = skip(idx + 1)
@@ -0,0 +1,313 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+A local SQLite mirror of nodes, offers and leases.
+
+The mirror is filled from a full snapshot of the API and then kept up to
+date by applying the events recorded since the previous sync.
+"""
+
+import datetime
+import json
+import logging
+import os
+import sqlite3
+import time
+import types
+
+from openstack import exceptions as sdk_exceptions
+from osc_lib import exceptions
+
+from esileapclient.common import concurrency
+from esileapclient.common import utils
+from esileapclient.v1.lease import Lease as LEASE_RESOURCE
+from esileapclient.v1.node import Node as NODE_RESOURCE
+from esileapclient.v1.offer import Offer as OFFER_RESOURCE
+
+LOG = logging.getLogger(__name__)
+
+DEFAULT_DIR = os.path.join('~', '.cache', 'esileapclient')
+
+# Indexed columns of each table; these are the filters the mirror answers
+COLUMNS = {
+    'nodes': ('owner', 'lessee', 'resource_class', 'offer_uuid',
+              'lease_uuid'),
+    'offers': ('status', 'project_id', 'resource_type', 'resource_uuid',
+               'resource_class', 'lessee_id'),
+    'leases': ('status', 'project_id', 'owner_id', 'offer_uuid',
+               'resource_type', 'resource_uuid', 'resource_class',
+               'purpose'),
+}
+
+FIELDS = {
+    'nodes': NODE_RESOURCE.detailed_fields,
+    'offers': OFFER_RESOURCE.detailed_fields,
+    'leases': LEASE_RESOURCE.detailed_fields,
+}
+
+# Statuses listed by the API when no status filter is given
+DEFAULT_STATUSES = {
+    'offers': ('available', 'error'),
+    'leases': ('created', 'active', 'error', 'wait_cancel', 'wait_expire',
+               'wait_fulfill'),
+}
+
+# Allowance for clock skew when first asking the server for events
+EVENT_CLOCK_SKEW = 60
+
+
+def default_path(cloud=None):
+    """Returns the default mirror file of a cloud."""
+
+    name = 'mirror-%s.sqlite' % cloud if cloud else 'mirror.sqlite'
+    return os.path.expanduser(os.path.join(DEFAULT_DIR, name))
+
+
+def _record(resource, kind):
+    """Returns the fields of a resource as stored in the mirror."""
+
+    return {field: utils.get_resource_value(resource, field)
+            for field in FIELDS[kind]}
+
+
+class Mirror(object):
+    """A local copy of the nodes, offers and leases of a cloud."""
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        self._conn = sqlite3.connect(path)
+        self._create_schema()
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _create_schema(self):
+        with self._conn:
+            self._conn.execute('CREATE TABLE IF NOT EXISTS meta '
+                               '(key TEXT PRIMARY KEY, value TEXT)')
+            for table, columns in COLUMNS.items():
+                self._conn.execute(
+                    'CREATE TABLE IF NOT EXISTS %s (uuid TEXT PRIMARY KEY, '
+                    '%s, data TEXT NOT NULL)' %
+                    (table, ', '.join('%s TEXT' % c for c in columns)))
+                for column in columns:
+                    self._conn.execute(
+                        'CREATE INDEX IF NOT EXISTS %s_%s ON %s (%s)' %
+                        (table, column, table, column))
+
+    def _get_meta(self, key):
+        row = self._conn.execute('SELECT value FROM meta WHERE key = ?',
+                                 (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _set_meta(self, **values):
+        self._conn.executemany(
+            'INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)',
+            [(k, json.dumps(v)) for k, v in values.items()])
+
+    @property
+    def synced_at(self):
+        """The time of the last sync, or None if never synced."""
+        return self._get_meta('synced_at')
+
+    @property
+    def view(self):
+        """The view of the leases in the mirror; 'all' for all projects."""
+        return self._get_meta('view')
+
+    @property
+    def last_event_id(self):
+        return self._get_meta('last_event_id')
+
+    def age(self):
+        """Returns the seconds since the last sync, or None."""
+        synced_at = self.synced_at
+        return None if synced_at is None else time.time() - synced_at
+
+    def count(self, table):
+        return self._conn.execute(
+            'SELECT COUNT(*) FROM %s' % table).fetchone()[0]
+
+    def _store(self, table, resources):
+        columns = COLUMNS[table]
+        rows = []
+        for resource in resources:
+            record = _record(resource, table)
+            row = [record['uuid']]
+            row.extend(utils.get_resource_value(resource, c)
+                       for c in columns)
+            row.append(json.dumps(record, default=str))
+            rows.append(row)
+        self._conn.executemany(
+            'INSERT OR REPLACE INTO %s (uuid, %s, data) VALUES (%s)' %
+            (table, ', '.join(columns),
+             ', '.join('?' * (len(columns) + 2))), rows)
+        return len(rows)
+
+    def snapshot(self, client, view=None):
+        """Replace the mirror with the current nodes, offers and leases.
+
+        :param view: Passed to the lease listing; 'all' mirrors the leases
+            of every project (admin only).
+        :returns: The number of resources stored.
+        """
+
+        now = datetime.datetime.now(datetime.timezone.utc)
+        start = now - datetime.timedelta(seconds=EVENT_CLOCK_SKEW)
+        nodes = list(client.nodes())
+        offers = list(client.offers(status='any'))
+        leases = list(client.leases(status='any', view=view))
+
+        with self._conn:
+            for table in COLUMNS:
+                self._conn.execute('DELETE FROM %s' % table)
+            stored = self._store('nodes', nodes)
+            stored += self._store('offers', offers)
+            stored += self._store('leases', leases)
+            self._set_meta(
+                view=view, last_event_id=None,
+                last_event_time=start.strftime('%Y-%m-%dT%H:%M:%S'),
+                synced_at=time.time())
+        return stored
+
+    def apply_events(self, client, max_workers=concurrency.DEFAULT_WORKERS):
+        """Apply the events recorded since the last sync.
+
+        Offers and leases named by an event are fetched again, or removed
+        if they no longer exist. Nodes have no lookup by UUID, so they are
+        listed again whenever there are new events.
+        :returns: The number of events applied.
+        """
+
+        last_event_id = self.last_event_id
+        if last_event_id is not None:
+            filters = {'last_event_id': last_event_id}
+        else:
+            filters = {'last_event_time': self._get_meta('last_event_time')}
+        events = list(client.events(**filters))
+
+        changed = {'offers': set(), 'leases': set()}
+        for event in events:
+            table = '%ss' % event.object_type
+            if table in changed:
+                changed[table].add(event.object_uuid)
+            if last_event_id is None or event.id > last_event_id:
+                last_event_id = event.id
+
+        getters = {'offers': client.get_offer, 'leases': client.get_lease}
+        updates = {}
+        for table, uuids in changed.items():
+            updates[table] = ([], [])
+            for uuid, resource, error in concurrency.map_concurrently(
+                    getters[table], sorted(uuids), max_workers,
+                    concurrency.limiter_for(client)):
+                if isinstance(error, sdk_exceptions.NotFoundException):
+                    updates[table][1].append(uuid)
+                elif error is not None:
+                    raise error
+                else:
+                    updates[table][0].append(resource)
+        nodes = list(client.nodes()) if events else None
+
+        with self._conn:
+            for table, (resources, deleted) in updates.items():
+                self._store(table, resources)
+                self._conn.executemany(
+                    'DELETE FROM %s WHERE uuid = ?' % table,
+                    [(uuid,) for uuid in deleted])
+            if nodes is not None:
+                self._conn.execute('DELETE FROM nodes')
+                self._store('nodes', nodes)
+            self._set_meta(last_event_id=last_event_id,
+                           synced_at=time.time())
+        return len(events)
+
+    def sync(self, client, view=None):
+        """Snapshot an empty mirror, or apply new events to a filled one.
+
+        A mirror of leases with another view is snapshotted again.
+        :returns: A (kind, count) tuple, where kind is 'snapshot' or
+            'events'.
+        """
+
+        if self.synced_at is None or self.view != view:
+            return 'snapshot', self.snapshot(client, view=view)
+        return 'events', self.apply_events(client)
+
+    def _check_view(self, view):
+        if view == self.view:
+            return
+        if view == 'all':
+            raise exceptions.CommandError(
+                "Local mirror %s only holds the leases of the current "
+                "project; run 'esi sync --all' first" % self.path)
+        raise exceptions.CommandError(
+            "Local mirror %s holds the leases of all projects; use --all or "
+            "run 'esi sync' without --all first" % self.path)
+
+    def _list(self, table, filters):
+        if table == 'leases':
+            self._check_view(filters.get('view'))
+        where = []
+        params = []
+        for key, value in filters.items():
+            if value is None or key == 'view':
+                continue
+            if key == 'status' and table in DEFAULT_STATUSES:
+                if value == 'any':
+                    continue
+                statuses = value.split(',')
+                where.append('status IN (%s)' %
+                             ', '.join('?' * len(statuses)))
+                params.extend(statuses)
+            elif key in COLUMNS[table]:
+                where.append('%s = ?' % key)
+                params.append(value)
+            else:
+                raise exceptions.CommandError(
+                    'Filtering by %s is not supported by the local mirror'
+                    % key)
+        if table in DEFAULT_STATUSES and filters.get('status') is None:
+            statuses = DEFAULT_STATUSES[table]
+            where.append('status IN (%s)' % ', '.join('?' * len(statuses)))
+            params.extend(statuses)
+
+        query = 'SELECT data FROM %s' % table
+        if where:
+            query += ' WHERE ' + ' AND '.join(where)
+        return self._rows(query + ' ORDER BY rowid', params)
+
+    def _rows(self, query, params):
+        for (data,) in self._conn.execute(query, params):
+            yield types.SimpleNamespace(**json.loads(data))
+
+    def nodes(self, **filters):
+        """Like the client's nodes(), answered from the mirror."""
+        return self._list('nodes', filters)
+
+    def offers(self, **filters):
+        """Like the client's offers(), answered from the mirror."""
+        return self._list('offers', filters)
+
+    def leases(self, **filters):
+        """Like the client's leases(), answered from the mirror."""
+        return self._list('leases', filters)
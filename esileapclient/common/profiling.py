@@ -0,0 +1,138 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Whole-command profiling for the --profile and --trace-malloc options.
+
+Profiling starts as soon as the global option is parsed, before
+authentication and before the command runs, and the report is written
+when the process exits.
+"""
+
+import argparse
+import atexit
+import cProfile
+import logging
+import os
+import pstats
+import sys
+import time
+import tracemalloc
+
+LOG = logging.getLogger(__name__)
+
+# Number of entries in the text reports
+REPORT_LIMIT = 50
+# Number of frames recorded for each allocation
+TRACE_FRAMES = 10
+
+_profiler = None
+_report_dir = None
+
+
+def set_report_dir(path):
+    """Set the directory reports are written to, by default the current
+    directory."""
+    global _report_dir
+    _report_dir = path
+
+
+def report_path(kind, extension):
+    """Return a per-invocation report file name."""
+    name = 'esi-%s-%s-%d.%s' % (kind, time.strftime('%Y%m%dT%H%M%S'),
+                                os.getpid(), extension)
+    return os.path.join(_report_dir or os.curdir, name)
+
+
+def start_profile():
+    """Start profiling with cProfile until the process exits.
+
+    The pstats dump is written to esi-profile-<time>-<pid>.prof and a text
+    summary, sorted by cumulative time, next to it with a .txt suffix.
+    """
+    global _profiler
+    if _profiler is not None:
+        return
+    _profiler = cProfile.Profile()
+    _profiler.enable()
+    atexit.register(write_profile, _profiler)
+
+
+def write_profile(profiler, path=None):
+    path = path or report_path('profile', 'prof')
+    profiler.disable()
+    profiler.dump_stats(path)
+    with open(path + '.txt', 'w') as f:
+        stats = pstats.Stats(profiler, stream=f)
+        stats.sort_stats('cumulative').print_stats(REPORT_LIMIT)
+    sys.stderr.write('Profile written to %s\n' % path)
+
+
+def start_trace_malloc():
+    """Trace memory allocations with tracemalloc until the process exits.
+
+    A report of the current and peak memory and of the largest allocation
+    sites is written to esi-tracemalloc-<time>-<pid>.txt.
+    """
+    if tracemalloc.is_tracing():
+        return
+    tracemalloc.start(TRACE_FRAMES)
+    atexit.register(write_trace_malloc)
+
+
+def write_trace_malloc(path=None):
+    path = path or report_path('tracemalloc', 'txt')
+    snapshot = tracemalloc.take_snapshot()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    snapshot = snapshot.filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+    ])
+    with open(path, 'w') as f:
+        f.write('Current memory: %.1f MiB\n' % (current / 1048576.0))
+        f.write('Peak memory: %.1f MiB\n\n' % (peak / 1048576.0))
+        f.write('Top %d allocation sites:\n' % REPORT_LIMIT)
+        for stat in snapshot.statistics('lineno')[:REPORT_LIMIT]:
+            f.write('%s\n' % stat)
+    sys.stderr.write('Memory allocation report written to %s\n' % path)
+
+
+class ProfileAction(argparse.Action):
+    """Starts profiling as soon as the option is parsed."""
+
+    def __init__(self, option_strings, dest, **kwargs):
+        super(ProfileAction, self).__init__(option_strings, dest, nargs=0,
+                                            **kwargs)
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        setattr(namespace, self.dest, True)
+        start_profile()
+
+
+class TraceMallocAction(argparse.Action):
+    """Starts tracing allocations as soon as the option is parsed."""
+
+    def __init__(self, option_strings, dest, **kwargs):
+        super(TraceMallocAction, self).__init__(option_strings, dest,
+                                                nargs=0, **kwargs)
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        setattr(namespace, self.dest, True)
+        start_trace_malloc()
+
+
+class ReportDirAction(argparse.Action):
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        setattr(namespace, self.dest, values)
+        set_report_dir(values)
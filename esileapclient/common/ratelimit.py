@@ -0,0 +1,196 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Client-side token bucket rate limits for the --rate-limit option.
+
+Each cloud and resource name has its own bucket holding up to burst
+tokens, refilled at rate tokens per second; every request takes a token
+and waits for it if the bucket is empty. With a lock directory, the
+buckets are kept in files locked with fcntl, so every process using the
+directory shares them.
+
+The limits can also be set through the ESI_RATE_LIMIT, ESI_RATE_BURST and
+ESI_RATE_LIMIT_DIR environment variables.
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+LOG = logging.getLogger(__name__)
+
+
+def _env_float(name):
+    value = os.environ.get(name)
+    if not value:
+        return None
+    try:
+        number = float(value)
+    except ValueError:
+        number = 0.0
+    # Also rejects nan
+    if not number > 0:
+        LOG.warning('Ignoring %s=%s: not a positive number', name, value)
+        return None
+    return number
+
+
+_settings = {
+    'rate_limit': _env_float('ESI_RATE_LIMIT'),
+    'rate_burst': _env_float('ESI_RATE_BURST'),
+    'rate_limit_dir': os.environ.get('ESI_RATE_LIMIT_DIR') or None,
+}
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def configure(rate=None, burst=None, lock_dir=None):
+    """Set the limits of every bucket, replacing the current ones.
+
+    :param rate: Requests per second, or None for no limit.
+    :param burst: Requests allowed at once after a quiet period; by
+        default one second's worth, and at least one.
+    :param lock_dir: Optional directory to share buckets across processes.
+    :raises ValueError: If rate or burst is not a positive number.
+    """
+    for name, value in (('rate', rate), ('burst', burst)):
+        if value is not None and not value > 0:
+            raise ValueError('The %s of a rate limit must be positive, not '
+                             '%s' % (name, value))
+    with _buckets_lock:
+        _settings.update(rate_limit=rate, rate_burst=burst,
+                         rate_limit_dir=lock_dir)
+        _buckets.clear()
+
+
+def _refill(tokens, updated, now, rate, burst):
+    """Returns the tokens in a bucket after taking one, and the seconds to
+    wait until that token is available.
+
+    Tokens go negative while requests are waiting for them, so waiting
+    requests are served in order.
+    """
+    tokens = min(burst, tokens + max(0.0, now - updated) * rate) - 1
+    return tokens, max(0.0, -tokens / rate)
+
+
+class TokenBucket(object):
+    """A token bucket shared by the threads of a process."""
+
+    def __init__(self, rate, burst, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = burst
+        self._updated = clock()
+
+    def _reserve(self):
+        with self._lock:
+            now = self._clock()
+            self._tokens, wait = _refill(self._tokens, self._updated, now,
+                                         self.rate, self.burst)
+            self._updated = now
+            return wait
+
+    def acquire(self):
+        """Take a token, waiting for one if the bucket is empty."""
+
+        wait = self._reserve()
+        if wait:
+            LOG.debug('Rate limited; waiting %.3f s', wait)
+            self._sleep(wait)
+        return wait
+
+
+class FileTokenBucket(TokenBucket):
+    """A token bucket kept in a locked file, shared by all processes."""
+
+    def __init__(self, path, rate, burst, clock=time.time, sleep=time.sleep):
+        super(FileTokenBucket, self).__init__(rate, burst, clock, sleep)
+        self.path = path
+
+    def _reserve(self):
+        with self._lock, open(self.path, 'a+') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                try:
+                    state = json.loads(f.read())
+                    tokens, updated = state['tokens'], state['updated']
+                except (ValueError, KeyError, TypeError):
+                    tokens, updated = self.burst, self._clock()
+                now = self._clock()
+                tokens, wait = _refill(tokens, updated, now, self.rate,
+                                       self.burst)
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps({'tokens': tokens, 'updated': now}))
+                f.flush()
+                return wait
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _file_name(cloud, resource):
+    return re.sub(r'[^\w.-]', '_', '%s-%s' % (cloud, resource)) + '.bucket'
+
+
+def bucket_for(cloud, resource):
+    """Returns the bucket of a cloud and resource name, or None if requests
+    are not rate limited."""
+
+    with _buckets_lock:
+        rate = _settings['rate_limit']
+        if not rate:
+            return None
+        key = (cloud, resource)
+        bucket = _buckets.get(key)
+        if bucket is None:
+            burst = max(1.0, _settings['rate_burst'] or rate)
+            lock_dir = _settings['rate_limit_dir']
+            if lock_dir and fcntl is None:
+                LOG.warning('File locks are not available; rate limits '
+                            'are not shared with other processes')
+                lock_dir = None
+            if lock_dir:
+                lock_dir = os.path.expanduser(lock_dir)
+                if not os.path.isdir(lock_dir):
+                    os.makedirs(lock_dir)
+                bucket = FileTokenBucket(
+                    os.path.join(lock_dir, _file_name(cloud, resource)),
+                    rate, burst)
+            else:
+                bucket = TokenBucket(rate, burst)
+            _buckets[key] = bucket
+        return bucket
+
+
+class RateLimitAction(argparse.Action):
+    """Sets a rate limit setting as soon as the option is parsed."""
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        setattr(namespace, self.dest, values)
+        with _buckets_lock:
+            _settings[self.dest] = values
+            _buckets.clear()
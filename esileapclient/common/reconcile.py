@@ -0,0 +1,271 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Convergence of leases to a desired state.
+
+The desired leases are read from a YAML file and matched by name with the
+current leases, listed once. Only the calls needed to converge are made:
+missing leases are created, leases whose end time differs are updated,
+leases that differ in anything that cannot be updated are replaced, and
+with pruning, named leases missing from the file are deleted. Running the
+same file again makes no calls beyond the listing.
+"""
+
+import datetime
+import json
+import logging
+import sys
+
+from osc_lib import exceptions
+import yaml
+
+from esileapclient.common import concurrency
+from esileapclient.common import utils
+from esileapclient.v1.lease import Lease as LEASE_RESOURCE
+
+LOG = logging.getLogger(__name__)
+
+CREATE = 'create'
+UPDATE = 'update'
+REPLACE = 'replace'
+DELETE = 'delete'
+
+# Operations are listed and run in this order; deletions (and the
+# deletions of replaced leases) finish before anything is created, so a
+# new lease never overlaps the one it replaces on the same resource
+ORDER = (DELETE, REPLACE, CREATE, UPDATE)
+
+LABELS = ('Action', 'Name', 'UUID', 'Changes')
+
+REQUIRED = ('name', 'resource_uuid', 'project_id')
+
+# Fields given by name or UUID, and the field naming them by name
+ALIASES = {'resource_uuid': 'resource', 'project_id': 'project'}
+
+TIMES = ('start_time', 'end_time')
+
+
+def read_desired(path):
+    """Read the desired leases from a YAML file, or '-' for standard input.
+
+    The file holds a list of leases, or a mapping with a 'leases' list.
+    Each lease is a mapping of the attributes of 'esi lease create',
+    with name, resource_uuid and project_id required.
+    :returns: A list of dicts.
+    """
+
+    try:
+        if path == '-':
+            document = yaml.safe_load(sys.stdin)
+        else:
+            with open(path) as f:
+                document = yaml.safe_load(f)
+    except OSError as e:
+        raise exceptions.CommandError('Cannot read %s: %s' % (path, e))
+    except yaml.YAMLError as e:
+        raise exceptions.CommandError('Invalid YAML in %s: %s' % (path, e))
+
+    if isinstance(document, dict):
+        document = document.get('leases')
+    if document is None:
+        return []
+    if not isinstance(document, list):
+        raise exceptions.CommandError(
+            '%s must hold a list of leases' % path)
+
+    allowed = set(LEASE_RESOURCE._creation_attributes) - {'status'}
+    names = set()
+    for lease in document:
+        if not isinstance(lease, dict):
+            raise exceptions.CommandError(
+                'Lease %r in %s is not a mapping' % (lease, path))
+        invalid = sorted(set(lease) - allowed)
+        if invalid:
+            raise exceptions.CommandError(
+                'The attribute(s) "%s" of lease %s are invalid' %
+                ('","'.join(invalid), lease.get('name')))
+        missing = [f for f in REQUIRED if lease.get(f) is None]
+        if missing:
+            raise exceptions.CommandError(
+                'Lease %s is missing "%s"' %
+                (lease.get('name'), '","'.join(missing)))
+        for field in REQUIRED:
+            # YAML reads numeric names and IDs as numbers
+            lease[field] = str(lease[field])
+        if lease['name'] in names:
+            raise exceptions.CommandError(
+                'Lease %s is listed more than once' % lease['name'])
+        names.add(lease['name'])
+    return document
+
+
+def _to_text(value):
+    # YAML reads unquoted times as datetimes
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return value
+
+
+def _parse_time(value):
+    """Returns a time as a naive UTC datetime, to compare times."""
+
+    value = _to_text(value)
+    if not isinstance(value, str):
+        return value
+    try:
+        if value.endswith('Z'):
+            value = value[:-1] + '+00:00'
+        parsed = datetime.datetime.fromisoformat(value)
+    except ValueError:
+        return value
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(datetime.timezone.utc)
+        parsed = parsed.replace(tzinfo=None)
+    return parsed
+
+
+def _differs(lease, field, value):
+    """Returns whether a field of a current lease differs from value."""
+
+    current = utils.get_resource_value(lease, field)
+    if field in TIMES:
+        return _parse_time(current) != _parse_time(value)
+    if field in ALIASES:
+        alias = utils.get_resource_value(lease, ALIASES[field])
+        return value not in (current, alias)
+    if field == 'properties':
+        return (current or {}) != value
+    return current != value
+
+
+def _changes(lease, desired):
+    changes = []
+    for field, value in desired.items():
+        if field != 'name' and _differs(lease, field, value):
+            old = utils.get_resource_value(lease, field)
+            changes.append((field, old, _to_text(value)))
+    return changes
+
+
+def _operation(action, name, uuid=None, fields=None, changes=()):
+    return {'action': action, 'name': name, 'uuid': uuid,
+            'fields': fields or {}, 'changes': list(changes)}
+
+
+def plan(desired, current, prune=False):
+    """Compute the operations converging the current leases to desired.
+
+    :param desired: The desired leases, as returned by read_desired().
+    :param current: The current leases. Leases without a name are left
+        alone.
+    :param prune: Delete named leases that are not desired.
+    :returns: A list of operations, dicts with the action, the name, the
+        UUID of the current lease, the fields to send and the changes as
+        (field, old value, new value) tuples, in the order of ORDER.
+    """
+
+    wanted = {lease['name']: lease for lease in desired}
+    by_name = {}
+    operations = []
+    for lease in current:
+        name = utils.get_resource_value(lease, 'name')
+        uuid = utils.get_resource_value(lease, 'uuid')
+        if not name:
+            continue
+        if name in wanted:
+            if name in by_name:
+                raise exceptions.CommandError(
+                    'Several leases are named %s: %s, %s' %
+                    (name, by_name[name][1], uuid))
+            by_name[name] = (lease, uuid)
+        elif prune:
+            operations.append(_operation(DELETE, name, uuid))
+
+    updatable = LEASE_RESOURCE._update_attributes
+    for name, lease in wanted.items():
+        fields = {k: _to_text(v) for k, v in lease.items()}
+        if name not in by_name:
+            operations.append(_operation(CREATE, name, fields=fields))
+            continue
+        existing, uuid = by_name[name]
+        changes = _changes(existing, lease)
+        if any(field not in updatable for field, _, _ in changes):
+            operations.append(_operation(REPLACE, name, uuid, fields,
+                                         changes))
+        elif changes:
+            update = {field: new for field, _, new in changes}
+            operations.append(_operation(UPDATE, name, uuid, update,
+                                         changes))
+
+    # sorted() is stable, so each action keeps the order of the file
+    return sorted(operations, key=lambda op: ORDER.index(op['action']))
+
+
+def apply(client, operations, max_workers=concurrency.DEFAULT_WORKERS):
+    """Run the operations of a plan, concurrently within each phase.
+
+    Deletions, including those of replaced leases, run first; creations
+    and updates run once they are done. A lease whose deletion fails is
+    not created again.
+    :returns: A generator of (operation, uuid, error) tuples, where uuid is
+        that of the new lease for creations and replacements.
+    """
+
+    limiter = concurrency.limiter_for(client)
+
+    def delete(op):
+        return client.delete_lease(op['uuid'])
+
+    def create_or_update(op):
+        if op['action'] == UPDATE:
+            return client.update_lease(op['uuid'], **op['fields'])
+        return client.create_lease(**op['fields'])
+
+    deletions = [op for op in operations
+                 if op['action'] in (DELETE, REPLACE)]
+    failed = set()
+    for op, _, error in concurrency.map_concurrently(
+            delete, deletions, max_workers, limiter):
+        if error is not None:
+            LOG.warning('Failed to delete lease %s (%s): %s',
+                        op['name'], op['uuid'], error)
+            failed.add(op['uuid'])
+            yield op, op['uuid'], error
+        elif op['action'] == DELETE:
+            yield op, op['uuid'], None
+
+    rest = [op for op in operations
+            if op['action'] != DELETE and op['uuid'] not in failed]
+    for op, lease, error in concurrency.map_concurrently(
+            create_or_update, rest, max_workers, limiter):
+        if error is not None:
+            LOG.warning('Failed to %s lease %s: %s',
+                        op['action'], op['name'], error)
+            yield op, op['uuid'], error
+        elif op['action'] == UPDATE:
+            yield op, op['uuid'], None
+        else:
+            yield op, lease.uuid, None
+
+
+def _format(value):
+    if value is None:
+        return ''
+    return value if isinstance(value, str) else json.dumps(value)
+
+
+def format_changes(changes):
+    """Returns the changes of an operation as text."""
+
+    return '\n'.join('%s: %s -> %s' % (field, _format(old), _format(new))
+                     for field, old, new in changes)
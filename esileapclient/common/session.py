@@ -0,0 +1,167 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Connections to the ESI-Leap API, with the client's hooks on every request.
+
+The SDK proxy of a connection sends every request through its request()
+method, so the hooks installed there apply to all commands: requests wait
+for the --rate-limit bucket of their cloud and resource, identical GETs
+in flight at the same time share one request, GETs the server answered
+with an ETag are revalidated with If-None-Match, and the SDK decodes their
+JSON responses, list responses included, with jsonutils.loads (orjson,
+when it is installed).
+"""
+
+import collections
+import collections.abc
+import logging
+import re
+import threading
+
+from esi import connection
+
+from esileapclient.common import concurrency
+from esileapclient.common import jsonutils
+from esileapclient.common import ratelimit
+from esileapclient.common import timing
+
+LOG = logging.getLogger(__name__)
+
+_VERSION = re.compile(r'^v\d+(\.\d+)?$')
+
+# Number of ETag validators a proxy remembers for conditional GETs
+VALIDATOR_CACHE_SIZE = 128
+
+
+def resource_name(url):
+    """Returns the name of the resource a request URL is about."""
+
+    path = url.split('?', 1)[0].split('://', 1)[-1]
+    parts = [p for p in path.split('/') if p]
+    if '://' in url:
+        # Drop the host of absolute URLs
+        parts = parts[1:]
+    for part in parts:
+        if not _VERSION.match(part):
+            return part
+    return ''
+
+
+def _freeze(value):
+    """Returns a hashable form of request arguments."""
+
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, collections.abc.Hashable):
+        return value
+    return repr(value)
+
+
+def _decode_with_jsonutils(response):
+    """Make response.json() decode the body with jsonutils.loads."""
+
+    if getattr(response, 'content', None) is None:
+        return
+    json = response.json
+
+    def decode(**kwargs):
+        if kwargs:
+            return json(**kwargs)
+        return jsonutils.loads(response.content)
+
+    response.json = decode
+
+
+def _replay(response, body):
+    """Turn a 304 Not Modified response into a 200 with the cached body."""
+
+    response.status_code = 200
+    # requests keeps the body read from the connection in _content
+    response._content = body
+
+
+def install_hooks(proxy, cloud=None):
+    """Install the client's hooks on the requests of an SDK proxy.
+
+    :param cloud: The name of the cloud of the proxy, to key rate limits.
+    :returns: The proxy.
+    """
+
+    cloud = cloud if isinstance(cloud, str) else 'default'
+    request = proxy.request
+    in_flight = concurrency.SingleFlight()
+    validators = collections.OrderedDict()
+    validators_lock = threading.Lock()
+
+    def send(url, method, *args, **kwargs):
+        bucket = ratelimit.bucket_for(cloud, resource_name(url))
+        if bucket is not None:
+            with timing.phase('throttle'):
+                bucket.acquire()
+        response = request(url, method, *args, **kwargs)
+        _decode_with_jsonutils(response)
+        return response
+
+    def revalidate(key, url, method, **kwargs):
+        with validators_lock:
+            cached = validators.get(key)
+        if cached is not None:
+            headers = dict(kwargs.get('headers') or {})
+            headers['If-None-Match'] = cached[0]
+            kwargs['headers'] = headers
+
+        response = send(url, method, **kwargs)
+
+        if response.status_code == 304 and cached is not None:
+            LOG.debug('%s not modified since ETag %s', url, cached[0])
+            _replay(response, cached[1])
+            with validators_lock:
+                if key in validators:
+                    validators.move_to_end(key)
+            return response
+
+        etag = None
+        if response.status_code == 200:
+            etag = (response.headers or {}).get('ETag')
+        with validators_lock:
+            if etag:
+                validators[key] = (etag, response.content)
+                validators.move_to_end(key)
+                if len(validators) > VALIDATOR_CACHE_SIZE:
+                    validators.popitem(last=False)
+            else:
+                validators.pop(key, None)
+        return response
+
+    def hooked_request(url, method, *args, **kwargs):
+        if method != 'GET' or args:
+            return send(url, method, *args, **kwargs)
+        # Callers sharing a response, or replaying a cached body, each
+        # decode their own objects from it
+        key = (url, _freeze(kwargs))
+        return in_flight.do(key, revalidate, key, url, method, **kwargs)
+
+    proxy.request = hooked_request
+    return proxy
+
+
+def connect(config):
+    """Returns the lease proxy of a connection to a cloud region.
+
+    :param config: The CloudRegion to connect to.
+    """
+
+    proxy = connection.ESIConnection(config=config).lease
+    return install_hooks(proxy, getattr(config, 'name', None))
@@ -0,0 +1,168 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Lightweight per-phase wall time accounting for the --phase-timing option.
+
+Commands mark their phases (client construction, requests, filtering and
+formatting) with phase() and iterate(). Phases nest: time spent in an
+inner phase is not counted in the outer one, so lazily chained iterators
+are each charged for their own work. Phases of worker threads overlap
+the main thread's and each other, so they are reported apart, summed over
+threads, and not counted in its wall time. When timing is disabled both
+helpers return immediately and iterate() returns the iterable unchanged.
+"""
+
+import argparse
+import atexit
+import contextlib
+import logging
+import sys
+import threading
+import time
+
+LOG = logging.getLogger(__name__)
+
+_timer = None
+_NO_PHASE = contextlib.nullcontext()
+
+
+class PhaseTimer(object):
+    """Accumulates exclusive wall time and entry counts per phase.
+
+    Phases entered by the thread that created the timer are kept in totals
+    and counts, those of other threads in thread_totals and thread_counts.
+    """
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.started = clock()
+        self.totals = {}
+        self.counts = {}
+        self.thread_totals = {}
+        self.thread_counts = {}
+        self._owner = threading.get_ident()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _charge(self, name, now, count=0):
+        totals, counts = self._local.accounts
+        with self._lock:
+            elapsed = now - self._local.mark
+            totals[name] = totals.get(name, 0.0) + elapsed
+            counts[name] = counts.get(name, 0) + count
+
+    def enter(self, name):
+        now = self.clock()
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+            if threading.get_ident() == self._owner:
+                self._local.accounts = (self.totals, self.counts)
+            else:
+                self._local.accounts = (self.thread_totals,
+                                        self.thread_counts)
+        elif stack:
+            self._charge(stack[-1], now)
+        stack.append(name)
+        self._local.mark = now
+
+    def exit(self):
+        now = self.clock()
+        self._charge(self._local.stack.pop(), now, count=1)
+        self._local.mark = now
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        self.enter(name)
+        try:
+            yield
+        finally:
+            self.exit()
+
+    def iterate(self, iterable, name):
+        iterator = iter(iterable)
+        while True:
+            self.enter(name)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.exit()
+            yield item
+
+    def report(self):
+        """Return (phase, seconds, count) rows of the main thread, followed
+        by the time it spent outside any phase, the total, and the rows of
+        the phases of worker threads."""
+        total = self.clock() - self.started
+        with self._lock:
+            rows = [(name, seconds, self.counts[name])
+                    for name, seconds in self.totals.items()]
+            threads = [('%s (threads)' % name, seconds,
+                        self.thread_counts[name])
+                       for name, seconds in self.thread_totals.items()]
+        rows.append(('other', total - sum(r[1] for r in rows), ''))
+        rows.append(('total', total, ''))
+        return rows + threads
+
+
+def enable():
+    """Start timing phases and print a report to stderr at exit."""
+    global _timer
+    if _timer is None:
+        _timer = PhaseTimer()
+        atexit.register(print_report)
+
+
+def disable():
+    global _timer
+    _timer = None
+
+
+def phase(name):
+    """Return a context manager that times a phase, if timing is enabled."""
+    if _timer is None:
+        return _NO_PHASE
+    return _timer.phase(name)
+
+
+def iterate(iterable, name):
+    """Charge the time spent producing each item of iterable to a phase, if
+    timing is enabled."""
+    if _timer is None:
+        return iterable
+    return _timer.iterate(iterable, name)
+
+
+def print_report(stream=None):
+    if _timer is None:
+        return
+    stream = stream or sys.stderr
+    rows = _timer.report()
+    width = max(len(r[0]) for r in rows)
+    stream.write('Phase timing:\n')
+    for name, seconds, count in rows:
+        stream.write('  %-*s %10.4f s %8s\n' % (width, name, seconds, count))
+
+
+class PhaseTimingAction(argparse.Action):
+    """Enables phase timing as soon as the option is parsed."""
+
+    def __init__(self, option_strings, dest, **kwargs):
+        super(PhaseTimingAction, self).__init__(option_strings, dest,
+                                                nargs=0, **kwargs)
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        setattr(namespace, self.dest, True)
+        enable()
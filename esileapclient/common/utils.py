@@ -1,7 +1,13 @@
+import argparse
 import re
+import heapq
+import itertools
 import operator
 import logging
 
+from openstack import resource as sdk_resource
+from osc_lib import exceptions
+
 # Configure the logger
 LOG = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
@@ -15,6 +21,8 @@ OPS = {
     '=': operator.eq,
 }
 
+SORT_DIRECTIONS = ('asc', 'desc')
+
 OPERATOR_PATTERN = '|'.join(re.escape(op) for op in OPS.keys())
 FILTER_PATTERN = re.compile(rf'([^><=]+)({OPERATOR_PATTERN})(.+)')
 
@@ -54,8 +62,12 @@ def node_matches_property_filters(node, property_filters):
     return True
 
 
-def filter_nodes_by_properties(nodes, properties):
-    """Filter a list of nodes based on property filters."""
+def iter_filter_nodes_by_properties(nodes, properties):
+    """Lazily filter an iterable of nodes based on property filters.
+
+    The filters are parsed immediately; nodes are only consumed as the
+    returned iterator is.
+    """
     if not properties:
         return nodes
     property_filters = []
@@ -66,9 +78,214 @@ def filter_nodes_by_properties(nodes, properties):
             LOG.error(f"Error parsing property filter '{prop}': {e}")
             raise
 
-    filtered_nodes = [
-        node for node in nodes
-        if node_matches_property_filters(node, property_filters)
-    ]
+    return (node for node in nodes
+            if node_matches_property_filters(node, property_filters))
+
+
+def filter_nodes_by_properties(nodes, properties):
+    """Filter a list of nodes based on property filters."""
+    if not properties:
+        return nodes
+    return list(iter_filter_nodes_by_properties(nodes, properties))
+
+
+def tag_cloud_region(resources, cloud_region):
+    """Lazily annotate resources with the cloud and region they came from."""
+    for resource in resources:
+        resource.cloud = cloud_region.name
+        resource.region = cloud_region.config['region_name']
+        yield resource
+
+
+def get_resource_value(resource, key):
+    """Return a field of a resource, falling back to its properties."""
+    # SDK resources are dicts too, but only attribute access knows their
+    # aliases (e.g. 'resource' for 'resource_name')
+    if isinstance(resource, dict) and \
+            not isinstance(resource, sdk_resource.Resource):
+        value = resource.get(key)
+        properties = resource.get('resource_properties',
+                                  resource.get('properties'))
+    else:
+        value = getattr(resource, key, None)
+        properties = getattr(resource, 'resource_properties', None) or \
+            getattr(resource, 'properties', None)
+    if value is None and isinstance(properties, dict):
+        value = properties.get(key)
+    return value
+
+
+def parse_sort_key(sort_key):
+    """Parse a '<key>[:<direction>]' string into a key and reverse flag."""
+    key, sep, direction = sort_key.rpartition(':')
+    if not sep or direction not in SORT_DIRECTIONS:
+        key, direction = sort_key, 'asc'
+    if not key:
+        raise ValueError(f"Invalid sort key: {sort_key}")
+    return key, direction == 'desc'
+
+
+def _sort_value(value, reverse):
+    """Build a comparable sort key; numbers sort numerically and missing
+    values always sort last."""
+    if value is None or value == '':
+        return (0 if reverse else 2, '')
+    if isinstance(value, str):
+        value = convert_value(value)
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return (1, str(value))
+    return (2 if reverse else 0, value)
+
+
+def sort_resources(resources, sort_key=None, limit=None):
+    """Sort resources by a field or property, keeping at most limit.
+
+    When a limit is given the top entries are selected with a bounded heap
+    while the resources are consumed, so the full result set is never
+    sorted.
+    """
+    if limit is not None and limit < 1:
+        raise exceptions.CommandError(
+            'The limit must be a positive integer, not %s' % limit)
+    if sort_key is None:
+        if limit is None:
+            return resources
+        return itertools.islice(resources, limit)
+
+    key, reverse = parse_sort_key(sort_key)
+
+    def sort_value(resource):
+        return _sort_value(get_resource_value(resource, key), reverse)
+
+    if limit is None:
+        return sorted(resources, key=sort_value, reverse=reverse)
+    select = heapq.nlargest if reverse else heapq.nsmallest
+    return select(limit, resources, key=sort_value)
+
+
+def positive_int(value):
+    """Parse a command line argument that must be a positive integer."""
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError(
+            '%s is not a positive integer' % value)
+    return number
+
+
+def positive_float(value):
+    """Parse a command line argument that must be a positive number."""
+    try:
+        number = float(value)
+    except ValueError:
+        number = 0.0
+    # Also rejects nan
+    if not number > 0:
+        raise argparse.ArgumentTypeError(
+            '%s is not a positive number' % value)
+    return number
+
+
+def split_list_arguments(values):
+    """Flatten repeated and comma-separated argument values into a list."""
+    if not values:
+        return []
+    if isinstance(values, str):
+        values = [values]
+    return [v.strip() for value in values for v in value.split(',')
+            if v.strip()]
+
+
+def normalize_column(name):
+    """Return a field label or name as cliff matches -c columns."""
+    return name.lower().strip().replace(' ', '_')
+
+
+def select_fields(fields, columns):
+    """Return the fields selected by a command's -c/--column options.
+
+    Columns match a field by its key or, as cliff matches them, by its
+    label in lower case with spaces replaced by underscores. If no column
+    is selected or none matches, all fields are returned so that cliff can
+    report the error.
+
+    :param fields: A dict of field keys to labels.
+    :param columns: The parsed -c/--column values.
+    """
+    if not columns:
+        return fields
+    requested = set(normalize_column(c) for c in columns)
+    selected = {k: v for k, v in fields.items()
+                if k in requested or normalize_column(v) in requested}
+    return selected or fields
+
+
+def _group_value(value):
+    try:
+        hash(value)
+    except TypeError:
+        return str(value)
+    return value
+
+
+def _numeric_value(value):
+    if isinstance(value, str):
+        value = convert_value(value)
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return value
+
+
+def aggregate_resources(resources, group_by, properties=None, labels=None):
+    """Group resources and summarize numeric properties in a single pass.
+
+    Every group gets a count and, for each of the given properties, the
+    sum, minimum and maximum of its numeric values. Non-numeric and missing
+    values are ignored.
+
+    :param resources: An iterable of resources or dictionaries.
+    :param group_by: A list of fields or properties to group by.
+    :param properties: A list of numeric fields or properties to summarize.
+    :param labels: Optional mapping of field names to column labels.
+    :returns: A tuple of column labels and a list of rows.
+    """
+    properties = properties or []
+    labels = labels or {}
+    groups = {}
+
+    for resource in resources:
+        key = tuple(_group_value(get_resource_value(resource, k))
+                    for k in group_by)
+        stats = groups.get(key)
+        if stats is None:
+            stats = groups[key] = [0] + [[0, None, None] for _ in properties]
+        stats[0] += 1
+        for prop_stats, prop in zip(stats[1:], properties):
+            value = _numeric_value(get_resource_value(resource, prop))
+            if value is None:
+                continue
+            prop_stats[0] += value
+            if prop_stats[1] is None or value < prop_stats[1]:
+                prop_stats[1] = value
+            if prop_stats[2] is None or value > prop_stats[2]:
+                prop_stats[2] = value
+
+    columns = [labels.get(k, k) for k in group_by] + ['Count']
+    for prop in properties:
+        columns += ['Sum %s' % prop, 'Min %s' % prop, 'Max %s' % prop]
+
+    rows = []
+    for key in sorted(groups, key=lambda k: tuple(_sort_value(v, False)
+                                                  for v in k)):
+        stats = groups[key]
+        row = list(key) + [stats[0]]
+        for total, minimum, maximum in stats[1:]:
+            if minimum is None:
+                row += ['', '', '']
+            else:
+                row += [total, minimum, maximum]
+        rows.append(tuple(row))
 
-    return filtered_nodes
+    return columns, rows
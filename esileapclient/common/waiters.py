@@ -0,0 +1,131 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Waiting for leases to reach a status.
+"""
+
+import datetime
+import logging
+import random
+import time
+
+from osc_lib import exceptions
+
+from esileapclient.common import concurrency
+from esileapclient.common import utils
+
+LOG = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 600
+DEFAULT_INTERVAL = 2
+MAX_INTERVAL = 30
+
+# Statuses a lease does not leave once it is in them
+FINAL_STATUSES = ('error', 'deleted', 'expired')
+
+# With events, leases without new events are still polled every this many
+# rounds in case a status change was not recorded as an event
+FULL_POLL_ROUNDS = 5
+
+# Allowance for clock skew when first asking the server for events
+EVENT_CLOCK_SKEW = 60
+
+
+class _EventCursor(object):
+    """Tracks which leases have new events since the previous call."""
+
+    def __init__(self, client):
+        self.client = client
+        self.last_event_id = None
+        now = datetime.datetime.now(datetime.timezone.utc)
+        start = now - datetime.timedelta(seconds=EVENT_CLOCK_SKEW)
+        self.last_event_time = start.strftime('%Y-%m-%dT%H:%M:%S')
+
+    def changed(self):
+        """Return the UUIDs of objects with new events."""
+        if self.last_event_id is not None:
+            filters = {'last_event_id': self.last_event_id}
+        else:
+            filters = {'last_event_time': self.last_event_time}
+        changed = set()
+        for event in self.client.events(**filters):
+            changed.add(event.object_uuid)
+            if self.last_event_id is None or event.id > self.last_event_id:
+                self.last_event_id = event.id
+        return changed
+
+
+def wait_for_status(client, uuids, status, timeout=DEFAULT_TIMEOUT,
+                    interval=DEFAULT_INTERVAL, max_interval=MAX_INTERVAL,
+                    use_events=True,
+                    max_workers=concurrency.DEFAULT_WORKERS):
+    """Wait for leases to reach a status.
+
+    Pending leases are fetched concurrently over the client's session.
+    Between rounds the wait grows exponentially, with jitter, up to
+    max_interval. With use_events, the events endpoint is checked first and
+    only leases with new events are fetched again, apart from a full poll
+    every FULL_POLL_ROUNDS rounds.
+
+    :param client: The lease client (SDK lease proxy).
+    :param uuids: The UUIDs of the leases to wait for.
+    :param status: The status to wait for, e.g. 'active'.
+    :param timeout: Seconds to wait before giving up.
+    :returns: A dict of lease UUID to lease, in the order of uuids.
+    :raises: CommandError if a lease reaches a final status other than
+        status, or on timeout.
+    """
+    deadline = time.monotonic() + timeout
+    pending = list(dict.fromkeys(uuids))
+    leases = {}
+    cursor = _EventCursor(client) if use_events else None
+    delay = interval
+    to_check = pending
+    rounds = 0
+
+    while True:
+        for uuid, lease, error in concurrency.map_concurrently(
+                client.get_lease, to_check, max_workers,
+                concurrency.limiter_for(client)):
+            if error is not None:
+                LOG.warning('Failed to get lease %s: %s', uuid, error)
+                continue
+            lease_status = utils.get_resource_value(lease, 'status')
+            if lease_status == status:
+                leases[uuid] = lease
+            elif lease_status in FINAL_STATUSES:
+                raise exceptions.CommandError(
+                    'Lease %s is %s, not %s' % (uuid, lease_status, status))
+        pending = [uuid for uuid in pending if uuid not in leases]
+        if not pending:
+            return {uuid: leases[uuid] for uuid in dict.fromkeys(uuids)}
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise exceptions.CommandError(
+                'Timed out waiting for lease(s) %s to become %s' %
+                (', '.join(pending), status))
+        time.sleep(min(remaining, random.uniform(delay / 2.0, delay)))
+        delay = min(delay * 2, max_interval)
+        rounds += 1
+
+        to_check = pending
+        if cursor is not None and rounds % FULL_POLL_ROUNDS:
+            try:
+                changed = cursor.changed()
+            except Exception as e:
+                LOG.warning('Failed to list events, polling leases '
+                            'instead: %s', e)
+                cursor = None
+            else:
+                to_check = [uuid for uuid in pending if uuid in changed]
@@ -10,10 +10,15 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
-from esi import connection
 import logging
 from openstackclient.i18n import _
 
+from esileapclient.common import profiling
+from esileapclient.common import ratelimit
+from esileapclient.common import session
+from esileapclient.common import timing
+from esileapclient.common import utils
+
 
 DEFAULT_API_VERSION = '1'
 
@@ -40,7 +45,8 @@ def make_client(instance):
 
     :param ClientManager instance: The ClientManager that owns the new client
     """
-    return connection.ESIConnection(config=instance._cli_options).lease
+    with timing.phase('client'):
+        return session.connect(instance._cli_options)
 
 
 def build_option_parser(parser):
@@ -61,5 +67,58 @@ def build_option_parser(parser):
         help=_('ESI-LEAP API version, default=%s')
         % DEFAULT_API_VERSION,
     )
+    parser.add_argument(
+        '--profile',
+        default=False,
+        action=profiling.ProfileAction,
+        help=_('Profile the command with cProfile and write the pstats '
+               'dump to esi-profile-<time>-<pid>.prof, with a text summary '
+               'in a matching .txt file'),
+    )
+    parser.add_argument(
+        '--trace-malloc',
+        default=False,
+        action=profiling.TraceMallocAction,
+        help=_('Trace memory allocations of the command and write a report '
+               'to esi-tracemalloc-<time>-<pid>.txt'),
+    )
+    parser.add_argument(
+        '--phase-timing',
+        default=False,
+        action=timing.PhaseTimingAction,
+        help=_('Print the wall time spent constructing the client, making '
+               'requests, filtering and formatting results'),
+    )
+    parser.add_argument(
+        '--profile-dir',
+        metavar='<directory>',
+        action=profiling.ReportDirAction,
+        help=_('Directory to write --profile and --trace-malloc reports '
+               'to, default=current directory'),
+    )
+    parser.add_argument(
+        '--rate-limit',
+        metavar='<requests/s>',
+        type=utils.positive_float,
+        action=ratelimit.RateLimitAction,
+        help=_('Send at most this many requests per second for each cloud '
+               'and resource, default=env[ESI_RATE_LIMIT] or no limit'),
+    )
+    parser.add_argument(
+        '--rate-burst',
+        metavar='<count>',
+        type=utils.positive_float,
+        action=ratelimit.RateLimitAction,
+        help=_('Requests allowed at once under --rate-limit after a quiet '
+               'period, default=env[ESI_RATE_BURST] or one second\'s '
+               'worth'),
+    )
+    parser.add_argument(
+        '--rate-limit-dir',
+        metavar='<directory>',
+        action=ratelimit.RateLimitAction,
+        help=_('Directory of lock files sharing --rate-limit with other '
+               'processes, default=env[ESI_RATE_LIMIT_DIR] or not shared'),
+    )
 
     return parser
@@ -13,7 +13,12 @@
 import logging
 
 from osc_lib.command import command
+from osc_lib import exceptions
+from osc_lib import utils as oscutils
 
+from esileapclient.common import concurrency
+from esileapclient.common import timing
+from esileapclient.common import utils
 from esileapclient.v1.console_auth_token import ConsoleAuthToken \
     as CONSOLE_AUTH_TOKEN_RESOURCE
 
@@ -21,6 +26,72 @@ from esileapclient.v1.console_auth_token import ConsoleAuthToken \
 LOG = logging.getLogger(__name__)
 
 
+def _add_node_arguments(parser):
+    """Add the options selecting the nodes of a bulk command."""
+
+    parser.add_argument(
+        "nodes",
+        metavar="<node_uuid_or_name>",
+        nargs='*',
+        help="Node UUIDs or names")
+    parser.add_argument(
+        '--resource-class',
+        dest='resource_class',
+        required=False,
+        help="Also select the nodes with this resource class.")
+    parser.add_argument(
+        '--owner',
+        dest='owner',
+        required=False,
+        help="Also select the nodes with this owner.")
+    parser.add_argument(
+        '--lessee',
+        dest='lessee',
+        required=False,
+        help="Also select the nodes with this lessee.")
+    parser.add_argument(
+        '--property',
+        dest='properties',
+        required=False,
+        action='append',
+        help="Only select listed nodes matching these properties. "
+             "Format: 'key>=value'. Can be specified multiple times. "
+             f"Supported operators are: {', '.join(utils.OPS.keys())}",
+        metavar='"key>=value"')
+    parser.add_argument(
+        '--concurrency',
+        dest='concurrency',
+        type=int,
+        default=concurrency.DEFAULT_WORKERS,
+        metavar='<count>',
+        help="Maximum number of nodes to handle at once "
+             "(default: %d); fewer are used while the API is "
+             "slow or overloaded." % concurrency.DEFAULT_WORKERS)
+
+
+def _select_nodes(client, parsed_args):
+    """Returns the nodes given by name and those matching the filters."""
+
+    nodes = list(parsed_args.nodes)
+    filters = {
+        'resource_class': parsed_args.resource_class,
+        'owner': parsed_args.owner,
+        'lessee': parsed_args.lessee,
+    }
+    if any(v is not None for v in filters.values()) or \
+            parsed_args.properties:
+        with timing.phase('request'):
+            listed = utils.filter_nodes_by_properties(
+                client.nodes(**filters), parsed_args.properties)
+        nodes.extend(utils.get_resource_value(node, 'uuid')
+                     for node in listed)
+    if not nodes:
+        raise exceptions.CommandError(
+            'Specify nodes or filters selecting them')
+    # Drop duplicates, keeping the order given
+    return list(dict.fromkeys(nodes))
+
+
 class CreateConsoleAuthToken(command.ShowOne):
     """Create a new console auth token."""
 
@@ -44,7 +115,8 @@ class CreateConsoleAuthToken(command.ShowOne):
         fields = dict((k, v) for (k, v) in vars(parsed_args).items()
                       if k in field_list and v is not None)
 
-        cat = client.create_console_auth_token(**fields)
+        with timing.phase('request'):
+            cat = client.create_console_auth_token(**fields)
 
         data = dict([(f, getattr(cat, f, '')) for f in
                      CONSOLE_AUTH_TOKEN_RESOURCE.fields])
@@ -71,3 +143,72 @@ class DeleteConsoleAuthToken(command.Command):
         client.delete_console_auth_token(parsed_args.node_uuid_or_name)
         print('Disabled console auth tokens for node %s' %
               parsed_args.node_uuid_or_name)
+
+
+class BulkCreateConsoleAuthToken(command.Lister):
+    """Create console auth tokens for many nodes."""
+
+    log = logging.getLogger(__name__ + ".BulkCreateConsoleAuthToken")
+
+    def get_parser(self, prog_name):
+        parser = super(BulkCreateConsoleAuthToken, self).get_parser(
+            prog_name)
+        _add_node_arguments(parser)
+        return parser
+
+    def take_action(self, parsed_args):
+        client = self.app.client_manager.lease
+        nodes = _select_nodes(client, parsed_args)
+
+        columns = CONSOLE_AUTH_TOKEN_RESOURCE.fields.keys()
+        labels = list(CONSOLE_AUTH_TOKEN_RESOURCE.fields.values())
+
+        def create(node):
+            return client.create_console_auth_token(node_uuid_or_name=node)
+
+        def token_row(result):
+            node, cat, error = result
+            if error is not None:
+                # Failures are reported in their row, not raised
+                LOG.warning('Failed to create a console auth token for '
+                            'node %s: %s', node, error)
+                return (node, '', '', str(error))
+            return oscutils.get_item_properties(cat, columns) + ('',)
+
+        results = concurrency.map_concurrently(
+            create, nodes, parsed_args.concurrency,
+            concurrency.limiter_for(client))
+
+        return (labels + ['Error'],
+                timing.iterate((token_row(r) for r in results), 'request'))
+
+
+class BulkDeleteConsoleAuthToken(command.Lister):
+    """Delete the console auth tokens of many nodes."""
+
+    log = logging.getLogger(__name__ + ".BulkDeleteConsoleAuthToken")
+
+    def get_parser(self, prog_name):
+        parser = super(BulkDeleteConsoleAuthToken, self).get_parser(
+            prog_name)
+        _add_node_arguments(parser)
+        return parser
+
+    def take_action(self, parsed_args):
+        client = self.app.client_manager.lease
+        nodes = _select_nodes(client, parsed_args)
+
+        def result_row(result):
+            node, _, error = result
+            if error is not None:
+                LOG.warning('Failed to delete the console auth tokens of '
+                            'node %s: %s', node, error)
+                return (node, str(error))
+            return (node, '')
+
+        results = concurrency.map_concurrently(
+            client.delete_console_auth_token, nodes,
+            parsed_args.concurrency, concurrency.limiter_for(client))
+
+        return (['Node', 'Error'],
+                timing.iterate((result_row(r) for r in results), 'request'))
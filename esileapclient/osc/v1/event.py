@@ -15,6 +15,7 @@ import logging
 from osc_lib.command import command
 from osc_lib import utils as oscutils
 
+from esileapclient.common import timing
 from esileapclient.v1.event import Event as EVENT_RESOURCE
 
 LOG = logging.getLogger(__name__)
@@ -73,8 +74,9 @@ class ListEvent(command.Lister):
             'resource_uuid': parsed_args.resource_uuid,
         }
 
-        data = list(client.events(**filters))
+        data = timing.iterate(client.events(**filters), 'request')
         columns = EVENT_RESOURCE.fields.keys()
         labels = EVENT_RESOURCE.fields.values()
         return (labels,
-                (oscutils.get_item_properties(s, columns) for s in data))
+                timing.iterate((oscutils.get_item_properties(s, columns)
+                                for s in data), 'format'))
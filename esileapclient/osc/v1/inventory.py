@@ -0,0 +1,131 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Helpers shared by the commands showing many resources at once and
+comparing inventories of resources, for leases and offers alike.
+"""
+
+import logging
+
+from osc_lib import exceptions
+from osc_lib import utils as oscutils
+
+from esileapclient.common import concurrency
+from esileapclient.common import diff
+from esileapclient.common import timing
+from esileapclient.common import utils
+
+LOG = logging.getLogger(__name__)
+
+
+def _name(resource_class):
+    return resource_class.__name__.lower()
+
+
+def add_bulk_show_arguments(parser, resource_class):
+    """Add the arguments of a command showing many resources."""
+
+    name = _name(resource_class)
+    parser.add_argument(
+        "uuids",
+        metavar="<uuid>",
+        nargs='+',
+        help="UUIDs of the %ss" % name)
+    parser.add_argument(
+        '--concurrency',
+        dest='concurrency',
+        type=int,
+        default=concurrency.DEFAULT_WORKERS,
+        metavar='<count>',
+        help="Maximum number of %ss to fetch at once "
+             "(default: %d); fewer are used while the API is "
+             "slow or overloaded." % (name, concurrency.DEFAULT_WORKERS))
+
+
+def bulk_show(client, get, resource_class, parsed_args):
+    """Returns the columns and rows of the resources given by UUID.
+
+    The resources are fetched concurrently with get. Failures are reported
+    in their row, with only the UUID and the Error column filled in, instead
+    of being raised.
+    """
+
+    # Only build the fields selected with -c
+    fields = dict(resource_class.detailed_fields, error="Error")
+    fields = utils.select_fields(fields, parsed_args.columns)
+    columns = [k for k in fields if k != 'error']
+
+    def row(result):
+        uuid, resource, error = result
+        if error is not None:
+            LOG.warning('Failed to get %s %s: %s', _name(resource_class),
+                        uuid, error)
+            values = tuple(uuid if k == 'uuid' else '' for k in columns)
+        else:
+            values = oscutils.get_item_properties(resource, columns)
+        if 'error' in fields:
+            values += ('' if error is None else str(error),)
+        return values
+
+    results = concurrency.map_concurrently(
+        get, parsed_args.uuids, parsed_args.concurrency,
+        concurrency.limiter_for(client))
+
+    return (fields.values(),
+            timing.iterate((row(r) for r in results), 'request'))
+
+
+def add_diff_arguments(parser, resource_class):
+    """Add the arguments of a command comparing inventories."""
+
+    name = _name(resource_class)
+    parser.add_argument(
+        "snapshot",
+        metavar="<snapshot>",
+        help="Older inventory, as written by 'esi %s list --long "
+             "-f json' or '-f ndjson', or '-' for standard input." % name)
+    parser.add_argument(
+        "other",
+        metavar="<other-snapshot>",
+        nargs='?',
+        help="Newer inventory, in the same formats.")
+    parser.add_argument(
+        '--live',
+        dest='live',
+        default=False,
+        action='store_true',
+        help="Compare with the current %ss of any status instead of "
+             "a second snapshot." % name)
+
+
+def diff_inventories(list_live, resource_class, parsed_args):
+    """Returns the columns and rows of the changes between inventories.
+
+    :param list_live: Called without arguments to list the current
+        resources with --live.
+    """
+
+    if (parsed_args.other is None) != parsed_args.live:
+        raise exceptions.CommandError(
+            'Give either a second snapshot or --live')
+
+    fields = resource_class.detailed_fields
+    old = diff.open_snapshot(parsed_args.snapshot, fields)
+    if parsed_args.live:
+        new = diff.live_records(timing.iterate(list_live(), 'request'),
+                                fields)
+    else:
+        new = diff.open_snapshot(parsed_args.other, fields)
+
+    return (diff.LABELS,
+            timing.iterate(diff.diff_rows(old, new), 'filter'))
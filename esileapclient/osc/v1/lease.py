@@ -17,7 +17,13 @@ from osc_lib.command import command
 from osc_lib import utils as oscutils
 
 from esileapclient.v1.lease import Lease as LEASE_RESOURCE
+from esileapclient.common import concurrency
+from esileapclient.common import reconcile
+from esileapclient.common import timing
 from esileapclient.common import utils
+from esileapclient.common import waiters
+from esileapclient.osc.v1 import inventory
+from esileapclient.osc.v1 import sync
 
 LOG = logging.getLogger(__name__)
 
@@ -69,6 +75,20 @@ class CreateLease(command.ShowOne):
             dest='purpose',
             required=False,
             help="Specify the purpose for leasing the node")
+        parser.add_argument(
+            '--wait',
+            dest='wait',
+            action='store_true',
+            default=False,
+            help="Wait for the lease to become active.")
+        parser.add_argument(
+            '--timeout',
+            dest='timeout',
+            type=int,
+            default=waiters.DEFAULT_TIMEOUT,
+            metavar='<seconds>',
+            help="Seconds to wait with --wait before giving up "
+                 "(default: %d)." % waiters.DEFAULT_TIMEOUT)
         return parser
 
     def take_action(self, parsed_args):
@@ -81,7 +101,13 @@ class CreateLease(command.ShowOne):
         if 'properties' in fields:
             fields['properties'] = json.loads(fields['properties'])
 
-        lease = client.create_lease(**fields)
+        with timing.phase('request'):
+            lease = client.create_lease(**fields)
+
+        if parsed_args.wait:
+            lease = waiters.wait_for_status(
+                client, [lease.uuid], 'active',
+                timeout=parsed_args.timeout)[lease.uuid]
 
         data = dict([(f, getattr(lease, f, '')) for f in
                     LEASE_RESOURCE.fields])
@@ -115,7 +141,8 @@ class UpdateLease(command.ShowOne):
         fields = dict((k, v) for (k, v) in vars(parsed_args).items()
                       if k in field_list and v is not None)
 
-        lease = client.update_lease(parsed_args.uuid, **fields)
+        with timing.phase('request'):
+            lease = client.update_lease(parsed_args.uuid, **fields)
         data = dict([(f, lease.get(f, '')) for f in
                     LEASE_RESOURCE.fields])
         return self.dict2columns(data)
@@ -174,6 +201,24 @@ class ListLease(command.Lister):
             required=False,
             help="Show all leases relevant to an offer owner "
                  "by the owner's project ID or name.")
+        parser.add_argument(
+            '--projects',
+            dest='projects',
+            required=False,
+            action='append',
+            metavar='<project>[,<project>...]',
+            help="Show the leases owned by any of the given project IDs or "
+                 "names, listing each project concurrently. Adds a "
+                 "'Project Query' column. Can be specified multiple times.")
+        parser.add_argument(
+            '--owners',
+            dest='owners',
+            required=False,
+            action='append',
+            metavar='<owner>[,<owner>...]',
+            help="Show the leases relevant to any of the given offer owners, "
+                 "listing each owner concurrently. Adds an 'Owner Query' "
+                 "column. Can be specified multiple times.")
         parser.add_argument(
             '--resource-type',
             dest='resource_type',
@@ -203,6 +248,38 @@ class ListLease(command.Lister):
                  "Can be specified multiple times. "
                  f"Supported operators are: {', '.join(utils.OPS.keys())}",
             metavar='"key>=value"')
+        parser.add_argument(
+            '--sort-key',
+            dest='sort_key',
+            required=False,
+            metavar='<key>[:<direction>]',
+            help="Sort leases by the given field or property. Numeric "
+                 "values are compared as numbers. Append ':desc' to sort "
+                 "in descending order.")
+        parser.add_argument(
+            '--limit',
+            dest='limit',
+            type=utils.positive_int,
+            required=False,
+            help="Show at most this many leases. With --sort-key, only the "
+                 "top entries are kept while results are read.")
+        parser.add_argument(
+            '--group-by',
+            dest='group_by',
+            required=False,
+            action='append',
+            metavar='<key>[,<key>...]',
+            help="Summarize leases grouped by the given fields or "
+                 "properties instead of listing them.")
+        parser.add_argument(
+            '--aggregate',
+            dest='aggregate',
+            required=False,
+            action='append',
+            metavar='<property>[,<property>...]',
+            help="Numeric property to sum and take the minimum and maximum "
+                 "of for each group. Used with --group-by.")
+        sync.add_mirror_arguments(parser)
         return parser
 
     def take_action(self, parsed_args):
@@ -225,21 +302,97 @@ class ListLease(command.Lister):
             'purpose': parsed_args.purpose
         }
 
-        data = list(client.leases(**filters))
+        local = sync.open_mirror(self.app, parsed_args)
+        source = client if local is None else local
+
+        # Lists for many projects or owners are merged into one stream
+        query_fields = {}
+        projects = utils.split_list_arguments(parsed_args.projects)
+        owners = utils.split_list_arguments(parsed_args.owners)
+        if projects:
+            query_fields['query_project'] = 'Project Query'
+            if parsed_args.project_id:
+                projects.append(parsed_args.project_id)
+        if owners:
+            query_fields['query_owner'] = 'Owner Query'
+            if parsed_args.owner_id:
+                owners.append(parsed_args.owner_id)
+        if query_fields:
+            data = timing.iterate(_sweep_leases(
+                source, filters, projects or [parsed_args.project_id],
+                owners or [parsed_args.owner_id], concurrent=local is None),
+                'request')
+        else:
+            data = timing.iterate(source.leases(**filters), 'request')
+
+        filtered_leases = timing.iterate(
+            utils.iter_filter_nodes_by_properties(
+                data, parsed_args.properties), 'filter')
 
-        filtered_leases = utils.filter_nodes_by_properties(
-            data, parsed_args.properties)
+        if parsed_args.group_by:
+            with timing.phase('filter'):
+                return utils.aggregate_resources(
+                    filtered_leases,
+                    utils.split_list_arguments(parsed_args.group_by),
+                    utils.split_list_arguments(parsed_args.aggregate),
+                    labels=dict(query_fields,
+                                **LEASE_RESOURCE.detailed_fields))
+
+        with timing.phase('filter'):
+            filtered_leases = utils.sort_resources(
+                filtered_leases, parsed_args.sort_key, parsed_args.limit)
 
         if parsed_args.long:
-            columns = LEASE_RESOURCE.long_fields.keys()
-            labels = LEASE_RESOURCE.long_fields.values()
+            fields = LEASE_RESOURCE.long_fields
         else:
-            columns = LEASE_RESOURCE.fields.keys()
-            labels = LEASE_RESOURCE.fields.values()
+            fields = LEASE_RESOURCE.fields
+        fields = dict(query_fields, **fields)
+
+        # Only build the columns selected with -c
+        fields = utils.select_fields(fields, parsed_args.columns)
+        columns = fields.keys()
+        labels = fields.values()
 
         return (labels,
-                (oscutils.get_item_properties(s, columns)
-                 for s in filtered_leases))
+                timing.iterate((oscutils.get_item_properties(s, columns)
+                                for s in filtered_leases), 'format'))
+
+
+def _sweep_leases(source, filters, projects, owners, concurrent=True):
+    """List the leases of every pair of project and owner.
+
+    The lists are fetched concurrently and merged in the order of the
+    queries, with each lease tagged with the project and owner it was
+    listed for. A lease matching more than one query is listed once.
+    """
+
+    queries = [(project, owner) for project in projects for owner in owners]
+
+    def fetch(query):
+        project, owner = query
+        return list(source.leases(**dict(filters, project_id=project,
+                                         owner_id=owner)))
+
+    if concurrent:
+        results = concurrency.map_concurrently(
+            fetch, queries, concurrency.DEFAULT_WORKERS,
+            concurrency.limiter_for(source))
+    else:
+        # The local mirror is not shared between threads
+        results = ((query, fetch(query), None) for query in queries)
+
+    seen = set()
+    for (project, owner), leases, error in results:
+        if error is not None:
+            raise error
+        for lease in leases:
+            uuid = utils.get_resource_value(lease, 'uuid')
+            if uuid in seen:
+                continue
+            seen.add(uuid)
+            lease.query_project = project
+            lease.query_owner = owner
+            yield lease
 
 
 class ShowLease(command.ShowOne):
@@ -259,18 +412,152 @@ class ShowLease(command.ShowOne):
     def take_action(self, parsed_args):
 
         client = self.app.client_manager.lease
-        lease = client.get_lease(parsed_args.uuid)
+        with timing.phase('request'):
+            lease = client.get_lease(parsed_args.uuid)
 
-        lease_info = {k: getattr(lease, k, '') for k in
-                      LEASE_RESOURCE.detailed_fields}
+        # Only build the fields selected with -c
+        fields = utils.select_fields(LEASE_RESOURCE.detailed_fields,
+                                     parsed_args.columns)
+        lease_info = {k: getattr(lease, k, '') for k in fields}
 
-        lease_info['resource_properties'] = getattr(
-            lease, 'resource_properties', {}
-        )
+        if 'resource_properties' in fields:
+            lease_info['resource_properties'] = getattr(
+                lease, 'resource_properties', {}
+            )
 
         return zip(*sorted(lease_info.items()))
 
 
+class BulkShowLease(command.Lister):
+    """Show the details of many leases."""
+
+    log = logging.getLogger(__name__ + ".BulkShowLease")
+
+    def get_parser(self, prog_name):
+        parser = super(BulkShowLease, self).get_parser(prog_name)
+        inventory.add_bulk_show_arguments(parser, LEASE_RESOURCE)
+
+        return parser
+
+    def take_action(self, parsed_args):
+
+        client = self.app.client_manager.lease
+        return inventory.bulk_show(client, client.get_lease, LEASE_RESOURCE,
+                                   parsed_args)
+
+
+class DiffLease(command.Lister):
+    """Compare two inventories of leases."""
+
+    log = logging.getLogger(__name__ + ".DiffLease")
+
+    def get_parser(self, prog_name):
+        parser = super(DiffLease, self).get_parser(prog_name)
+        inventory.add_diff_arguments(parser, LEASE_RESOURCE)
+        parser.add_argument(
+            '--all',
+            default=False,
+            action='store_true',
+            help="With --live, compare with the leases of all projects. "
+                 "For admin use only.")
+
+        return parser
+
+    def take_action(self, parsed_args):
+
+        def list_live():
+            client = self.app.client_manager.lease
+            return client.leases(
+                status='any', view='all' if parsed_args.all else None)
+
+        return inventory.diff_inventories(list_live, LEASE_RESOURCE,
+                                          parsed_args)
+
+
+def _add_reconcile_arguments(parser):
+    parser.add_argument(
+        "file",
+        metavar="<file>",
+        help="YAML file of the desired leases, or '-' for standard input.")
+    parser.add_argument(
+        '--prune',
+        dest='prune',
+        default=False,
+        action='store_true',
+        help="Delete named leases that are not in the file. Leases "
+             "without a name are never touched.")
+    parser.add_argument(
+        '--all',
+        default=False,
+        action='store_true',
+        help="Match the leases of all projects. For admin use only.")
+
+
+def _plan_leases(app, parsed_args):
+    desired = reconcile.read_desired(parsed_args.file)
+    client = app.client_manager.lease
+    view = 'all' if parsed_args.all else None
+    with timing.phase('request'):
+        current = list(client.leases(view=view))
+    return client, reconcile.plan(desired, current, parsed_args.prune)
+
+
+class PlanLease(command.Lister):
+    """Show the changes converging leases to a desired state."""
+
+    log = logging.getLogger(__name__ + ".PlanLease")
+
+    def get_parser(self, prog_name):
+        parser = super(PlanLease, self).get_parser(prog_name)
+        _add_reconcile_arguments(parser)
+        return parser
+
+    def take_action(self, parsed_args):
+
+        _, operations = _plan_leases(self.app, parsed_args)
+
+        return (reconcile.LABELS,
+                ((op['action'], op['name'], op['uuid'] or '',
+                  reconcile.format_changes(op['changes']))
+                 for op in operations))
+
+
+class ApplyLease(command.Lister):
+    """Converge leases to a desired state."""
+
+    log = logging.getLogger(__name__ + ".ApplyLease")
+
+    def get_parser(self, prog_name):
+        parser = super(ApplyLease, self).get_parser(prog_name)
+        _add_reconcile_arguments(parser)
+        parser.add_argument(
+            '--concurrency',
+            dest='concurrency',
+            type=int,
+            default=concurrency.DEFAULT_WORKERS,
+            metavar='<count>',
+            help="Maximum number of leases to change at once "
+                 "(default: %d); fewer are used while the API is "
+                 "slow or overloaded." % concurrency.DEFAULT_WORKERS)
+
+        return parser
+
+    def take_action(self, parsed_args):
+
+        client, operations = _plan_leases(self.app, parsed_args)
+        results = reconcile.apply(client, operations,
+                                  parsed_args.concurrency)
+
+        def row(result):
+            op, uuid, error = result
+            return (op['action'], op['name'], uuid or '',
+                    reconcile.format_changes(op['changes']),
+                    '' if error is None else str(error))
+
+        return (reconcile.LABELS + ('Error',),
+                timing.iterate((row(r) for r in results), 'request'))
+
+
 class DeleteLease(command.Command):
     """Unregister lease"""
 
@@ -0,0 +1,40 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from osc_lib.command import command
+
+from esileapclient.common import health
+
+
+class MDCLister(command.Lister):
+    """A Lister of resources gathered from several clouds.
+
+    The command exits with status 1 when it skipped clouds, whose circuit
+    was open or which failed, so that partial output does not look like a
+    success.
+    """
+
+    _health = None
+
+    def health_cache(self):
+        """Returns the health cache of the clouds this run queries."""
+
+        self._health = health.HealthCache()
+        return self._health
+
+    def run(self, parsed_args):
+        result = super(MDCLister, self).run(parsed_args)
+        if self._health is not None and self._health.skipped:
+            self.log.error('Skipped clouds: %s',
+                           ', '.join(self._health.skipped))
+            return result or 1
+        return result
@@ -0,0 +1,158 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import heapq
+import logging
+
+from osc_lib import exceptions
+from osc_lib import utils as oscutils
+from esileapclient.v1.event import Event as EVENT_RESOURCE
+from esileapclient.common import cloud_config
+from esileapclient.common import concurrency
+from esileapclient.common import health
+from esileapclient.common import session
+from esileapclient.common import timing
+from esileapclient.common import utils
+from esileapclient.osc.v1.mdc import mdc_command
+
+LOG = logging.getLogger(__name__)
+
+
+def _event_time(event):
+    # Every cloud reports naive UTC times in the same ISO 8601 format, so
+    # they sort as strings
+    return str(utils.get_resource_value(event, 'event_time') or '')
+
+
+def _parse_last_event_ids(values):
+    """Parse '<cloud>=<id>' cursors; a bare ID applies to every cloud."""
+
+    default = None
+    cursors = {}
+    for value in values or []:
+        cloud, sep, event_id = value.rpartition('=')
+        if not event_id or (sep and not cloud):
+            raise exceptions.CommandError(
+                "Invalid --last-event-id '%s': expected <cloud>=<id> or "
+                "<id>" % value)
+        if sep:
+            cursors[cloud] = event_id
+        else:
+            default = event_id
+    return default, cursors
+
+
+class MDCListEvent(mdc_command.MDCLister):
+    """List events across multiple data centers, ordered by time."""
+
+    log = logging.getLogger(__name__ + ".MDCListEvent")
+    auth_required = False
+
+    def get_parser(self, prog_name):
+        parser = super(MDCListEvent, self).get_parser(prog_name)
+
+        parser.add_argument(
+            '--clouds',
+            dest='clouds',
+            metavar='<clouds>',
+            nargs="+",
+            help="Specify the cloud to use from clouds.yaml."
+        )
+        parser.add_argument(
+            '--project',
+            dest='project_id',
+            required=False,
+            help="Show all events associated with given project ID or name.")
+        parser.add_argument(
+            '--last-event-id',
+            dest='last_event_ids',
+            required=False,
+            action='append',
+            metavar='[<cloud>=]<id>',
+            help="Show the events of a cloud after this event ID. Without "
+                 "a cloud, applies to every cloud not given its own. Can "
+                 "be specified multiple times.")
+        parser.add_argument(
+            '--last-notification-time',
+            dest='last_event_time',
+            required=False,
+            help="Show events after this notification time.")
+        parser.add_argument(
+            '--event-type',
+            dest='event_type',
+            required=False,
+            help="Show events matching this event type.")
+        parser.add_argument(
+            '--resource-type',
+            dest='resource_type',
+            required=False,
+            help="Show events matching this resource type.")
+        parser.add_argument(
+            '--resource-uuid',
+            dest='resource_uuid',
+            required=False,
+            help="Show events matching this resource ID or name.")
+        parser.add_argument(
+            '--prefetch',
+            dest='prefetch',
+            type=utils.positive_int,
+            default=concurrency.PREFETCH_SIZE,
+            metavar='<count>',
+            help="Maximum number of events read ahead from each cloud "
+                 "(default: %d)." % concurrency.PREFETCH_SIZE)
+        parser.add_argument(
+            '--ignore-health',
+            dest='ignore_health',
+            action='store_true',
+            default=False,
+            help="Also query clouds that were skipped after failing "
+                 "repeatedly.")
+
+        return parser
+
+    def take_action(self, parsed_args):
+        with timing.phase('config'):
+            cloud_regions = cloud_config.get_cloud_regions(
+                parsed_args.clouds)
+        default_id, last_event_ids = _parse_last_event_ids(
+            parsed_args.last_event_ids)
+        filters = {
+            'lessee_or_owner_id': parsed_args.project_id,
+            'last_event_time': parsed_args.last_event_time,
+            'event_type': parsed_args.event_type,
+            'resource_type': parsed_args.resource_type,
+            'resource_uuid': parsed_args.resource_uuid,
+        }
+
+        # Each cloud is read concurrently into a bounded queue, and the
+        # streams are merged by event time as they are consumed
+        cache = self.health_cache()
+        streams = []
+        for c in cache.select(cloud_regions, parsed_args.ignore_health):
+            with timing.phase('client:%s' % c.name):
+                client = session.connect(c)
+            events = cache.track(
+                client.events(last_event_id=last_event_ids.get(
+                    c.name, default_id), **filters),
+                health.cloud_key(c), 'events from cloud %s' % c.name)
+            streams.append(concurrency.prefetch(
+                utils.tag_cloud_region(timing.iterate(
+                    events, 'request:%s' % c.name), c),
+                parsed_args.prefetch))
+        data = heapq.merge(*streams, key=_event_time)
+
+        columns = ['cloud', 'region'] + list(EVENT_RESOURCE.fields.keys())
+        labels = ['Cloud', 'Region'] + list(EVENT_RESOURCE.fields.values())
+
+        return (labels,
+                timing.iterate((oscutils.get_item_properties(s, columns)
+                                for s in data), 'format'))
@@ -10,18 +10,22 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import itertools
 import logging
 
-import openstack
-from osc_lib.command import command
 from osc_lib import utils as oscutils
-from esi import connection
 from esileapclient.v1.lease import Lease as LEASE_RESOURCE
+from esileapclient.common import cloud_config
+from esileapclient.common import health
+from esileapclient.common import session
+from esileapclient.common import timing
+from esileapclient.common import utils
+from esileapclient.osc.v1.mdc import mdc_command
 
 LOG = logging.getLogger(__name__)
 
 
-class MDCListLease(command.Lister):
+class MDCListLease(mdc_command.MDCLister):
     """List leases across multiple data centers."""
 
     log = logging.getLogger(__name__ + ".MDCListLease")
@@ -67,16 +71,20 @@ class MDCListLease(command.Lister):
             dest='purpose',
             required=False,
             help="Show all the leases with given purpose")
+        parser.add_argument(
+            '--ignore-health',
+            dest='ignore_health',
+            action='store_true',
+            default=False,
+            help="Also query clouds that were skipped after failing "
+                 "repeatedly.")
+
         return parser
 
     def take_action(self, parsed_args):
-        data = []
-
-        cloud_regions = openstack.config.loader.OpenStackConfig().\
-            get_all_clouds()
-        if parsed_args.clouds:
-            cloud_regions = filter(lambda c: c.name in parsed_args.clouds,
-                                   cloud_regions)
+        with timing.phase('config'):
+            cloud_regions = cloud_config.get_cloud_regions(
+                parsed_args.clouds)
         filters = {
             'status': parsed_args.status,
             'start_time': str(parsed_args.time_range[0]) if
@@ -88,17 +96,23 @@ class MDCListLease(command.Lister):
             'purpose': parsed_args.purpose,
         }
 
-        for c in cloud_regions:
-            client = connection.ESIConnection(config=c).lease
-
-            leases = list(client.leases(**filters))
-            for lease in leases:
-                lease.cloud = c.name
-                lease.region = c.config['region_name']
-                data += [lease]
+        # Listing is lazy; results are streamed cloud by cloud, healthiest
+        # first, and a failing cloud is logged and skipped
+        cache = self.health_cache()
+        streams = []
+        for c in cache.select(cloud_regions, parsed_args.ignore_health):
+            with timing.phase('client:%s' % c.name):
+                client = session.connect(c)
+            leases = cache.track(
+                client.leases(**filters), health.cloud_key(c),
+                'leases from cloud %s' % c.name)
+            streams.append(utils.tag_cloud_region(timing.iterate(
+                leases, 'request:%s' % c.name), c))
+        data = itertools.chain.from_iterable(streams)
 
         columns = ['cloud', 'region'] + list(LEASE_RESOURCE.fields.keys())
         labels = ['Cloud', 'Region'] + list(LEASE_RESOURCE.fields.values())
 
         return (labels,
-                (oscutils.get_item_properties(s, columns) for s in data))
+                timing.iterate((oscutils.get_item_properties(s, columns)
+                                for s in data), 'format'))
@@ -0,0 +1,132 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import itertools
+import logging
+
+from osc_lib import utils as oscutils
+from esileapclient.v1.node import Node as NODE_RESOURCE
+from esileapclient.common import cloud_config
+from esileapclient.common import concurrency
+from esileapclient.common import health
+from esileapclient.common import session
+from esileapclient.common import timing
+from esileapclient.common import utils
+from esileapclient.osc.v1.mdc import mdc_command
+
+LOG = logging.getLogger(__name__)
+
+
+class MDCListNode(mdc_command.MDCLister):
+    """List nodes across multiple data centers."""
+
+    log = logging.getLogger(__name__ + ".MDCListNode")
+    auth_required = False
+
+    def get_parser(self, prog_name):
+        parser = super(MDCListNode, self).get_parser(prog_name)
+
+        parser.add_argument(
+            '--clouds',
+            dest='clouds',
+            metavar='<clouds>',
+            nargs="+",
+            help="Specify the cloud to use from clouds.yaml."
+        )
+        parser.add_argument(
+            '--long',
+            default=False,
+            help="Show detailed information about the nodes.",
+            action='store_true')
+        parser.add_argument(
+            '--resource-class',
+            dest='resource_class',
+            required=False,
+            help="Filter nodes by resource class.")
+        parser.add_argument(
+            '--owner',
+            dest='owner',
+            required=False,
+            help="Filter nodes by owner.")
+        parser.add_argument(
+            '--lessee',
+            dest='lessee',
+            required=False,
+            help="Filter nodes by lessee.")
+        parser.add_argument(
+            '--property',
+            dest='properties',
+            required=False,
+            action='append',
+            help="Filter nodes by properties. Format: 'key>=value'. "
+                 "Can be specified multiple times. "
+                 f"Supported operators are: {', '.join(utils.OPS.keys())}",
+            metavar='"key>=value"')
+        parser.add_argument(
+            '--prefetch',
+            dest='prefetch',
+            type=utils.positive_int,
+            default=concurrency.PREFETCH_SIZE,
+            metavar='<count>',
+            help="Maximum number of nodes read ahead from each cloud "
+                 "(default: %d)." % concurrency.PREFETCH_SIZE)
+        parser.add_argument(
+            '--ignore-health',
+            dest='ignore_health',
+            action='store_true',
+            default=False,
+            help="Also query clouds that were skipped after failing "
+                 "repeatedly.")
+
+        return parser
+
+    def take_action(self, parsed_args):
+        with timing.phase('config'):
+            cloud_regions = cloud_config.get_cloud_regions(
+                parsed_args.clouds)
+        filters = {
+            'resource_class': parsed_args.resource_class,
+            'owner': parsed_args.owner,
+            'lessee': parsed_args.lessee,
+        }
+
+        # Every cloud is queried and filtered at once in its own thread,
+        # each reading ahead into a bounded queue; results are listed
+        # cloud by cloud, healthiest first
+        cache = self.health_cache()
+        streams = []
+        for c in cache.select(cloud_regions, parsed_args.ignore_health):
+            with timing.phase('client:%s' % c.name):
+                client = session.connect(c)
+            nodes = cache.track(
+                client.nodes(**filters), health.cloud_key(c),
+                'nodes from cloud %s' % c.name)
+            nodes = utils.iter_filter_nodes_by_properties(
+                timing.iterate(nodes, 'request:%s' % c.name),
+                parsed_args.properties)
+            streams.append(concurrency.prefetch(
+                utils.tag_cloud_region(nodes, c), parsed_args.prefetch))
+        data = itertools.chain.from_iterable(streams)
+
+        if parsed_args.long:
+            fields = NODE_RESOURCE.detailed_fields
+        else:
+            fields = NODE_RESOURCE.fields
+        fields = dict({'cloud': 'Cloud', 'region': 'Region'}, **fields)
+
+        # Only build the columns selected with -c
+        fields = utils.select_fields(fields, parsed_args.columns)
+        columns = fields.keys()
+
+        return (fields.values(),
+                timing.iterate((oscutils.get_item_properties(s, columns)
+                                for s in data), 'format'))
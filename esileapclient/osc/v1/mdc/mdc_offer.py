@@ -10,21 +10,27 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import itertools
 import logging
 import random
 
-import openstack
 from osc_lib.command import command
 from osc_lib import exceptions
 from osc_lib import utils as oscutils
-from esi import connection
 from esileapclient.v1.lease import Lease as LEASE_RESOURCE
 from esileapclient.v1.offer import Offer as OFFER_RESOURCE
+from esileapclient.common import cloud_config
+from esileapclient.common import concurrency
+from esileapclient.common import health
+from esileapclient.common import session
+from esileapclient.common import timing
+from esileapclient.common import utils
+from esileapclient.osc.v1.mdc import mdc_command
 
 LOG = logging.getLogger(__name__)
 
 
-class MDCListOffer(command.Lister):
+class MDCListOffer(mdc_command.MDCLister):
     """List offers across multiple data centers."""
 
     log = logging.getLogger(__name__ + ".MDCListOffer")
@@ -76,17 +82,28 @@ class MDCListOffer(command.Lister):
             dest='resource_class',
             required=False,
             help="Show all leases with given resource-class.")
+        parser.add_argument(
+            '--ignore-health',
+            dest='ignore_health',
+            action='store_true',
+            default=False,
+            help="Also query clouds that were skipped after failing "
+                 "repeatedly.")
+        parser.add_argument(
+            '--hedge',
+            dest='hedge',
+            action='store_true',
+            default=False,
+            help="Query all clouds at once, and query a cloud again if it "
+                 "has not answered within its usual 95th percentile "
+                 "latency, taking whichever answer comes first.")
 
         return parser
 
     def take_action(self, parsed_args):
-        data = []
-
-        cloud_regions = openstack.config.loader.OpenStackConfig().\
-            get_all_clouds()
-        if parsed_args.clouds:
-            cloud_regions = filter(lambda c: c.name in parsed_args.clouds,
-                                   cloud_regions)
+        with timing.phase('config'):
+            cloud_regions = cloud_config.get_cloud_regions(
+                parsed_args.clouds)
         filters = {
             'status': parsed_args.status,
             'start_time': str(parsed_args.time_range[0]) if
@@ -102,19 +119,56 @@ class MDCListOffer(command.Lister):
             'resource_class': parsed_args.resource_class,
         }
 
-        for c in cloud_regions:
-            client = connection.ESIConnection(config=c).lease
-            offers = list(client.offers(**filters))
-            for offer in offers:
-                offer.cloud = c.name
-                offer.region = c.config['region_name']
-                data += [offer]
+        cache = self.health_cache()
+        cloud_regions = cache.select(cloud_regions, parsed_args.ignore_health)
+        if parsed_args.hedge:
+            streams = self._hedged_streams(cache, cloud_regions, filters)
+        else:
+            # Listing is lazy; results are streamed cloud by cloud,
+            # healthiest first, and a failing cloud is logged and skipped
+            streams = []
+            for c in cloud_regions:
+                with timing.phase('client:%s' % c.name):
+                    client = session.connect(c)
+                offers = cache.track(
+                    client.offers(**filters), health.cloud_key(c),
+                    'offers from cloud %s' % c.name)
+                streams.append(utils.tag_cloud_region(timing.iterate(
+                    offers, 'request:%s' % c.name), c))
+        data = itertools.chain.from_iterable(streams)
 
         columns = ['cloud', 'region'] + list(OFFER_RESOURCE.fields.keys())
         labels = ['Cloud', 'Region'] + list(OFFER_RESOURCE.fields.values())
 
         return (labels,
-                (oscutils.get_item_properties(s, columns) for s in data))
+                timing.iterate((oscutils.get_item_properties(s, columns)
+                                for s in data), 'format'))
+
+    @staticmethod
+    def _hedged_streams(cache, cloud_regions, filters):
+        """Fetch the offers of all clouds at once, hedging slow ones."""
+
+        def fetch(c):
+            key = health.cloud_key(c)
+            with timing.phase('client:%s' % c.name):
+                client = session.connect(c)
+
+            def hedged():
+                yield from concurrency.hedge(
+                    lambda: list(client.offers(**filters)),
+                    cache.latency(key, 95))
+
+            with timing.phase('request:%s' % c.name):
+                return list(utils.tag_cloud_region(cache.track(
+                    hedged(), key, 'offers from cloud %s' % c.name), c))
+
+        streams = []
+        for _, offers, error in concurrency.map_concurrently(
+                fetch, cloud_regions, max(1, len(cloud_regions))):
+            if error is not None:
+                raise error
+            streams.append(offers)
+        return streams
 
 
 class MDCClaimOffer(command.Lister):
@@ -155,15 +209,20 @@ class MDCClaimOffer(command.Lister):
             dest='resource_class',
             required=False,
             help="Specify offers' resource-class.")
+        parser.add_argument(
+            '--ignore-health',
+            dest='ignore_health',
+            action='store_true',
+            default=False,
+            help="Also query clouds that were skipped after failing "
+                 "repeatedly.")
 
         return parser
 
     def take_action(self, parsed_args):
-        cloud_regions = openstack.config.loader.OpenStackConfig().\
-            get_all_clouds()
-        if parsed_args.clouds:
-            cloud_regions = filter(lambda c: c.name in parsed_args.clouds,
-                                   cloud_regions)
+        with timing.phase('config'):
+            cloud_regions = cloud_config.get_cloud_regions(
+                parsed_args.clouds)
         node_count = int(parsed_args.node_count)
         filters = {
             'status': 'available',
@@ -175,10 +234,15 @@ class MDCClaimOffer(command.Lister):
             'resource_class': parsed_args.resource_class,
         }
 
+        cache = health.HealthCache()
         available_offers = []
-        for c in cloud_regions:
-            client = connection.ESIConnection(config=c).lease
-            offers = list(client.offers(**filters))
+        for c in cache.select(cloud_regions, parsed_args.ignore_health):
+            with timing.phase('client:%s' % c.name):
+                client = session.connect(c)
+            with timing.phase('request:%s' % c.name):
+                offers = list(cache.track(
+                    client.offers(**filters), health.cloud_key(c),
+                    'offers from cloud %s' % c.name))
             for offer in offers:
                 offer.cloud_region = c
                 offer.cloud = c.name
@@ -192,12 +256,14 @@ class MDCClaimOffer(command.Lister):
         offers_to_claim = random.sample(available_offers, node_count)
         leases = []
         for offer in offers_to_claim:
-            client = connection.ESIConnection(config=offer.cloud_region).lease
+            with timing.phase('client:%s' % offer.cloud):
+                client = session.connect(offer.cloud_region)
             try:
-                lease = client.claim_offer(
-                    offer.uuid,
-                    **{'start_time': parsed_args.start_time,
-                       'end_time': parsed_args.end_time})
+                with timing.phase('request:%s' % offer.cloud):
+                    lease = client.claim_offer(
+                        offer.uuid,
+                        **{'start_time': parsed_args.start_time,
+                           'end_time': parsed_args.end_time})
                 lease.cloud = offer.cloud
                 lease.region = offer.region
                 leases += [lease]
@@ -211,4 +277,5 @@ class MDCClaimOffer(command.Lister):
         labels = ['Cloud', 'Region'] + list(LEASE_RESOURCE.fields.values())
 
         return (labels,
-                (oscutils.get_item_properties(s, columns) for s in leases))
+                timing.iterate((oscutils.get_item_properties(s, columns)
+                                for s in leases), 'format'))
@@ -16,10 +16,30 @@ from osc_lib.command import command
 from osc_lib import utils as oscutils
 
 from esileapclient.v1.node import Node as NODE_RESOURCE
+from esileapclient.common import concurrency
+from esileapclient.common import timing
 from esileapclient.common import utils
+from esileapclient.osc.v1 import sync
 
 LOG = logging.getLogger(__name__)
 
+# Lease and offer fields added by --with-leases and --with-offers, keyed by
+# the node field that refers to them
+JOINED_FIELDS = {
+    'lease_uuid': {
+        'lease_project': "Lease Project",
+        'lease_start_time': "Lease Start Time",
+        'lease_end_time': "Lease End Time",
+        'lease_status': "Lease Status",
+    },
+    'offer_uuid': {
+        'offer_lessee': "Offer Lessee",
+        'offer_start_time': "Offer Start Time",
+        'offer_end_time': "Offer End Time",
+        'offer_status': "Offer Status",
+    },
+}
+
 
 class ListNode(command.Lister):
     """List nodes."""
@@ -58,6 +78,59 @@ class ListNode(command.Lister):
                  "Can be specified multiple times. "
                  f"Supported operators are: {', '.join(utils.OPS.keys())}",
             metavar='"key>=value"')
+        parser.add_argument(
+            '--sort-key',
+            dest='sort_key',
+            required=False,
+            metavar='<key>[:<direction>]',
+            help="Sort nodes by the given field or property. Numeric "
+                 "values are compared as numbers. Append ':desc' to sort "
+                 "in descending order.")
+        parser.add_argument(
+            '--limit',
+            dest='limit',
+            type=utils.positive_int,
+            required=False,
+            help="Show at most this many nodes. With --sort-key, only the "
+                 "top entries are kept while results are read.")
+        parser.add_argument(
+            '--group-by',
+            dest='group_by',
+            required=False,
+            action='append',
+            metavar='<key>[,<key>...]',
+            help="Summarize nodes grouped by the given fields or "
+                 "properties instead of listing them.")
+        parser.add_argument(
+            '--aggregate',
+            dest='aggregate',
+            required=False,
+            action='append',
+            metavar='<property>[,<property>...]',
+            help="Numeric property to sum and take the minimum and maximum "
+                 "of for each group. Used with --group-by.")
+        parser.add_argument(
+            '--with-leases',
+            dest='with_leases',
+            default=False,
+            action='store_true',
+            help="Show the project, times and status of each node's lease. "
+                 "Leases are fetched with a single list call.")
+        parser.add_argument(
+            '--with-offers',
+            dest='with_offers',
+            default=False,
+            action='store_true',
+            help="Show the lessee, times and status of each node's offer. "
+                 "Offers are fetched with a single list call.")
+        parser.add_argument(
+            '--all',
+            default=False,
+            action='store_true',
+            help="With --with-leases, join the leases of all projects, not "
+                 "only those of the current one. For admin use only.")
+
+        sync.add_mirror_arguments(parser)
 
         return parser
 
@@ -73,20 +146,82 @@ class ListNode(command.Lister):
         }
 
         # Retrieve all nodes with initial filters
-        all_nodes = list(client.nodes(**filters))
+        local = sync.open_mirror(self.app, parsed_args)
+        source = client if local is None else local
+        all_nodes = timing.iterate(source.nodes(**filters), 'request')
 
         # Apply filtering based on properties
-        filtered_nodes = utils.filter_nodes_by_properties(
-            all_nodes, parsed_args.properties
-        )
+        filtered_nodes = timing.iterate(
+            utils.iter_filter_nodes_by_properties(
+                all_nodes, parsed_args.properties
+            ), 'filter')
+
+        if parsed_args.group_by:
+            with timing.phase('filter'):
+                return utils.aggregate_resources(
+                    filtered_nodes,
+                    utils.split_list_arguments(parsed_args.group_by),
+                    utils.split_list_arguments(parsed_args.aggregate),
+                    labels=NODE_RESOURCE.detailed_fields)
+
+        # Sort and select the top entries, if requested
+        with timing.phase('filter'):
+            filtered_nodes = utils.sort_resources(
+                filtered_nodes, parsed_args.sort_key, parsed_args.limit)
 
         if parsed_args.long:
-            columns = NODE_RESOURCE.detailed_fields.keys()
-            labels = NODE_RESOURCE.detailed_fields.values()
+            fields = dict(NODE_RESOURCE.detailed_fields)
+        else:
+            fields = dict(NODE_RESOURCE.fields)
+
+        listers = {}
+        if parsed_args.with_leases:
+            fields.update(JOINED_FIELDS['lease_uuid'])
+            lease_filters = {'view': 'all'} if parsed_args.all else {}
+            listers['lease_uuid'] = lambda: source.leases(**lease_filters)
+        if parsed_args.with_offers:
+            fields.update(JOINED_FIELDS['offer_uuid'])
+            listers['offer_uuid'] = source.offers
+
+        # Only build the columns selected with -c
+        fields = utils.select_fields(fields, parsed_args.columns)
+        labels = fields.values()
+
+        # Fetch the leases and offers for the selected columns with one
+        # list call each, in parallel, and index them by UUID
+        joins = [ref for ref in listers
+                 if fields.keys() & JOINED_FIELDS[ref].keys()]
+
+        def fetch(ref):
+            return list(listers[ref]())
+
+        if local is None:
+            results = concurrency.map_concurrently(fetch, joins)
         else:
-            columns = NODE_RESOURCE.fields.keys()
-            labels = NODE_RESOURCE.fields.values()
+            # The local mirror is not shared between threads
+            results = ((ref, fetch(ref), None) for ref in joins)
+
+        related = {}
+        with timing.phase('request'):
+            for ref, resources, error in results:
+                if error is not None:
+                    raise error
+                related[ref] = {utils.get_resource_value(r, 'uuid'): r
+                                for r in resources}
+
+        joined = [(key, ref) for key in fields for ref in related
+                  if key in JOINED_FIELDS[ref]]
+        columns = [key for key in fields if key not in dict(joined)]
+
+        def node_row(node):
+            row = oscutils.get_item_properties(node, columns)
+            for key, ref in joined:
+                resource = related[ref].get(getattr(node, ref, None))
+                value = '' if resource is None else \
+                    getattr(resource, key.split('_', 1)[1], '')
+                row += (value,)
+            return row
 
         return (labels,
-                (oscutils.get_item_properties(s, columns)
-                 for s in filtered_nodes))
+                timing.iterate((node_row(s) for s in filtered_nodes),
+                               'format'))
@@ -18,7 +18,11 @@ from osc_lib import utils as oscutils
 
 from esileapclient.v1.lease import Lease as LEASE_RESOURCE
 from esileapclient.v1.offer import Offer as OFFER_RESOURCE
+from esileapclient.common import timing
 from esileapclient.common import utils
+from esileapclient.common import waiters
+from esileapclient.osc.v1 import inventory
+from esileapclient.osc.v1 import sync
 
 LOG = logging.getLogger(__name__)
 
@@ -82,7 +86,8 @@ class CreateOffer(command.ShowOne):
         if 'properties' in fields:
             fields['properties'] = json.loads(fields['properties'])
 
-        offer = client.create_offer(**fields)
+        with timing.phase('request'):
+            offer = client.create_offer(**fields)
 
         data = dict([(f, getattr(offer, f, '')) for f in
                     OFFER_RESOURCE.fields])
@@ -161,6 +166,39 @@ class ListOffer(command.Lister):
                  "Can be specified multiple times. "
                  f"Supported operators are: {', '.join(utils.OPS.keys())}",
             metavar='"key>=value"')
+        parser.add_argument(
+            '--sort-key',
+            dest='sort_key',
+            required=False,
+            metavar='<key>[:<direction>]',
+            help="Sort offers by the given field or property. Numeric "
+                 "values are compared as numbers. Append ':desc' to sort "
+                 "in descending order.")
+        parser.add_argument(
+            '--limit',
+            dest='limit',
+            type=utils.positive_int,
+            required=False,
+            help="Show at most this many offers. With --sort-key, only the "
+                 "top entries are kept while results are read.")
+        parser.add_argument(
+            '--group-by',
+            dest='group_by',
+            required=False,
+            action='append',
+            metavar='<key>[,<key>...]',
+            help="Summarize offers grouped by the given fields or "
+                 "properties instead of listing them.")
+        parser.add_argument(
+            '--aggregate',
+            dest='aggregate',
+            required=False,
+            action='append',
+            metavar='<property>[,<property>...]',
+            help="Numeric property to sum and take the minimum and maximum "
+                 "of for each group. Used with --group-by.")
+
+        sync.add_mirror_arguments(parser)
 
         return parser
 
@@ -187,21 +225,39 @@ class ListOffer(command.Lister):
             'resource_class': parsed_args.resource_class
         }
 
-        data = list(client.offers(**filters))
+        local = sync.open_mirror(self.app, parsed_args)
+        source = client if local is None else local
+        data = timing.iterate(source.offers(**filters), 'request')
+
+        filtered_leases = timing.iterate(
+            utils.iter_filter_nodes_by_properties(
+                data, parsed_args.properties), 'filter')
+
+        if parsed_args.group_by:
+            with timing.phase('filter'):
+                return utils.aggregate_resources(
+                    filtered_leases,
+                    utils.split_list_arguments(parsed_args.group_by),
+                    utils.split_list_arguments(parsed_args.aggregate),
+                    labels=OFFER_RESOURCE.detailed_fields)
 
-        filtered_leases = utils.filter_nodes_by_properties(
-            data, parsed_args.properties)
+        with timing.phase('filter'):
+            filtered_leases = utils.sort_resources(
+                filtered_leases, parsed_args.sort_key, parsed_args.limit)
 
         if parsed_args.long:
-            columns = OFFER_RESOURCE.long_fields.keys()
-            labels = OFFER_RESOURCE.long_fields.values()
+            fields = OFFER_RESOURCE.long_fields
         else:
-            columns = OFFER_RESOURCE.fields.keys()
-            labels = OFFER_RESOURCE.fields.values()
+            fields = OFFER_RESOURCE.fields
+
+        # Only build the columns selected with -c
+        fields = utils.select_fields(fields, parsed_args.columns)
+        columns = fields.keys()
+        labels = fields.values()
 
         return (labels,
-                (oscutils.get_item_properties(s, columns)
-                 for s in filtered_leases))
+                timing.iterate((oscutils.get_item_properties(s, columns)
+                                for s in filtered_leases), 'format'))
 
 
 class ShowOffer(command.ShowOne):
@@ -222,18 +278,61 @@ class ShowOffer(command.ShowOne):
 
         client = self.app.client_manager.lease
 
-        offer = client.get_offer(parsed_args.uuid)
+        with timing.phase('request'):
+            offer = client.get_offer(parsed_args.uuid)
 
-        offer_info = {k: getattr(offer, k, '') for k in
-                      OFFER_RESOURCE.detailed_fields}
+        # Only build the fields selected with -c
+        fields = utils.select_fields(OFFER_RESOURCE.detailed_fields,
+                                     parsed_args.columns)
+        offer_info = {k: getattr(offer, k, '') for k in fields}
 
-        offer_info['resource_properties'] = getattr(
-            offer, 'resource_properties', {}
-        )
+        if 'resource_properties' in fields:
+            offer_info['resource_properties'] = getattr(
+                offer, 'resource_properties', {}
+            )
 
         return zip(*sorted(offer_info.items()))
 
 
+class BulkShowOffer(command.Lister):
+    """Show the details of many offers."""
+
+    log = logging.getLogger(__name__ + ".BulkShowOffer")
+
+    def get_parser(self, prog_name):
+        parser = super(BulkShowOffer, self).get_parser(prog_name)
+        inventory.add_bulk_show_arguments(parser, OFFER_RESOURCE)
+
+        return parser
+
+    def take_action(self, parsed_args):
+
+        client = self.app.client_manager.lease
+        return inventory.bulk_show(client, client.get_offer, OFFER_RESOURCE,
+                                   parsed_args)
+
+
+class DiffOffer(command.Lister):
+    """Compare two inventories of offers."""
+
+    log = logging.getLogger(__name__ + ".DiffOffer")
+
+    def get_parser(self, prog_name):
+        parser = super(DiffOffer, self).get_parser(prog_name)
+        inventory.add_diff_arguments(parser, OFFER_RESOURCE)
+
+        return parser
+
+    def take_action(self, parsed_args):
+
+        def list_live():
+            client = self.app.client_manager.lease
+            return client.offers(status='any')
+
+        return inventory.diff_inventories(list_live, OFFER_RESOURCE,
+                                          parsed_args)
+
+
 class DeleteOffer(command.Command):
     """Unregister offer"""
 
@@ -284,6 +383,20 @@ class ClaimOffer(command.ShowOne):
             required=False,
             help="Record arbitrary key/value resource property "
                  "information. Pass in as a json object.")
+        parser.add_argument(
+            '--wait',
+            dest='wait',
+            action='store_true',
+            default=False,
+            help="Wait for the lease to become active.")
+        parser.add_argument(
+            '--timeout',
+            dest='timeout',
+            type=int,
+            default=waiters.DEFAULT_TIMEOUT,
+            metavar='<seconds>',
+            help="Seconds to wait with --wait before giving up "
+                 "(default: %d)." % waiters.DEFAULT_TIMEOUT)
 
         return parser
 
@@ -299,9 +412,19 @@ class ClaimOffer(command.ShowOne):
         if 'properties' in fields:
             fields['properties'] = json.loads(fields['properties'])
 
-        lease = client.claim_offer(parsed_args.offer_uuid, **fields)
+        with timing.phase('request'):
+            lease = client.claim_offer(parsed_args.offer_uuid, **fields)
+
+        if parsed_args.wait:
+            lease = waiters.wait_for_status(
+                client, [lease['uuid']], 'active',
+                timeout=parsed_args.timeout)[lease['uuid']]
 
-        data = dict([(f, lease.get(f, '')) for f in
-                    LEASE_RESOURCE.fields])
+        # The claim is a dict, but --wait gets an SDK Lease, on which only
+        # attribute access knows aliases such as 'resource'
+        data = {}
+        for f in LEASE_RESOURCE.fields:
+            value = utils.get_resource_value(lease, f)
+            data[f] = '' if value is None else value
 
         return self.dict2columns(data)
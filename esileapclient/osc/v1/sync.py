@@ -0,0 +1,143 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import logging
+import os
+
+from osc_lib.command import command
+from osc_lib import exceptions
+
+from esileapclient.common import mirror
+from esileapclient.common import timing
+
+LOG = logging.getLogger(__name__)
+
+
+def add_mirror_arguments(parser):
+    """Add the options to answer a list command from the local mirror."""
+
+    parser.add_argument(
+        '--offline',
+        dest='offline',
+        action='store_true',
+        default=False,
+        help="Answer from the local mirror kept by 'esi sync' without "
+             "contacting the API. Filters must use IDs, not names.")
+    parser.add_argument(
+        '--max-staleness',
+        dest='max_staleness',
+        type=float,
+        metavar='<seconds>',
+        help="Answer from the local mirror, syncing it first if it is "
+             "older than this many seconds.")
+    parser.add_argument(
+        '--mirror',
+        dest='mirror',
+        metavar='<path>',
+        help="Local mirror file (default: one per cloud under %s)." %
+             mirror.DEFAULT_DIR)
+
+
+def _mirror_path(app, parsed_args):
+    if parsed_args.mirror:
+        return parsed_args.mirror
+    cloud = getattr(getattr(app, 'cloud', None), 'name', None)
+    return mirror.default_path(cloud if isinstance(cloud, str) else None)
+
+
+def open_mirror(app, parsed_args):
+    """Returns the mirror a list command should answer from, or None.
+
+    With --max-staleness, a mirror older than the limit, or holding
+    leases of another view than --all asks for, is synced first.
+    """
+
+    if not parsed_args.offline and parsed_args.max_staleness is None:
+        return None
+
+    path = _mirror_path(app, parsed_args)
+    if parsed_args.offline and not os.path.exists(path):
+        raise exceptions.CommandError(
+            "No local mirror at %s; run 'esi sync' first" % path)
+
+    local = mirror.Mirror(path)
+    age = local.age()
+    if hasattr(parsed_args, 'all'):
+        view = 'all' if parsed_args.all else None
+    else:
+        # Commands without --all do not list leases
+        view = local.view
+    if parsed_args.offline:
+        if age is None:
+            raise exceptions.CommandError(
+                "Local mirror %s is empty; run 'esi sync' first" % path)
+    elif age is None or age > parsed_args.max_staleness or \
+            local.view != view:
+        with timing.phase('request'):
+            local.sync(app.client_manager.lease, view)
+    LOG.debug('Answering from local mirror %s', path)
+    return local
+
+
+class SyncMirror(command.ShowOne):
+    """Sync the local mirror of nodes, offers and leases."""
+
+    log = logging.getLogger(__name__ + ".SyncMirror")
+
+    def get_parser(self, prog_name):
+        parser = super(SyncMirror, self).get_parser(prog_name)
+
+        parser.add_argument(
+            '--full',
+            dest='full',
+            action='store_true',
+            default=False,
+            help="Take a new snapshot instead of applying the events since "
+                 "the last sync.")
+        parser.add_argument(
+            '--all',
+            dest='all',
+            action='store_true',
+            default=False,
+            help="Mirror the leases of all projects (admin only). A mirror "
+                 "synced with another view is snapshotted again.")
+        parser.add_argument(
+            '--mirror',
+            dest='mirror',
+            metavar='<path>',
+            help="Local mirror file (default: one per cloud under %s)." %
+                 mirror.DEFAULT_DIR)
+
+        return parser
+
+    def take_action(self, parsed_args):
+        client = self.app.client_manager.lease
+        view = 'all' if parsed_args.all else None
+
+        with mirror.Mirror(_mirror_path(self.app, parsed_args)) as local:
+            with timing.phase('request'):
+                if parsed_args.full:
+                    kind, count = 'snapshot', local.snapshot(client, view)
+                else:
+                    kind, count = local.sync(client, view)
+
+            data = {
+                'mirror': local.path,
+                'sync': kind,
+                'applied': count,
+                'nodes': local.count('nodes'),
+                'offers': local.count('offers'),
+                'leases': local.count('leases'),
+                'last_event_id': local.last_event_id,
+            }
+
+        return self.dict2columns(data)
@@ -0,0 +1,173 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+A local stand-in for the ESI-Leap API.
+
+The server answers the read-only endpoints used by the list and show
+commands with synthetic nodes, offers, leases and events, optionally
+delaying every response to simulate a remote deployment.
+"""
+
+from http import server
+import json
+import threading
+import time
+from urllib import parse
+
+from esi import connection
+import openstack.config
+
+from esileapclient.tests.benchmarks import utils
+
+
+# Query parameters that are accepted but not used to filter resources
+IGNORED_PARAMS = ('view', 'start_time', 'end_time', 'available_start_time',
+                  'available_end_time', 'last_event_time')
+
+
+class _Handler(server.BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        api = self.server.api
+        api._record_request()
+        if api.latency:
+            time.sleep(api.latency)
+
+        url = parse.urlsplit(self.path)
+        parts = [p for p in url.path.split('/') if p]
+        if parts in ([], ['v1']):
+            self._send(200, api.discovery_document())
+        elif len(parts) == 2 and parts[1] in api.resources:
+            self._send(200, api.list_body(parts[1], url.query))
+        elif len(parts) == 3 and parts[1] in api.resources:
+            resource = api.get(parts[1], parts[2])
+            if resource is None:
+                self._send(404, json.dumps({
+                    'faultstring': 'Resource %s not found' % parts[2]
+                }).encode())
+            else:
+                self._send(200, json.dumps(resource).encode())
+        else:
+            self._send(404, b'{"faultstring": "Not found"}')
+
+
+class FakeESILeapAPI(object):
+    """Serve synthetic ESI-Leap resources from a local HTTP server.
+
+    :param count: Number of nodes, offers, leases and events to serve.
+    :param latency: Seconds to wait before answering each request.
+    """
+
+    def __init__(self, count=1000, latency=0.0):
+        self.latency = latency
+        self.requests = 0
+        self.resources = {
+            'nodes': [utils.fake_node(i) for i in range(count)],
+            'offers': [utils.fake_offer(i) for i in range(count)],
+            'leases': [utils.fake_lease(i) for i in range(count)],
+            'events': [utils.fake_event(i) for i in range(count)],
+        }
+        self._by_id = {
+            name: {str(r.get('uuid', r.get('id'))): r for r in resources}
+            for name, resources in self.resources.items()
+        }
+        self._bodies = {}
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self):
+        self._server = server.ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.api = self
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    @property
+    def endpoint(self):
+        return 'http://127.0.0.1:%d/v1' % self._server.server_port
+
+    def _record_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def discovery_document(self):
+        return json.dumps({'versions': [{
+            'id': 'v1',
+            'status': 'CURRENT',
+            'links': [{'rel': 'self', 'href': self.endpoint + '/'}],
+        }]}).encode()
+
+    def list_body(self, name, query):
+        """Return the encoded list response, caching it by query."""
+        key = (name, query)
+        body = self._bodies.get(key)
+        if body is None:
+            filters = {k: v for k, v in parse.parse_qsl(query)
+                       if k not in IGNORED_PARAMS
+                       if not (k == 'status' and v == 'any')}
+            if 'last_event_id' in filters:
+                last_event_id = int(filters.pop('last_event_id'))
+            else:
+                last_event_id = 0
+            resources = [
+                r for r in self.resources[name]
+                if r.get('id', last_event_id + 1) > last_event_id
+                if all(str(r.get(k)) == v for k, v in filters.items())
+            ]
+            body = json.dumps({name: resources}).encode()
+            with self._lock:
+                self._bodies[key] = body
+        return body
+
+    def get(self, name, resource_id):
+        return self._by_id[name].get(resource_id)
+
+    def cloud_region(self, name='fake', region_name='RegionOne'):
+        """Return a CloudRegion that talks to this server without auth."""
+        cloud_region = openstack.config.get_cloud_region(
+            load_yaml_config=False,
+            load_envvars=False,
+            auth_type='none',
+            lease_endpoint_override=self.endpoint,
+            region_name=region_name)
+        cloud_region._name = name
+        return cloud_region
+
+    def connection(self):
+        return connection.ESIConnection(config=self.cloud_region())
@@ -0,0 +1,154 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import io
+import os
+from unittest import mock
+
+import pytest
+import testtools
+
+from esileapclient.common import cloud_config
+from esileapclient.common import utils as esi_utils
+from esileapclient.osc.v1 import lease
+from esileapclient.osc.v1 import node
+from esileapclient.osc.v1 import offer
+from esileapclient.osc.v1.mdc import mdc_lease
+from esileapclient.osc.v1.mdc import mdc_node
+from esileapclient.osc.v1.mdc import mdc_offer
+from esileapclient.tests.benchmarks import fake_api
+from esileapclient.tests.benchmarks import utils
+from esileapclient.tests.unit.osc.v1 import base
+
+
+# Number of each resource served and the latency of each response, in
+# seconds, can be set through the environment.
+COUNT = int(os.environ.get('ESI_BENCH_COUNT', 1000))
+LATENCY = float(os.environ.get('ESI_BENCH_LATENCY', 0))
+MDC_CLOUDS = 3
+
+# Times are the best of REPEAT runs. A benchmark fails when it is slower
+# than its baseline by more than TIME_TOLERANCE, or allocates more by more
+# than MEMORY_TOLERANCE.
+REPEAT = int(os.environ.get('ESI_BENCH_REPEAT', 3))
+TIME_TOLERANCE = float(os.environ.get('ESI_BENCH_TOLERANCE', 1.0))
+MEMORY_TOLERANCE = float(os.environ.get('ESI_BENCH_MEMORY_TOLERANCE', 0.1))
+BASELINE = os.environ.get('ESI_BENCH_BASELINE',
+                          os.path.join('.benchmarks', 'commands.json'))
+UPDATE_BASELINE = bool(os.environ.get('ESI_BENCH_UPDATE'))
+
+
+@pytest.mark.slow
+class CommandBenchmark(testtools.TestCase):
+    """Time and peak memory of list commands against a fake API."""
+
+    @classmethod
+    def setUpClass(cls):
+        super(CommandBenchmark, cls).setUpClass()
+        cls.api = fake_api.FakeESILeapAPI(COUNT, LATENCY)
+        cls.api.start()
+        cls.client = cls.api.connection().lease
+        cls.cloud_regions = [cls.api.cloud_region('cloud%d' % i)
+                             for i in range(MDC_CLOUDS)]
+        cls.results = []
+        cls.baseline = utils.Baseline(
+            BASELINE, '%d resources, %.3f s latency' % (COUNT, LATENCY),
+            TIME_TOLERANCE, MEMORY_TOLERANCE, UPDATE_BASELINE)
+
+    def setUp(self):
+        super(CommandBenchmark, self).setUp()
+        self.useFixture(base.HealthCacheFixture())
+
+    @classmethod
+    def tearDownClass(cls):
+        utils.report('%d resources, %.3f s latency' % (COUNT, LATENCY),
+                     cls.results)
+        cls.baseline.save()
+        cls.api.stop()
+        super(CommandBenchmark, cls).tearDownClass()
+
+    def _run(self, cmd_class, arglist, cmd_name=None):
+        app = mock.Mock()
+        app.client_manager.lease = self.client
+        stdout = io.StringIO()
+
+        def run():
+            stdout.seek(0)
+            stdout.truncate()
+            app.stdout = stdout
+            cmd = cmd_class(app, None)
+            parsed_args = cmd.get_parser('esi').parse_args(arglist)
+            cmd.run(parsed_args)
+
+        self._record(cmd_name or ' '.join([cmd_class.__name__] + arglist),
+                     *utils.measure(run, repeat=REPEAT))
+        return stdout.getvalue()
+
+    def _record(self, name, elapsed, peak):
+        self.results.append((name, elapsed, peak))
+        regressions = self.baseline.check(name, elapsed, peak)
+        if regressions:
+            self.fail('; '.join(regressions))
+
+    def test_offer_list(self):
+        output = self._run(offer.ListOffer, ['-f', 'value'])
+        self.assertEqual(COUNT, output.count('\n'))
+
+    def test_offer_list_ndjson(self):
+        output = self._run(offer.ListOffer, ['-f', 'ndjson'])
+        self.assertEqual(COUNT, output.count('\n'))
+
+    def test_offer_list_top(self):
+        output = self._run(offer.ListOffer,
+                           ['-f', 'value', '--property', 'cpus>=32',
+                            '--sort-key', 'memory_mb:desc',
+                            '--limit', '10'])
+        self.assertEqual(min(COUNT, 10), output.count('\n'))
+
+    def test_lease_list(self):
+        output = self._run(lease.ListLease, ['-f', 'value', '--long'])
+        self.assertEqual(COUNT, output.count('\n'))
+
+    def test_node_list(self):
+        output = self._run(node.ListNode, ['-f', 'value', '--long'])
+        self.assertEqual(COUNT, output.count('\n'))
+
+    def test_node_list_group_by(self):
+        output = self._run(node.ListNode,
+                           ['-f', 'value', '--group-by', 'resource_class',
+                            '--aggregate', 'cpus,memory_mb'])
+        self.assertEqual(2, output.count('\n'))
+
+    @mock.patch.object(cloud_config, 'get_cloud_regions')
+    def test_mdc_offer_list(self, mock_clouds):
+        mock_clouds.return_value = self.cloud_regions
+        output = self._run(mdc_offer.MDCListOffer, ['-f', 'value'])
+        self.assertEqual(COUNT * MDC_CLOUDS, output.count('\n'))
+
+    @mock.patch.object(cloud_config, 'get_cloud_regions')
+    def test_mdc_lease_list(self, mock_clouds):
+        mock_clouds.return_value = self.cloud_regions
+        output = self._run(mdc_lease.MDCListLease, ['-f', 'value'])
+        self.assertEqual(COUNT * MDC_CLOUDS, output.count('\n'))
+
+    @mock.patch.object(cloud_config, 'get_cloud_regions')
+    def test_mdc_node_list(self, mock_clouds):
+        mock_clouds.return_value = self.cloud_regions
+        output = self._run(mdc_node.MDCListNode, ['-f', 'value'])
+        self.assertEqual(COUNT * MDC_CLOUDS, output.count('\n'))
+
+    def test_filter_nodes_by_properties(self):
+        nodes = self.api.resources['nodes']
+        self._record('filter_nodes_by_properties', *utils.measure(
+            esi_utils.filter_nodes_by_properties, nodes,
+            ['cpus>=32', 'memory_mb<=131072', 'cpu_arch=x86_64'],
+            repeat=REPEAT))
@@ -0,0 +1,52 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import collections
+import json
+
+import pytest
+import testtools
+
+from esileapclient.common import jsonutils
+from esileapclient.tests.benchmarks import utils
+
+
+def _iter_list(body):
+    collections.deque(jsonutils.iter_list(body, 'leases'), maxlen=0)
+
+
+@pytest.mark.slow
+class JSONDecodeBenchmark(testtools.TestCase):
+    """Decode time and peak memory of lease list responses."""
+
+    def _benchmark(self, count):
+        body = json.dumps(
+            {'leases': [utils.fake_lease(i) for i in range(count)]}).encode()
+
+        rows = [
+            ('json.loads',) + utils.measure(json.loads, body),
+            ('jsonutils.iter_list',) + utils.measure(_iter_list, body),
+        ]
+        if jsonutils.orjson is not None:
+            rows.insert(1, ('orjson.loads',) + utils.measure(
+                jsonutils.orjson.loads, body))
+        utils.report('%d leases (%.1f MiB body)' % (
+            count, len(body) / (1024.0 * 1024.0)), rows)
+
+        self.assertEqual(
+            sum(1 for _ in jsonutils.iter_list(body, 'leases')), count)
+
+    def test_decode_10k(self):
+        self._benchmark(10000)
+
+    def test_decode_100k(self):
+        self._benchmark(100000)
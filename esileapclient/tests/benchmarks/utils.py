@@ -0,0 +1,207 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import gc
+import json
+import os
+import time
+import tracemalloc
+import uuid
+
+# Seconds a benchmark may take over its baseline on top of the tolerance,
+# so that timer noise on short benchmarks does not fail them
+TIME_SLACK = 0.05
+
+
+def fake_node(index):
+    return {
+        'uuid': str(uuid.UUID(int=1000000 + index)),
+        'name': 'node-%d' % index,
+        'owner': 'owner-%d' % (index % 10),
+        'lessee': 'project-%d' % (index % 50),
+        'resource_class': 'baremetal' if index % 3 else 'gpu',
+        'provision_state': 'active' if index % 2 else 'available',
+        'maintenance': False,
+        'properties': {
+            'cpus': str(8 * (1 + index % 8)),
+            'memory_mb': str(65536 * (1 + index % 4)),
+            'local_gb': '1200',
+            'cpu_arch': 'x86_64',
+        },
+        'offer_uuid': str(uuid.UUID(int=2000000 + index)),
+        'lease_uuid': str(uuid.UUID(int=index)),
+        'future_offers': [],
+        'future_leases': [],
+    }
+
+
+def fake_offer(index):
+    node = fake_node(index)
+    return {
+        'uuid': node['offer_uuid'],
+        'name': 'offer-%d' % index,
+        'project': node['owner'],
+        'project_id': str(uuid.UUID(int=index % 10)),
+        'lessee': None,
+        'lessee_id': None,
+        'resource': node['name'],
+        'resource_type': 'ironic_node',
+        'resource_uuid': node['uuid'],
+        'resource_class': node['resource_class'],
+        'resource_properties': node['properties'],
+        'parent_lease_uuid': None,
+        'start_time': '2024-01-01T00:00:00',
+        'end_time': '2030-01-01T00:00:00',
+        'availabilities': [['2024-01-01T00:00:00', '2030-01-01T00:00:00']],
+        'status': 'available',
+        'properties': {},
+    }
+
+
+def fake_event(index):
+    return {
+        'id': index + 1,
+        'event_type': 'esi_leap.lease.fulfill.end',
+        'event_time': '2024-01-01T%02d:%02d:%02d' % (
+            index // 3600 % 24, index // 60 % 60, index % 60),
+        'object_type': 'lease',
+        'object_uuid': str(uuid.UUID(int=index)),
+        'resource_type': 'ironic_node',
+        'resource_uuid': str(uuid.UUID(int=1000000 + index)),
+        'lessee_id': str(uuid.UUID(int=index % 50)),
+        'owner_id': str(uuid.UUID(int=index % 10)),
+    }
+
+
+def fake_lease(index):
+    return {
+        'uuid': str(uuid.UUID(int=index)),
+        'name': 'lease-%d' % index,
+        'project': 'project-%d' % (index % 50),
+        'project_id': str(uuid.UUID(int=index % 50)),
+        'owner': 'owner-%d' % (index % 10),
+        'owner_id': str(uuid.UUID(int=index % 10)),
+        'resource': 'node-%d' % index,
+        'resource_type': 'ironic_node',
+        'resource_uuid': str(uuid.UUID(int=1000000 + index)),
+        'resource_class': 'baremetal',
+        'resource_properties': {
+            'cpus': str(8 * (1 + index % 8)),
+            'memory_mb': str(65536 * (1 + index % 4)),
+            'local_gb': '1200',
+            'cpu_arch': 'x86_64',
+            'traits': ['CUSTOM_TRAIT_%d' % (index % 5)],
+        },
+        'offer_uuid': str(uuid.UUID(int=2000000 + index)),
+        'parent_lease_uuid': None,
+        'start_time': '2024-01-01T00:00:00',
+        'end_time': '2030-01-01T00:00:00',
+        'expire_time': None,
+        'fulfill_time': '2024-01-01T00:00:00',
+        'status': 'active',
+        'purpose': None,
+        'properties': {},
+    }
+
+
+def measure(func, *args, repeat=1):
+    """Return the wall time of func(*args) in seconds and the peak memory
+    it allocated, in bytes.
+
+    Tracing allocations slows Python down considerably, so the time and
+    the memory are measured on separate runs. The time is the best of
+    repeat runs. args must be reusable.
+    """
+    elapsed = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func(*args)
+        run = time.perf_counter() - start
+        elapsed = run if elapsed is None else min(elapsed, run)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return elapsed, peak
+
+
+def report(title, rows):
+    """Print a table of (name, seconds, peak bytes) results."""
+    width = max([len(row[0]) for row in rows] + [10])
+    print('\n%s' % title)
+    for name, elapsed, peak in rows:
+        print('  %-*s %9.3f s %10.1f MiB' % (width, name, elapsed,
+                                             peak / (1024.0 * 1024.0)))
+
+
+class Baseline(object):
+    """Results of an earlier run that benchmarks must not regress from.
+
+    The results are kept in a JSON file by configuration (such as the
+    number of resources and the latency) and benchmark name. Benchmarks
+    without a result for their configuration, or all of them when update
+    is set, record one instead of being compared.
+
+    :param time_tolerance: Share of the baseline time that a benchmark may
+        exceed it by. Times vary with the load of the machine, so this is
+        wider than memory_tolerance.
+    :param memory_tolerance: Share of the baseline peak memory that a
+        benchmark may exceed it by.
+    """
+
+    def __init__(self, path, config, time_tolerance, memory_tolerance,
+                 update=False):
+        self.path = path
+        self.time_tolerance = time_tolerance
+        self.memory_tolerance = memory_tolerance
+        self.update = update
+        try:
+            with open(path) as f:
+                self._data = json.load(f)
+        except (OSError, ValueError):
+            self._data = {}
+        self._results = self._data.setdefault(config, {})
+        self._changed = False
+
+    def check(self, name, elapsed, peak):
+        """Return the regressions of a result from its baseline."""
+        baseline = self._results.get(name)
+        if baseline is None or self.update:
+            self._results[name] = {'seconds': elapsed, 'peak': peak}
+            self._changed = True
+            return []
+
+        regressions = []
+        limit = baseline['seconds'] * (1 + self.time_tolerance) + TIME_SLACK
+        if elapsed > limit:
+            regressions.append('%s took %.3f s, over %.3f s (baseline '
+                               '%.3f s)' % (name, elapsed, limit,
+                                            baseline['seconds']))
+        limit = baseline['peak'] * (1 + self.memory_tolerance)
+        if peak > limit:
+            regressions.append('%s allocated %d bytes, over %d (baseline '
+                               '%d)' % (name, peak, limit, baseline['peak']))
+        return regressions
+
+    def save(self):
+        if not self._changed:
+            return
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        with open(self.path, 'w') as f:
+            json.dump(self._data, f, indent=2, sort_keys=True)
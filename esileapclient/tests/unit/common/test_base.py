@@ -14,6 +14,8 @@ import testtools
 import copy
 from unittest import mock
 
+from osc_lib import exceptions
+
 from esileapclient.common import base
 
 
@@ -197,6 +199,18 @@ class ManagerTestCase(testtools.TestCase):
             self.assertEqual(resources_list[1]._info,
                              expected_resources[1]._info)
 
+    def test__list_error(self):
+
+        manager = FakeResourceManager(None)
+        with mock.patch.object(manager, 'api') as mock_api:
+
+            resp = FakeResponse(status=400)
+            resp.text = '{"faultstring": "bad request"}'
+            mock_api.json_request.return_value = (resp, None)
+
+            self.assertRaisesRegex(exceptions.CommandError, 'bad request',
+                                   manager._list, manager._path())
+
     def test__list_microversion_override(self):
 
         manager = FakeResourceManager(None)
@@ -262,6 +276,41 @@ class ManagerTestCase(testtools.TestCase):
             self.assertIsInstance(resource, FakeResource)
             self.assertEqual(FAKE_RESOURCE, resource._info)
 
+    def test__list_fields(self):
+
+        manager = FakeResourceManager(None)
+        with mock.patch.object(manager, 'api') as mock_api:
+
+            mock_api.json_request.return_value = (
+                VALID_RESPONSE,
+                {'fakeresources': [FAKE_RESOURCE, FAKE_RESOURCE_2]})
+
+            resources = manager._list(manager._path(),
+                                      fields=['uuid', 'attribute2'])
+
+            mock_api.json_request.assert_called_once_with(
+                'GET', '/v1/fakeresources')
+            self.assertEqual({'uuid': FAKE_RESOURCE['uuid'],
+                              'attribute2': '2'}, resources[0]._info)
+            self.assertFalse(hasattr(resources[0], 'attribute1'))
+
+    def test__get_fields(self):
+
+        manager = FakeResourceManager(None)
+        with mock.patch.object(manager, 'api') as mock_api:
+
+            mock_api.json_request.return_value = (
+                VALID_RESPONSE, {'uuid': FAKE_RESOURCE['uuid']})
+
+            resource = manager._get(FAKE_RESOURCE['uuid'],
+                                    fields=['uuid', 'attribute3'])
+
+            mock_api.json_request.assert_called_once_with(
+                'GET', '/v1/fakeresources/%s?fields=uuid,attribute3' %
+                FAKE_RESOURCE['uuid'])
+            self.assertEqual({'uuid': FAKE_RESOURCE['uuid']},
+                             resource._info)
+
     def test__get_invalid_resource_id_raises(self):
 
         manager = FakeResourceManager(None)
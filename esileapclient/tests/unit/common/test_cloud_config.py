@@ -0,0 +1,116 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+from unittest import mock
+
+import fixtures
+from openstack.config import loader
+import testtools
+
+from esileapclient.common import cloud_config
+
+CLOUDS_YAML = """
+clouds:
+  cloud1:
+    auth:
+      auth_url: http://cloud1:5000
+    regions:
+      - regionOne
+      - regionTwo
+  cloud2:
+    auth:
+      auth_url: http://cloud2:5000
+    region_name: regionOne
+  cloud3:
+    auth:
+      auth_url: http://cloud3:5000
+"""
+
+
+class CloudConfigTest(testtools.TestCase):
+
+    def setUp(self):
+        super(CloudConfigTest, self).setUp()
+        self.path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                                 'clouds.yaml')
+        with open(self.path, 'w') as f:
+            f.write(CLOUDS_YAML)
+
+        # Only read the test configuration
+        for name in ('CONFIG_FILES', 'SECURE_FILES', 'VENDOR_FILES'):
+            self.useFixture(fixtures.MockPatchObject(loader, name, []))
+        for name in list(os.environ):
+            if name.startswith('OS_'):
+                self.useFixture(fixtures.EnvironmentVariable(name))
+        self.useFixture(fixtures.EnvironmentVariable(
+            'OS_CLIENT_CONFIG_FILE', self.path))
+        self.useFixture(fixtures.MockPatchObject(
+            cloud_config, '_cache',
+            {'key': None, 'config': None, 'regions': {}}))
+
+    def test_all_clouds(self):
+        cloud_regions = cloud_config.get_cloud_regions()
+
+        self.assertEqual([('cloud1', 'regionOne'), ('cloud1', 'regionTwo'),
+                          ('cloud2', 'regionOne'), ('cloud3', '')],
+                         [(c.name, c.config['region_name'])
+                          for c in cloud_regions])
+
+    def test_selected_clouds(self):
+        config = cloud_config.get_config()
+        with mock.patch.object(config, 'get_one',
+                               wraps=config.get_one) as mock_get_one:
+            cloud_regions = cloud_config.get_cloud_regions(
+                ['cloud3', 'cloud2', 'unknown'])
+
+            self.assertEqual(['cloud2', 'cloud3'],
+                             [c.name for c in cloud_regions])
+            self.assertEqual(2, mock_get_one.call_count)
+
+            # Resolved regions are reused
+            again = cloud_config.get_cloud_regions(['cloud2'])
+            self.assertIs(cloud_regions[0], again[0])
+            self.assertEqual(2, mock_get_one.call_count)
+
+    def test_without_get_regions(self):
+        config = cloud_config.get_config()
+        all_clouds = config.get_all_clouds()
+        with mock.patch.object(config, '_get_regions', None), \
+                mock.patch.object(config, 'get_all_clouds',
+                                  return_value=all_clouds) as mock_all:
+            cloud_regions = cloud_config.get_cloud_regions(['cloud1',
+                                                            'cloud3'])
+            # Every cloud was resolved with one call
+            mock_all.assert_called_once_with()
+
+        self.assertEqual([('cloud1', 'regionOne'), ('cloud1', 'regionTwo'),
+                          ('cloud3', '')],
+                         [(c.name, c.config['region_name'])
+                          for c in cloud_regions])
+
+    def test_cached_until_changed(self):
+        config = cloud_config.get_config()
+        cloud_region = cloud_config.get_cloud_regions(['cloud2'])[0]
+        self.assertIs(config, cloud_config.get_config())
+
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns,
+                                stat.st_mtime_ns + 10 ** 9))
+        self.assertIsNot(config, cloud_config.get_config())
+        self.assertIsNot(cloud_region,
+                         cloud_config.get_cloud_regions(['cloud2'])[0])
+
+        config = cloud_config.get_config()
+        self.useFixture(fixtures.EnvironmentVariable('OS_REGION_NAME',
+                                                     'regionTwo'))
+        self.assertIsNot(config, cloud_config.get_config())
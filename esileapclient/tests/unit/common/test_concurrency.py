@@ -0,0 +1,358 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import threading
+
+import testtools
+
+from esileapclient.common import concurrency
+
+
+class MapConcurrentlyTest(testtools.TestCase):
+
+    def test_order_and_errors(self):
+        def double(value):
+            if value == 3:
+                raise ValueError('three')
+            return value * 2
+
+        results = list(concurrency.map_concurrently(double, range(5), 2))
+
+        self.assertEqual([0, 1, 2, 3, 4], [r[0] for r in results])
+        self.assertEqual([0, 2, 4, None, 8], [r[1] for r in results])
+        self.assertIsInstance(results[3][2], ValueError)
+        self.assertEqual([None] * 4, [r[2] for r in results if r[0] != 3])
+
+    def test_concurrent(self):
+        barrier = threading.Barrier(3, timeout=5)
+
+        results = list(concurrency.map_concurrently(
+            lambda value: barrier.wait() is not None, range(3), 3))
+
+        self.assertEqual([True] * 3, [r[1] for r in results])
+
+    def test_empty(self):
+        self.assertEqual(
+            [], list(concurrency.map_concurrently(str, [])))
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class OverloadError(Exception):
+    def __init__(self, status_code):
+        super(OverloadError, self).__init__(status_code)
+        self.status_code = status_code
+
+
+class AdaptiveLimiterTest(testtools.TestCase):
+
+    def setUp(self):
+        super(AdaptiveLimiterTest, self).setUp()
+        self.clock = FakeClock()
+        self.limiter = concurrency.AdaptiveLimiter(initial=4, maximum=6,
+                                                   clock=self.clock)
+
+    def _call(self, latency, overloaded=False):
+        self.clock.now += 0.01
+        started = self.limiter.acquire()
+        self.clock.now += latency
+        self.limiter.release(started, overloaded)
+        return started
+
+    def test_additive_increase(self):
+        for _ in range(5):
+            self._call(0.1)
+        self.assertEqual(5, self.limiter.limit)
+
+        for _ in range(100):
+            self._call(0.1)
+        self.assertEqual(6, self.limiter.limit)
+
+    def test_overload_backoff(self):
+        first = self.limiter.acquire()
+        second = self.limiter.acquire()
+        self.clock.now += 0.1
+        self.limiter.release(first, overloaded=True)
+        self.assertEqual(2, self.limiter.limit)
+
+        # A call in flight during the cut does not cut again
+        self.limiter.release(second, overloaded=True)
+        self.assertEqual(2, self.limiter.limit)
+
+        self._call(0.1, overloaded=True)
+        self.assertEqual(1, self.limiter.limit)
+        self._call(0.1, overloaded=True)
+        self.assertEqual(1, self.limiter.limit)
+
+    def test_latency_backoff(self):
+        for _ in range(5):
+            self._call(0.1)
+        self.assertEqual(5, self.limiter.limit)
+
+        self._call(0.15)
+        self.assertEqual(5, self.limiter.limit)
+
+        self._call(1.0)
+        self.assertEqual(2, self.limiter.limit)
+
+    def test_acquire_waits(self):
+        limiter = concurrency.AdaptiveLimiter(initial=1)
+        started = limiter.acquire()
+        acquired = threading.Event()
+
+        def acquire():
+            limiter.release(limiter.acquire())
+            acquired.set()
+
+        thread = threading.Thread(target=acquire)
+        thread.start()
+        self.assertFalse(acquired.wait(0.05))
+        limiter.release(started)
+        self.assertTrue(acquired.wait(5))
+        thread.join(5)
+
+    def test_call(self):
+        self.assertEqual(3, self.limiter.call(lambda a, b: a + b, 1, 2))
+        self.assertRaises(ValueError, self.limiter.call, int, 'x')
+        self.assertEqual(4, self.limiter.limit)
+
+        def overloaded():
+            raise OverloadError(503)
+
+        self.assertRaises(OverloadError, self.limiter.call, overloaded)
+        self.assertEqual(2, self.limiter.limit)
+
+    def test_is_overloaded(self):
+        self.assertTrue(concurrency.is_overloaded(OverloadError(429)))
+        self.assertFalse(concurrency.is_overloaded(OverloadError(404)))
+        self.assertFalse(concurrency.is_overloaded(ValueError()))
+
+        error = ValueError()
+        error.response = OverloadError(503)
+        self.assertTrue(concurrency.is_overloaded(error))
+
+    def test_limiter_for(self):
+        class API(object):
+            pass
+
+        api = API()
+        limiter = concurrency.limiter_for(api)
+        self.assertIs(limiter, concurrency.limiter_for(api))
+        self.assertIsNot(limiter, concurrency.limiter_for(API()))
+
+    def test_map_concurrently(self):
+        limiter = concurrency.AdaptiveLimiter(initial=2, maximum=2)
+        lock = threading.Lock()
+        in_flight = [0, 0]
+
+        def call(value):
+            with lock:
+                in_flight[0] += 1
+                in_flight[1] = max(in_flight)
+            threading.Event().wait(0.01)
+            with lock:
+                in_flight[0] -= 1
+            return value
+
+        results = list(concurrency.map_concurrently(call, range(8), 8,
+                                                    limiter))
+
+        self.assertEqual(list(range(8)), [r[1] for r in results])
+        self.assertEqual(2, in_flight[1])
+
+
+class PrefetchTest(testtools.TestCase):
+
+    def test_items(self):
+        self.assertEqual(list(range(50)),
+                         list(concurrency.prefetch(iter(range(50)), 3)))
+
+    def test_starts_at_once(self):
+        started = threading.Event()
+
+        def items():
+            started.set()
+            yield 1
+
+        stream = concurrency.prefetch(items())
+        self.assertTrue(started.wait(5))
+        self.assertEqual([1], list(stream))
+
+    def test_bounded(self):
+        produced = []
+
+        def items():
+            for i in range(10):
+                produced.append(i)
+                yield i
+
+        stream = concurrency.prefetch(items(), 2)
+        self.assertEqual(0, next(stream))
+        threading.Event().wait(0.05)
+        # One item taken, two queued and one waiting to be queued
+        self.assertLessEqual(len(produced), 4)
+
+        stream.close()
+        threading.Event().wait(0.2)
+        self.assertLessEqual(len(produced), 4)
+
+    def test_error(self):
+        def items():
+            yield 1
+            raise ValueError('boom')
+
+        stream = concurrency.prefetch(items())
+        self.assertEqual(1, next(stream))
+        self.assertRaises(ValueError, next, stream)
+
+
+class HedgeTest(testtools.TestCase):
+
+    def setUp(self):
+        super(HedgeTest, self).setUp()
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+        self.calls = []
+
+    def _call(self, *outcomes):
+        """Returns a function whose n-th call has the n-th outcome.
+
+        'hang' blocks until the test ends; an exception is raised.
+        """
+
+        def func():
+            outcome = outcomes[len(self.calls)]
+            self.calls.append(outcome)
+            if outcome == 'hang':
+                self.release.wait(5)
+            elif isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+        return func
+
+    def test_fast(self):
+        self.assertEqual('first', concurrency.hedge(
+            self._call('first', 'second'), 5))
+        self.assertEqual(['first'], self.calls)
+
+    def test_hedged(self):
+        self.assertEqual('second', concurrency.hedge(
+            self._call('hang', 'second'), 0.01))
+        self.assertEqual(['hang', 'second'], self.calls)
+
+    def test_never_hedged(self):
+        self.assertRaises(ValueError, concurrency.hedge,
+                          self._call(ValueError('one')), None)
+        self.assertEqual(1, len(self.calls))
+
+    def test_hedge_fails(self):
+        failed = threading.Event()
+
+        def func():
+            self.calls.append(len(self.calls))
+            if self.calls[-1]:
+                failed.set()
+                raise ValueError('second')
+            # The first call only returns once the hedge has failed
+            failed.wait(5)
+            return 'first'
+
+        self.assertEqual('first', concurrency.hedge(func, 0.01))
+        self.assertEqual([0, 1], self.calls)
+
+    def test_all_fail(self):
+        errors = [ValueError('one'), ValueError('two')]
+
+        def func():
+            index = len(self.calls)
+            self.calls.append(index)
+            if index == 0:
+                self.release.wait(0.05)
+            raise errors[index]
+
+        raised = self.assertRaises(ValueError, concurrency.hedge, func, 0.01)
+        self.assertIn(raised, errors)
+        self.assertEqual(2, len(self.calls))
+
+
+class SingleFlightTest(testtools.TestCase):
+
+    def setUp(self):
+        super(SingleFlightTest, self).setUp()
+        self.group = concurrency.SingleFlight()
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.calls = 0
+
+    def _slow(self, value):
+        self.calls += 1
+        self.started.set()
+        self.release.wait(5)
+        if isinstance(value, Exception):
+            raise value
+        return [value]
+
+    def _run(self, key, value, count):
+        results = [None] * count
+
+        def call(index):
+            try:
+                results[index] = self.group.do(key, self._slow, value)
+            except Exception as e:
+                results[index] = e
+
+        leader = threading.Thread(target=call, args=(0,))
+        leader.start()
+        self.started.wait(5)
+        followers = [threading.Thread(target=call, args=(i,))
+                     for i in range(1, count)]
+        for thread in followers:
+            thread.start()
+        # Wait for the followers to join the call in flight
+        while self.group.shared < count - 1:
+            threading.Event().wait(0.001)
+        self.release.set()
+        for thread in [leader] + followers:
+            thread.join(5)
+        return results
+
+    def test_shared_result(self):
+        results = self._run('key', 'value', 4)
+
+        self.assertEqual(1, self.calls)
+        self.assertEqual([['value']] * 4, results)
+        self.assertTrue(all(r is results[0] for r in results))
+        self.assertEqual(3, self.group.shared)
+        self.assertEqual({}, self.group._calls)
+
+    def test_shared_exception(self):
+        error = ValueError('boom')
+
+        results = self._run('key', error, 3)
+
+        self.assertEqual(1, self.calls)
+        self.assertEqual([error] * 3, results)
+
+    def test_sequential_calls_not_shared(self):
+        self.release.set()
+
+        self.group.do('key', self._slow, 1)
+        self.group.do('key', self._slow, 2)
+
+        self.assertEqual(2, self.calls)
+        self.assertEqual(0, self.group.shared)
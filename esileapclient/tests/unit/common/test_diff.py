@@ -0,0 +1,133 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import io
+import json
+import os
+
+import fixtures
+from osc_lib import exceptions
+import testtools
+
+from esileapclient.common import diff
+
+FIELDS = {
+    'uuid': "UUID",
+    'end_time': "End Time",
+    'status': "Status",
+    'resource_properties': "Resource Properties",
+}
+
+
+class ReadSnapshotTest(testtools.TestCase):
+
+    def test_json_list(self):
+        stream = io.StringIO(' \n' + json.dumps([
+            {'UUID': 'a', 'End Time': 't1', 'Extra Column': 1},
+            {'UUID': 'b', 'Status': 'active'},
+        ]))
+
+        self.assertEqual(
+            [{'uuid': 'a', 'end_time': 't1', 'extra_column': 1},
+             {'uuid': 'b', 'status': 'active'}],
+            list(diff.read_snapshot(stream, FIELDS)))
+
+    def test_ndjson(self):
+        stream = io.StringIO('{"UUID": "a", "status": "active"}\n\n'
+                             '{"uuid": "b"}\n')
+
+        self.assertEqual([{'uuid': 'a', 'status': 'active'},
+                          {'uuid': 'b'}],
+                         list(diff.read_snapshot(stream, FIELDS)))
+
+    def test_empty(self):
+        self.assertEqual([], list(diff.read_snapshot(io.StringIO(''),
+                                                     FIELDS)))
+        self.assertEqual([], list(diff.read_snapshot(io.StringIO('[]'),
+                                                     FIELDS)))
+
+    def test_invalid(self):
+        self.assertRaisesRegex(
+            exceptions.CommandError, 'line 2',
+            list, diff.read_snapshot(io.StringIO('{"uuid": "a"}\n{x\n'),
+                                     FIELDS))
+        self.assertRaisesRegex(
+            exceptions.CommandError, 'not an object',
+            list, diff.read_snapshot(io.StringIO('[1]'), FIELDS))
+        self.assertRaisesRegex(
+            exceptions.CommandError, 'Invalid JSON in snapshot',
+            list, diff.read_snapshot(io.StringIO('[{"uuid": "a"} 1]'),
+                                     FIELDS))
+
+    def test_open_snapshot(self):
+        path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                            'leases.json')
+        self.assertRaisesRegex(exceptions.CommandError,
+                               'Cannot read snapshot',
+                               diff.open_snapshot, path, FIELDS)
+
+        with open(path, 'w') as f:
+            f.write('[{"UUID": "a"}]')
+        self.assertEqual([{'uuid': 'a'}],
+                         list(diff.open_snapshot(path, FIELDS)))
+
+
+class DiffRecordsTest(testtools.TestCase):
+
+    def test_diff(self):
+        old = [
+            {'uuid': 'a', 'status': 'active', 'end_time': 't1'},
+            {'uuid': 'b', 'status': 'active'},
+            {'uuid': 'c', 'status': 'active',
+             'resource_properties': {'cpus': 8}},
+        ]
+        new = iter([
+            {'uuid': 'd', 'status': 'created'},
+            {'uuid': 'c', 'status': 'active',
+             'resource_properties': {'cpus': 16}},
+            # Fields missing from either side are not compared
+            {'uuid': 'a', 'status': 'expired', 'project': 'p1'},
+        ])
+
+        self.assertEqual(
+            [('added', 'd', '', None, None),
+             ('changed', 'c', 'resource_properties', {'cpus': 8},
+              {'cpus': 16}),
+             ('changed', 'a', 'status', 'active', 'expired'),
+             ('removed', 'b', '', None, None)],
+            list(diff.diff_records(old, new)))
+
+    def test_rows(self):
+        old = [{'uuid': 'a', 'status': 'active', 'properties': {}}]
+        new = [{'uuid': 'a', 'status': None, 'properties': {'x': 1}}]
+
+        self.assertEqual(
+            [('changed', 'a', 'status', 'active', ''),
+             ('changed', 'a', 'properties', '{}', '{"x": 1}')],
+            list(diff.diff_rows(old, new)))
+
+    def test_live_records(self):
+        class Lease(object):
+            uuid = 'a'
+            status = 'active'
+            end_time = None
+            resource_properties = {'cpus': 8}
+
+        self.assertEqual(
+            [{'uuid': 'a', 'status': 'active', 'end_time': None,
+              'resource_properties': {'cpus': 8}}],
+            list(diff.live_records([Lease()], FIELDS)))
+
+    def test_missing_uuid(self):
+        self.assertRaisesRegex(exceptions.CommandError, 'without a UUID',
+                               list, diff.diff_records([{'status': 'x'}],
+                                                       []))
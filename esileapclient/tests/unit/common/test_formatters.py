@@ -0,0 +1,50 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import io
+import json
+
+import testtools
+
+from esileapclient.common import formatters
+
+
+class NDJSONFormatterTest(testtools.TestCase):
+
+    def setUp(self):
+        super(NDJSONFormatterTest, self).setUp()
+        self.formatter = formatters.NDJSONFormatter()
+        self.stdout = io.StringIO()
+
+    def test_emit_list(self):
+        emitted = []
+
+        def rows():
+            for row in (('1', {'cpus': 40}), ('2', [])):
+                yield row
+                # Each row is written before the next one is produced
+                emitted.append(self.stdout.getvalue().count('\n'))
+
+        self.formatter.emit_list(['UUID', 'Properties'], rows(),
+                                 self.stdout, None)
+
+        lines = self.stdout.getvalue().splitlines()
+        self.assertEqual([json.loads(line) for line in lines],
+                         [{'UUID': '1', 'Properties': {'cpus': 40}},
+                          {'UUID': '2', 'Properties': []}])
+        self.assertEqual(emitted, [1, 2])
+
+    def test_emit_one(self):
+        self.formatter.emit_one(['UUID', 'Status'], ('1', 'active'),
+                                self.stdout, None)
+        self.assertEqual(self.stdout.getvalue(),
+                         '{"UUID": "1", "Status": "active"}\n')
@@ -0,0 +1,171 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+import os
+
+import fixtures
+from keystoneauth1 import exceptions as ks_exceptions
+from openstack import exceptions as sdk_exceptions
+import requests
+import testtools
+
+from esileapclient.common import health
+
+
+class FakeCloudRegion(object):
+    def __init__(self, name, region=None):
+        self.name = name
+        self.config = {'region_name': region}
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class HealthCacheTest(testtools.TestCase):
+
+    def setUp(self):
+        super(HealthCacheTest, self).setUp()
+        self.path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                                 'cache', 'health.json')
+        self.clock = FakeClock()
+        self.cache = health.HealthCache(self.path, clock=self.clock)
+
+    def _fail(self, key, times):
+        for _ in range(times):
+            self.cache.record_failure(key)
+
+    def test_cloud_key(self):
+        self.assertEqual('c1:r1',
+                         health.cloud_key(FakeCloudRegion('c1', 'r1')))
+        self.assertEqual('c1:', health.cloud_key(FakeCloudRegion('c1')))
+
+    def test_circuit(self):
+        self.assertEqual(health.CLOSED, self.cache.state('c1:'))
+
+        self._fail('c1:', health.FAILURE_THRESHOLD - 1)
+        self.assertEqual(health.CLOSED, self.cache.state('c1:'))
+
+        self._fail('c1:', 1)
+        self.assertEqual(health.OPEN, self.cache.state('c1:'))
+
+        self.clock.now += health.RESET_TIMEOUT
+        self.assertEqual(health.HALF_OPEN, self.cache.state('c1:'))
+
+        # A failed probe opens the circuit again
+        self._fail('c1:', 1)
+        self.assertEqual(health.OPEN, self.cache.state('c1:'))
+
+        self.clock.now += health.RESET_TIMEOUT
+        self.cache.record_success('c1:', 0.5)
+        self.assertEqual(health.CLOSED, self.cache.state('c1:'))
+
+    def test_statistics(self):
+        self.assertEqual(0.0, self.cache.failure_rate('c1:'))
+        self.assertIsNone(self.cache.latency('c1:'))
+
+        for latency in (0.1, 0.2, 0.3, 0.4, 1.0):
+            self.cache.record_success('c1:', latency)
+        self._fail('c1:', 5)
+
+        self.assertEqual(0.5, self.cache.failure_rate('c1:'))
+        self.assertEqual(0.3, self.cache.latency('c1:'))
+        self.assertEqual(1.0, self.cache.latency('c1:', 95))
+
+        for _ in range(health.WINDOW):
+            self.cache.record_success('c1:', 0.1)
+        self.assertEqual(0.0, self.cache.failure_rate('c1:'))
+        self.assertEqual(0.1, self.cache.latency('c1:', 95))
+
+    def test_select(self):
+        clouds = [FakeCloudRegion(name) for name in ('a', 'b', 'c', 'd', 'e')]
+        self._fail('a:', health.FAILURE_THRESHOLD)
+        self.cache.record_success('b:', 2.0)
+        self.cache.record_success('c:', 0.5)
+        self._fail('e:', 1)
+
+        self.assertEqual(['d', 'c', 'b', 'e'],
+                         [c.name for c in self.cache.select(clouds)])
+        self.assertEqual(
+            ['d', 'c', 'b', 'e', 'a'],
+            [c.name for c in self.cache.select(clouds, ignore_open=True)])
+
+        self.clock.now += health.RESET_TIMEOUT
+        self.assertEqual(['d', 'c', 'b', 'e', 'a'],
+                         [c.name for c in self.cache.select(clouds)])
+
+    def test_is_failure(self):
+        for error in (ConnectionError('refused'), TimeoutError(),
+                      ks_exceptions.ConnectTimeout(),
+                      requests.exceptions.ReadTimeout(),
+                      sdk_exceptions.HttpException(http_status=503),
+                      ks_exceptions.InternalServerError()):
+            self.assertTrue(health.is_failure(error), error)
+        for error in (sdk_exceptions.HttpException(http_status=400),
+                      ks_exceptions.Unauthorized(), ValueError('bad'),
+                      Exception('bug')):
+            self.assertFalse(health.is_failure(error), error)
+
+    def test_track(self):
+        def failing():
+            yield 1
+            raise ConnectionError('connection refused')
+
+        self.assertEqual([1, 2], list(self.cache.track(iter([1, 2]), 'ok:',
+                                                       'things')))
+        self.assertEqual([1], list(self.cache.track(failing(), 'bad:',
+                                                    'things')))
+
+        self.assertEqual(0.0, self.cache.failure_rate('ok:'))
+        self.assertIsNotNone(self.cache.latency('ok:'))
+        self.assertEqual(1.0, self.cache.failure_rate('bad:'))
+        self.assertEqual(['bad:'], self.cache.skipped)
+
+    def test_track_client_error(self):
+        def rejected():
+            yield 1
+            raise sdk_exceptions.HttpException('bad time range',
+                                               http_status=400)
+
+        tracked = self.cache.track(rejected(), 'c1:', 'things')
+
+        self.assertEqual(1, next(tracked))
+        self.assertRaisesRegex(sdk_exceptions.HttpException,
+                               'bad time range', next, tracked)
+        self.assertEqual(0.0, self.cache.failure_rate('c1:'))
+        self.assertEqual(health.CLOSED, self.cache.state('c1:'))
+        self.assertEqual([], self.cache.skipped)
+
+    def test_save_and_load(self):
+        self.cache.record_success('c1:', 0.25)
+        self._fail('c2:', health.FAILURE_THRESHOLD)
+        self.cache.save()
+
+        with open(self.path) as f:
+            self.assertIn('c1:', json.load(f)['clouds'])
+
+        loaded = health.HealthCache(self.path, clock=self.clock)
+        self.assertEqual(0.25, loaded.latency('c1:'))
+        self.assertEqual(health.OPEN, loaded.state('c2:'))
+
+    def test_load_invalid(self):
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, 'w') as f:
+            f.write('not json')
+
+        loaded = health.HealthCache(self.path)
+        self.assertEqual(health.CLOSED, loaded.state('c1:'))
@@ -0,0 +1,87 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import io
+import json
+from unittest import mock
+
+import testtools
+
+from esileapclient.common import jsonutils
+
+
+class JSONUtilsTest(testtools.TestCase):
+
+    def test_loads(self):
+        self.assertEqual(jsonutils.loads('{"a": [1, 2]}'), {'a': [1, 2]})
+        self.assertEqual(jsonutils.loads(b'{"a": "b"}'), {'a': 'b'})
+
+    @mock.patch.object(jsonutils, 'orjson', None)
+    def test_loads_stdlib(self):
+        self.assertEqual(jsonutils.loads(b'{"a": "b"}'), {'a': 'b'})
+
+    def test_iter_list(self):
+        items = jsonutils.iter_list(' [ {"uuid": "1"}, {"uuid": "2"} ] ')
+        self.assertEqual(next(items), {'uuid': '1'})
+        self.assertEqual(list(items), [{'uuid': '2'}])
+        self.assertEqual(list(jsonutils.iter_list('[]')), [])
+
+    def test_iter_list_key(self):
+        body = (b'{"next": {"a": [1]}, "leases": [{"uuid": "1"}, [], 3],'
+                b' "other": []}')
+        self.assertEqual(list(jsonutils.iter_list(body, 'leases')),
+                         [{'uuid': '1'}, [], 3])
+        self.assertEqual(list(jsonutils.iter_list('{"leases": []}',
+                                                  'leases')), [])
+
+    def test_iter_list_missing_key(self):
+        self.assertRaises(KeyError, list,
+                          jsonutils.iter_list('{"offers": []}', 'leases'))
+        self.assertRaises(KeyError, list,
+                          jsonutils.iter_list('{}', 'leases'))
+
+    def test_iter_list_invalid(self):
+        for body in ('{"a": 1}', '[1 2]', '[1,'):
+            self.assertRaises(ValueError, list, jsonutils.iter_list(body))
+        self.assertRaises(ValueError, list,
+                          jsonutils.iter_list('{"leases": {}}', 'leases'))
+
+    def test_iter_stream_list(self):
+        items = [{'uuid': str(i), 'name': 'lease %d' % i, 'count': i * 1000}
+                 for i in range(50)] + [12345, 'x', [], {}]
+        text = ' \n' + json.dumps(items, indent=1) + '\n'
+        for chunk_size in (1, 7, 64, 10 ** 6):
+            self.assertEqual(
+                items, list(jsonutils.iter_stream_list(
+                    io.StringIO(text), chunk_size=chunk_size)))
+
+        # Text already read from the file comes first
+        stream = io.StringIO(' {"uuid": "1"}, 2]')
+        self.assertEqual([{'uuid': '1'}, 2], list(
+            jsonutils.iter_stream_list(stream, '[', chunk_size=3)))
+        self.assertEqual([], list(
+            jsonutils.iter_stream_list(io.StringIO('[ ]'))))
+
+    def test_iter_stream_list_reads_in_chunks(self):
+        stream = io.StringIO(json.dumps([{'uuid': str(i)}
+                                         for i in range(1000)]))
+        stream.read = mock.Mock(wraps=stream.read)
+        items = jsonutils.iter_stream_list(stream, chunk_size=100)
+
+        self.assertEqual({'uuid': '0'}, next(items))
+        stream.read.assert_called_once_with(100)
+        self.assertEqual(999, len(list(items)))
+
+    def test_iter_stream_list_invalid(self):
+        for text in ('{"a": 1}', '[1 2]', '[1,', '[{"a": 1}', ''):
+            self.assertRaises(ValueError, list, jsonutils.iter_stream_list(
+                io.StringIO(text), chunk_size=2))
@@ -0,0 +1,175 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+from unittest import mock
+
+import fixtures
+from openstack import exceptions as sdk_exceptions
+from osc_lib import exceptions
+import testtools
+
+from esileapclient.common import mirror
+
+
+def _lease(uuid, status='active', project_id='p1'):
+    return {'uuid': uuid, 'status': status, 'project_id': project_id,
+            'resource': 'node-%s' % uuid}
+
+
+def _event(id, object_type, object_uuid):
+    return mock.Mock(id=id, object_type=object_type,
+                     object_uuid=object_uuid)
+
+
+class MirrorTest(testtools.TestCase):
+
+    def setUp(self):
+        super(MirrorTest, self).setUp()
+        self.path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                                 'cache', 'mirror.sqlite')
+        self.mirror = mirror.Mirror(self.path)
+        self.addCleanup(self.mirror.close)
+
+        self.client = mock.Mock()
+        self.client.nodes.return_value = [
+            {'uuid': 'n1', 'name': 'node1', 'owner': 'o1'}]
+        self.client.offers.return_value = [
+            {'uuid': 'o1', 'status': 'available', 'resource_uuid': 'n1'}]
+        self.client.leases.return_value = [
+            _lease('l1'), _lease('l2', project_id='p2'),
+            _lease('l3', status='expired')]
+
+    def test_snapshot(self):
+        self.assertIsNone(self.mirror.age())
+
+        self.assertEqual(5, self.mirror.snapshot(self.client, view='all'))
+
+        self.client.leases.assert_called_once_with(status='any', view='all')
+        self.client.offers.assert_called_once_with(status='any')
+        self.assertEqual(3, self.mirror.count('leases'))
+        self.assertLess(self.mirror.age(), 60)
+        node, = self.mirror.nodes()
+        self.assertEqual('node1', node.name)
+        self.assertIsNone(node.lessee)
+
+    def test_list_filters(self):
+        self.mirror.snapshot(self.client)
+
+        self.assertEqual(
+            ['l1', 'l2'], [lease.uuid for lease in self.mirror.leases()])
+        self.assertEqual(
+            ['l1', 'l2', 'l3'],
+            [lease.uuid for lease in self.mirror.leases(status='any')])
+        self.assertEqual(
+            ['l3'],
+            [lease.uuid for lease in self.mirror.leases(
+                status='expired,deleted')])
+        self.assertEqual(
+            ['l2'],
+            [lease.uuid for lease in self.mirror.leases(
+                project_id='p2', owner_id=None)])
+        self.assertEqual(
+            ['o1'],
+            [offer.uuid for offer in self.mirror.offers(resource_uuid='n1')])
+
+    def test_list_default_statuses(self):
+        self.client.leases.return_value = [
+            _lease('l%d' % i, status=status) for i, status in enumerate(
+                ['created', 'active', 'error', 'wait_cancel', 'wait_expire',
+                 'wait_fulfill', 'expired', 'deleted'])]
+        self.client.offers.return_value = [
+            {'uuid': 'o1', 'status': 'available'},
+            {'uuid': 'o2', 'status': 'error'},
+            {'uuid': 'o3', 'status': 'deleted'}]
+        self.mirror.snapshot(self.client)
+
+        self.assertEqual(
+            ['l0', 'l1', 'l2', 'l3', 'l4', 'l5'],
+            [lease.uuid for lease in self.mirror.leases()])
+        self.assertEqual(
+            ['o1', 'o2'], [offer.uuid for offer in self.mirror.offers()])
+
+    def test_list_view(self):
+        self.mirror.snapshot(self.client)
+        self.assertIsNone(self.mirror.view)
+        self.assertRaisesRegex(exceptions.CommandError, 'current project',
+                               self.mirror.leases, view='all')
+
+        self.mirror.snapshot(self.client, view='all')
+        self.assertEqual('all', self.mirror.view)
+        self.assertEqual(2, len(list(self.mirror.leases(view='all'))))
+        self.assertRaisesRegex(exceptions.CommandError, 'all projects',
+                               self.mirror.leases)
+        # Offers and nodes are the same in every view
+        self.assertEqual(1, len(list(self.mirror.offers())))
+
+    def test_sync_view_change(self):
+        self.mirror.snapshot(self.client)
+        self.client.reset_mock()
+
+        self.assertEqual(('snapshot', 5),
+                         self.mirror.sync(self.client, view='all'))
+        self.client.leases.assert_called_once_with(status='any', view='all')
+        self.client.events.assert_not_called()
+
+    def test_list_unsupported_filter(self):
+        self.assertRaisesRegex(exceptions.CommandError, 'start_time',
+                               self.mirror.leases, start_time='2024-01-01')
+
+    def test_apply_events(self):
+        self.mirror.snapshot(self.client)
+        self.client.events.return_value = [
+            _event(4, 'lease', 'l1'),
+            _event(6, 'lease', 'l2'),
+            _event(5, 'lease', 'l4'),
+            _event(3, 'offer', 'o1'),
+        ]
+        self.client.get_lease.side_effect = [
+            _lease('l1', status='expired'),
+            sdk_exceptions.NotFoundException(),
+            _lease('l4')]
+        self.client.get_offer.return_value = {'uuid': 'o1',
+                                              'status': 'deleted'}
+        self.client.nodes.return_value = []
+
+        self.assertEqual(('events', 4), self.mirror.sync(self.client))
+
+        call, = self.client.events.call_args_list
+        self.assertEqual(['last_event_time'], list(call[1]))
+        self.assertEqual(
+            ['l1', 'l2', 'l4'],
+            [c[0][0] for c in self.client.get_lease.call_args_list])
+        self.assertEqual(
+            ['l4'], [lease.uuid for lease in self.mirror.leases()])
+        self.assertEqual(
+            ['l1', 'l3', 'l4'],
+            sorted(lease.uuid for lease in self.mirror.leases(status='any')))
+        self.assertEqual([], list(self.mirror.offers()))
+        self.assertEqual(0, self.mirror.count('nodes'))
+        self.assertEqual(6, self.mirror.last_event_id)
+
+        self.client.events.return_value = []
+        self.client.nodes.reset_mock()
+
+        self.assertEqual(('events', 0), self.mirror.sync(self.client))
+
+        self.client.events.assert_called_with(last_event_id=6)
+        self.client.nodes.assert_not_called()
+
+    def test_reopen(self):
+        self.mirror.snapshot(self.client)
+        self.mirror.close()
+
+        with mirror.Mirror(self.path) as reopened:
+            self.assertIsNotNone(reopened.synced_at)
+            self.assertEqual(3, reopened.count('leases'))
@@ -0,0 +1,79 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import argparse
+import cProfile
+import os
+import pstats
+import tempfile
+import tracemalloc
+from unittest import mock
+
+import testtools
+
+from esileapclient.common import profiling
+from esileapclient.osc import plugin
+
+
+class ProfilingTest(testtools.TestCase):
+
+    def setUp(self):
+        super(ProfilingTest, self).setUp()
+        self.report_dir = tempfile.mkdtemp()
+        self.addCleanup(profiling.set_report_dir, None)
+        self.parser = plugin.build_option_parser(argparse.ArgumentParser())
+
+    @mock.patch.object(profiling, 'start_trace_malloc')
+    @mock.patch.object(profiling, 'start_profile')
+    def test_options(self, mock_profile, mock_trace_malloc):
+        args = self.parser.parse_args([])
+        self.assertFalse(args.profile)
+        self.assertFalse(args.trace_malloc)
+        self.assertFalse(mock_profile.called)
+        self.assertFalse(mock_trace_malloc.called)
+
+        args = self.parser.parse_args(['--profile', '--trace-malloc',
+                                       '--profile-dir', self.report_dir])
+        self.assertTrue(args.profile)
+        self.assertTrue(args.trace_malloc)
+        mock_profile.assert_called_once_with()
+        mock_trace_malloc.assert_called_once_with()
+        self.assertTrue(profiling.report_path('profile', 'prof').startswith(
+            os.path.join(self.report_dir, 'esi-profile-')))
+
+    def test_write_profile(self):
+        path = os.path.join(self.report_dir, 'test.prof')
+        profiler = cProfile.Profile()
+        profiler.enable()
+        sorted(range(100))
+
+        with mock.patch('sys.stderr'):
+            profiling.write_profile(profiler, path)
+
+        self.assertIsInstance(pstats.Stats(path), pstats.Stats)
+        with open(path + '.txt') as f:
+            self.assertIn('cumulative', f.read())
+
+    def test_write_trace_malloc(self):
+        path = os.path.join(self.report_dir, 'test.txt')
+        tracemalloc.start()
+        data = [str(i) for i in range(1000)]
+
+        with mock.patch('sys.stderr'):
+            profiling.write_trace_malloc(path)
+
+        self.assertFalse(tracemalloc.is_tracing())
+        with open(path) as f:
+            report = f.read()
+        self.assertIn('Peak memory:', report)
+        self.assertIn(__file__, report)
+        del data
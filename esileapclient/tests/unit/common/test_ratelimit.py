@@ -0,0 +1,159 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import argparse
+import os
+
+import fixtures
+import testtools
+
+from esileapclient.common import ratelimit
+from esileapclient.common import utils
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+
+
+class TokenBucketTest(testtools.TestCase):
+
+    def setUp(self):
+        super(TokenBucketTest, self).setUp()
+        self.clock = FakeClock()
+
+    def _bucket(self, rate, burst):
+        return ratelimit.TokenBucket(rate, burst, clock=self.clock,
+                                     sleep=self.clock.sleep)
+
+    def test_burst_then_rate(self):
+        bucket = self._bucket(2, 3)
+
+        self.assertEqual([0, 0, 0, 0.5, 1.0],
+                         [bucket.acquire() for _ in range(5)])
+        self.assertEqual([0.5, 1.0], self.clock.slept)
+
+    def test_refill(self):
+        bucket = self._bucket(2, 3)
+        for _ in range(3):
+            bucket.acquire()
+
+        self.clock.now += 1
+        self.assertEqual([0, 0, 0.5],
+                         [bucket.acquire() for _ in range(3)])
+
+        # Never more than burst tokens after a long wait
+        self.clock.now += 3600
+        self.assertEqual([0, 0, 0, 0.5],
+                         [bucket.acquire() for _ in range(4)])
+
+    def test_file_bucket_shared(self):
+        path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                            'cloud-leases.bucket')
+        buckets = [ratelimit.FileTokenBucket(path, 1, 2, clock=self.clock,
+                                             sleep=self.clock.sleep)
+                   for _ in range(2)]
+
+        self.assertEqual([0, 0, 1.0, 2.0],
+                         [b.acquire() for b in buckets + buckets])
+
+        self.clock.now += 10
+        self.assertEqual(0, buckets[1].acquire())
+
+    def test_file_bucket_invalid(self):
+        path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                            'cloud-leases.bucket')
+        with open(path, 'w') as f:
+            f.write('not json')
+        bucket = ratelimit.FileTokenBucket(path, 1, 1, clock=self.clock,
+                                           sleep=self.clock.sleep)
+
+        self.assertEqual([0, 1.0], [bucket.acquire() for _ in range(2)])
+
+
+class BucketForTest(testtools.TestCase):
+
+    def setUp(self):
+        super(BucketForTest, self).setUp()
+        self.addCleanup(ratelimit.configure)
+
+    def test_not_limited(self):
+        ratelimit.configure()
+        self.assertIsNone(ratelimit.bucket_for('cloud', 'leases'))
+
+    def test_buckets(self):
+        ratelimit.configure(rate=5)
+
+        bucket = ratelimit.bucket_for('cloud', 'leases')
+        self.assertIsInstance(bucket, ratelimit.TokenBucket)
+        self.assertEqual((5, 5), (bucket.rate, bucket.burst))
+        self.assertIs(bucket, ratelimit.bucket_for('cloud', 'leases'))
+        self.assertIsNot(bucket, ratelimit.bucket_for('cloud', 'offers'))
+        self.assertIsNot(bucket, ratelimit.bucket_for('other', 'leases'))
+
+        ratelimit.configure(rate=0.5, burst=10)
+        bucket = ratelimit.bucket_for('cloud', 'leases')
+        self.assertEqual((0.5, 10), (bucket.rate, bucket.burst))
+
+        ratelimit.configure(rate=0.5)
+        self.assertEqual(1, ratelimit.bucket_for('cloud', 'leases').burst)
+
+    def test_not_positive(self):
+        for rate, burst in ((0, None), (-1, None), (5, 0),
+                            (float('nan'), None)):
+            self.assertRaises(ValueError, ratelimit.configure, rate, burst)
+
+    def test_env(self):
+        for value, expected in (('2.5', 2.5), ('', None), ('x', None),
+                                ('0', None), ('-1', None)):
+            self.useFixture(fixtures.EnvironmentVariable('ESI_RATE_LIMIT',
+                                                         value))
+            self.assertEqual(expected, ratelimit._env_float('ESI_RATE_LIMIT'))
+
+    def test_lock_dir(self):
+        lock_dir = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                                'locks')
+        ratelimit.configure(rate=5, lock_dir=lock_dir)
+
+        bucket = ratelimit.bucket_for('my cloud', 'leases')
+        bucket.acquire()
+
+        self.assertIsInstance(bucket, ratelimit.FileTokenBucket)
+        self.assertEqual(os.path.join(lock_dir, 'my_cloud-leases.bucket'),
+                         bucket.path)
+        self.assertTrue(os.path.exists(bucket.path))
+
+    def test_options(self):
+        parser = argparse.ArgumentParser()
+        parser.add_argument('--rate-limit', type=utils.positive_float,
+                            action=ratelimit.RateLimitAction)
+        parser.add_argument('--rate-burst', type=utils.positive_float,
+                            action=ratelimit.RateLimitAction)
+
+        parser.parse_args(['--rate-limit', '3', '--rate-burst', '6'])
+
+        bucket = ratelimit.bucket_for('cloud', 'leases')
+        self.assertEqual((3, 6), (bucket.rate, bucket.burst))
+
+        self.useFixture(fixtures.MockPatchObject(parser, 'exit',
+                                                 side_effect=SystemExit))
+        self.useFixture(fixtures.MockPatchObject(parser, 'print_usage'))
+        for args in (['--rate-limit', '-1'], ['--rate-burst', '0']):
+            self.assertRaises(SystemExit, parser.parse_args, args)
+        self.assertIs(bucket, ratelimit.bucket_for('cloud', 'leases'))
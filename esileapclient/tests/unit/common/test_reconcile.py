@@ -0,0 +1,183 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import datetime
+import os
+import threading
+from unittest import mock
+
+import fixtures
+from osc_lib import exceptions
+import testtools
+
+from esileapclient.common import reconcile
+
+
+def _lease(uuid, name, **fields):
+    info = {'uuid': uuid, 'name': name, 'resource_uuid': 'node-' + uuid,
+            'resource': 'node' + uuid, 'project_id': 'project-id',
+            'project': 'project', 'end_time': '2026-11-01T00:00:00',
+            'properties': {}}
+    info.update(fields)
+    return info
+
+
+class ReadDesiredTest(testtools.TestCase):
+
+    def setUp(self):
+        super(ReadDesiredTest, self).setUp()
+        self.dir = self.useFixture(fixtures.TempDir()).path
+
+    def _read(self, content):
+        path = os.path.join(self.dir, 'desired.yaml')
+        with open(path, 'w') as f:
+            f.write(content)
+        return reconcile.read_desired(path)
+
+    def test_read(self):
+        desired = self._read(
+            'leases:\n'
+            '- name: lab1\n'
+            '  resource_uuid: 1213\n'
+            '  project_id: project\n'
+            '  end_time: 2026-11-01T00:00:00\n')
+
+        self.assertEqual(
+            [{'name': 'lab1', 'resource_uuid': '1213',
+              'project_id': 'project',
+              'end_time': datetime.datetime(2026, 11, 1)}],
+            desired)
+        self.assertEqual([], self._read('leases: []\n'))
+        self.assertEqual([], self._read(''))
+
+    def test_invalid(self):
+        lease = '- {name: a, resource_uuid: n, project_id: p%s}\n'
+        for content, message in [
+                ('leases: {a: 1}', 'must hold a list'),
+                ('- a', 'not a mapping'),
+                (lease % ', uuid: x', '"uuid" of lease a are invalid'),
+                ('- {name: a, project_id: p}', 'missing "resource_uuid"'),
+                (lease % '' + lease % '', 'listed more than once'),
+                ('- [', 'Invalid YAML')]:
+            self.assertRaisesRegex(exceptions.CommandError, message,
+                                   self._read, content)
+        self.assertRaisesRegex(exceptions.CommandError, 'Cannot read',
+                               reconcile.read_desired,
+                               os.path.join(self.dir, 'missing.yaml'))
+
+
+class PlanTest(testtools.TestCase):
+
+    def test_plan(self):
+        desired = [
+            # Unchanged, given by names and with a time in another zone
+            {'name': 'same', 'resource_uuid': 'node1',
+             'project_id': 'project',
+             'end_time': '2026-11-01T01:00:00+01:00'},
+            {'name': 'longer', 'resource_uuid': 'node-2',
+             'project_id': 'project-id',
+             'end_time': datetime.datetime(2026, 12, 1)},
+            {'name': 'moved', 'resource_uuid': 'node-9',
+             'project_id': 'project-id', 'properties': {'a': 1}},
+            {'name': 'new', 'resource_uuid': 'node-4',
+             'project_id': 'project-id'},
+        ]
+        current = [
+            _lease('1', 'same'),
+            _lease('2', 'longer'),
+            _lease('3', 'moved'),
+            _lease('5', 'unwanted'),
+            _lease('6', None),
+        ]
+
+        operations = reconcile.plan(desired, current, prune=True)
+
+        self.assertEqual(
+            [('delete', 'unwanted', '5', {}, []),
+             ('replace', 'moved', '3', desired[2],
+              [('resource_uuid', 'node-3', 'node-9'),
+               ('properties', {}, {'a': 1})]),
+             ('create', 'new', None, desired[3], []),
+             ('update', 'longer', '2',
+              {'end_time': '2026-12-01T00:00:00'},
+              [('end_time', '2026-11-01T00:00:00',
+                '2026-12-01T00:00:00')])],
+            [(op['action'], op['name'], op['uuid'], op['fields'],
+              op['changes']) for op in operations])
+
+        # Without pruning, leases that are not desired are left alone
+        self.assertNotIn('delete', [op['action'] for op in
+                                    reconcile.plan(desired, current)])
+
+    def test_plan_converged(self):
+        desired = [{'name': 'a', 'resource_uuid': 'node-1',
+                    'project_id': 'project-id'}]
+        self.assertEqual([], reconcile.plan(desired, [_lease('1', 'a')],
+                                            prune=True))
+
+    def test_plan_duplicate_names(self):
+        desired = [{'name': 'a', 'resource_uuid': 'node-1',
+                    'project_id': 'project-id'}]
+        self.assertRaisesRegex(
+            exceptions.CommandError, 'Several leases are named a: 1, 2',
+            reconcile.plan, desired, [_lease('1', 'a'), _lease('2', 'a')])
+
+
+class ApplyTest(testtools.TestCase):
+
+    def test_apply(self):
+        client = mock.Mock()
+        deleted = threading.Event()
+
+        def delete_lease(uuid):
+            if uuid == 'bad':
+                raise Exception('Delete failed')
+            deleted.set()
+
+        def create_lease(**fields):
+            # Creations wait for the deletions
+            self.assertTrue(deleted.is_set())
+            return mock.Mock(uuid='new-' + fields['name'])
+
+        client.delete_lease.side_effect = delete_lease
+        client.create_lease.side_effect = create_lease
+
+        operations = [
+            reconcile._operation('delete', 'old', '1'),
+            reconcile._operation('replace', 'moved', '2', {'name': 'moved'}),
+            reconcile._operation('replace', 'stuck', 'bad',
+                                 {'name': 'stuck'}),
+            reconcile._operation('create', 'new', fields={'name': 'new'}),
+            reconcile._operation('update', 'longer', '3',
+                                 {'end_time': 't'}),
+        ]
+
+        results = [(op['name'], uuid, str(error) if error else None)
+                   for op, uuid, error in reconcile.apply(client,
+                                                          operations)]
+
+        self.assertEqual(
+            [('old', '1', None),
+             ('stuck', 'bad', 'Delete failed'),
+             ('moved', 'new-moved', None),
+             ('new', 'new-new', None),
+             ('longer', '3', None)],
+            results)
+        self.assertEqual([mock.call(name='moved'), mock.call(name='new')],
+                         client.create_lease.call_args_list)
+        client.update_lease.assert_called_once_with('3', end_time='t')
+
+    def test_format_changes(self):
+        self.assertEqual(
+            'end_time: t1 -> t2\nproperties: {} -> {"a": 1}',
+            reconcile.format_changes([('end_time', 't1', 't2'),
+                                      ('properties', {}, {'a': 1})]))
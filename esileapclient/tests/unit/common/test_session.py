@@ -0,0 +1,224 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import threading
+from unittest import mock
+
+from esi import connection
+import requests
+import testtools
+
+from esileapclient.common import concurrency
+from esileapclient.common import jsonutils
+from esileapclient.common import ratelimit
+from esileapclient.common import session
+
+
+def make_response(status, content=b'', headers=None):
+    response = requests.Response()
+    response.status_code = status
+    response._content = content
+    response.headers.update(headers or {})
+    return response
+
+
+class SessionTest(testtools.TestCase):
+
+    def test_resource_name(self):
+        self.assertEqual('leases', session.resource_name('/leases'))
+        self.assertEqual('offers',
+                         session.resource_name('/v1/offers/uuid?a=b'))
+        self.assertEqual('nodes', session.resource_name(
+            'http://esi.example.com:7777/v1/nodes'))
+        self.assertEqual('', session.resource_name('/v1/'))
+
+    @mock.patch.object(ratelimit, 'bucket_for')
+    def test_install_hooks(self, mock_bucket_for):
+        proxy = mock.Mock()
+        request = proxy.request
+
+        self.assertIs(proxy, session.install_hooks(proxy, 'cloud1'))
+        response = proxy.request('/offers', 'GET', params={'a': 'b'})
+
+        self.assertIs(request.return_value, response)
+        request.assert_called_once_with('/offers', 'GET',
+                                        params={'a': 'b'})
+        mock_bucket_for.assert_called_once_with('cloud1', 'offers')
+        mock_bucket_for.return_value.acquire.assert_called_once_with()
+
+    @mock.patch.object(ratelimit, 'bucket_for')
+    def test_install_hooks_unlimited(self, mock_bucket_for):
+        mock_bucket_for.return_value = None
+        proxy = mock.Mock()
+        request = proxy.request
+
+        session.install_hooks(proxy).request('/leases', 'DELETE')
+
+        mock_bucket_for.assert_called_once_with('default', 'leases')
+        request.assert_called_once_with('/leases', 'DELETE')
+
+    @mock.patch.object(jsonutils, 'loads', autospec=True)
+    @mock.patch.object(ratelimit, 'bucket_for')
+    def test_install_hooks_decode(self, mock_bucket_for, mock_loads):
+        proxy = mock.Mock()
+        response = proxy.request.return_value
+        response.content = b'{"leases": []}'
+        original_json = response.json
+
+        response = session.install_hooks(proxy).request('/leases', 'GET')
+
+        self.assertIs(mock_loads.return_value, response.json())
+        mock_loads.assert_called_once_with(b'{"leases": []}')
+        original_json.assert_not_called()
+
+        # Arguments for the json module are left to the original decoder
+        response.json(parse_float=float)
+        original_json.assert_called_once_with(parse_float=float)
+
+    @mock.patch.object(ratelimit, 'bucket_for', return_value=None)
+    def test_install_hooks_shares_gets(self, mock_bucket_for):
+        group = concurrency.SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        proxy = mock.Mock()
+        request = proxy.request
+        response = mock.Mock(content=b'{"leases": [{"uuid": "1"}]}')
+
+        def slow(*args, **kwargs):
+            started.set()
+            release.wait(5)
+            return response
+
+        request.side_effect = slow
+        with mock.patch.object(concurrency, 'SingleFlight',
+                               return_value=group):
+            session.install_hooks(proxy)
+
+        results = []
+
+        def get():
+            results.append(proxy.request('/leases', 'GET',
+                                         headers={'a': 'b'}))
+
+        threads = [threading.Thread(target=get) for _ in range(3)]
+        threads[0].start()
+        started.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        while group.shared < 2:
+            threading.Event().wait(0.001)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        request.assert_called_once_with('/leases', 'GET',
+                                        headers={'a': 'b'})
+        self.assertEqual([response] * 3, results)
+        decoded = [r.json() for r in results]
+        self.assertEqual([{'leases': [{'uuid': '1'}]}] * 3, decoded)
+        self.assertIsNot(decoded[0], decoded[1])
+
+    @mock.patch.object(ratelimit, 'bucket_for', return_value=None)
+    def test_install_hooks_different_gets_not_shared(self,
+                                                     mock_bucket_for):
+        proxy = mock.Mock()
+        request = proxy.request
+        session.install_hooks(proxy)
+
+        proxy.request('/leases', 'GET', headers={'a': 'b'})
+        proxy.request('/leases', 'GET', headers={'a': 'c'})
+        proxy.request('/leases', 'POST', json={})
+
+        self.assertEqual([mock.call('/leases', 'GET', headers={'a': 'b'}),
+                          mock.call('/leases', 'GET', headers={'a': 'c'}),
+                          mock.call('/leases', 'POST', json={})],
+                         request.call_args_list)
+
+    @mock.patch.object(ratelimit, 'bucket_for', return_value=None)
+    def test_install_hooks_revalidates(self, mock_bucket_for):
+        body = b'{"leases": [{"uuid": "1"}]}'
+        proxy = mock.Mock()
+        request = proxy.request
+        request.side_effect = [
+            make_response(200, body, {'ETag': '"v1"'}),
+            make_response(304, headers={'ETag': '"v1"'}),
+        ]
+        session.install_hooks(proxy)
+        headers = {'a': 'b'}
+
+        first = proxy.request('/leases', 'GET', headers=headers)
+        second = proxy.request('/leases', 'GET', headers=headers)
+
+        self.assertEqual([
+            mock.call('/leases', 'GET', headers={'a': 'b'}),
+            mock.call('/leases', 'GET',
+                      headers={'a': 'b', 'If-None-Match': '"v1"'}),
+        ], request.call_args_list)
+        self.assertEqual({'a': 'b'}, headers)
+        self.assertEqual(200, second.status_code)
+        self.assertEqual(first.json(), second.json())
+        self.assertIsNot(first.json()['leases'][0],
+                         second.json()['leases'][0])
+
+    @mock.patch.object(ratelimit, 'bucket_for', return_value=None)
+    def test_install_hooks_revalidates_changed(self, mock_bucket_for):
+        proxy = mock.Mock()
+        request = proxy.request
+        request.side_effect = [
+            make_response(200, b'{"uuid": "1"}', {'ETag': '"v1"'}),
+            make_response(200, b'{"uuid": "2"}', {'ETag': '"v2"'}),
+            make_response(304),
+        ]
+        session.install_hooks(proxy)
+
+        responses = [proxy.request('/leases/1', 'GET') for _ in range(3)]
+
+        self.assertEqual([
+            mock.call('/leases/1', 'GET'),
+            mock.call('/leases/1', 'GET',
+                      headers={'If-None-Match': '"v1"'}),
+            mock.call('/leases/1', 'GET',
+                      headers={'If-None-Match': '"v2"'}),
+        ], request.call_args_list)
+        self.assertEqual([{'uuid': '1'}, {'uuid': '2'}, {'uuid': '2'}],
+                         [r.json() for r in responses])
+
+    @mock.patch.object(ratelimit, 'bucket_for', return_value=None)
+    def test_install_hooks_without_etag_not_revalidated(self,
+                                                        mock_bucket_for):
+        proxy = mock.Mock()
+        request = proxy.request
+        request.side_effect = [make_response(200, b'{}'),
+                               make_response(200, b'{}')]
+        session.install_hooks(proxy)
+
+        proxy.request('/leases', 'GET')
+        proxy.request('/leases', 'GET')
+
+        self.assertEqual([mock.call('/leases', 'GET'),
+                          mock.call('/leases', 'GET')],
+                         request.call_args_list)
+
+    @mock.patch.object(ratelimit, 'bucket_for')
+    @mock.patch.object(connection, 'ESIConnection')
+    def test_connect(self, mock_conn, mock_bucket_for):
+        config = mock.Mock()
+        config.name = 'cloud1'
+        request = mock_conn.return_value.lease.request
+
+        proxy = session.connect(config)
+        proxy.request('/nodes', 'GET')
+
+        mock_conn.assert_called_once_with(config=config)
+        self.assertIs(mock_conn.return_value.lease, proxy)
+        request.assert_called_once_with('/nodes', 'GET')
+        mock_bucket_for.assert_called_once_with('cloud1', 'nodes')
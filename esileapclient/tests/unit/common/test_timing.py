@@ -0,0 +1,134 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import io
+import itertools
+import threading
+from unittest import mock
+
+import testtools
+
+from esileapclient.common import timing
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class PhaseTimerTest(testtools.TestCase):
+
+    def setUp(self):
+        super(PhaseTimerTest, self).setUp()
+        self.clock = FakeClock()
+        self.timer = timing.PhaseTimer(clock=self.clock)
+
+    def test_phase(self):
+        with self.timer.phase('request'):
+            self.clock.advance(2)
+            with self.timer.phase('build'):
+                self.clock.advance(1)
+            self.clock.advance(1)
+        self.clock.advance(5)
+
+        self.assertEqual({'request': 3, 'build': 1}, self.timer.totals)
+        self.assertEqual({'request': 1, 'build': 1}, self.timer.counts)
+        self.assertEqual([('request', 3, 1), ('build', 1, 1),
+                          ('other', 5, ''), ('total', 9, '')],
+                         self.timer.report())
+
+    def test_iterate_nested(self):
+        def fetch():
+            for i in range(3):
+                self.clock.advance(2)
+                yield i
+
+        def keep_odd(items):
+            for i in items:
+                self.clock.advance(1)
+                if i % 2:
+                    yield i
+
+        data = self.timer.iterate(fetch(), 'request')
+        filtered = self.timer.iterate(keep_odd(data), 'filter')
+
+        self.assertEqual([1], list(filtered))
+        self.assertEqual({'request': 6, 'filter': 3}, self.timer.totals)
+        self.assertEqual({'request': 4, 'filter': 2}, self.timer.counts)
+
+    def test_worker_threads(self):
+        def fetch():
+            with self.timer.phase('fetch'):
+                self.clock.advance(3)
+
+        with self.timer.phase('request'):
+            workers = [threading.Thread(target=fetch) for _ in range(2)]
+            for worker in workers:
+                worker.start()
+                worker.join()
+        self.clock.advance(1)
+
+        # The threads overlap the main thread, so they are not part of its
+        # time
+        self.assertEqual({'request': 6}, self.timer.totals)
+        self.assertEqual({'fetch': 6}, self.timer.thread_totals)
+        self.assertEqual([('request', 6, 1), ('other', 1, ''),
+                          ('total', 7, ''), ('fetch (threads)', 6, 2)],
+                         self.timer.report())
+
+    def test_phase_exception(self):
+        def fail():
+            with self.timer.phase('request'):
+                self.clock.advance(1)
+                raise ValueError()
+
+        self.assertRaises(ValueError, fail)
+        self.assertEqual({'request': 1}, self.timer.totals)
+
+
+class TimingTest(testtools.TestCase):
+
+    def setUp(self):
+        super(TimingTest, self).setUp()
+        self.addCleanup(timing.disable)
+
+    def test_disabled(self):
+        data = [1, 2]
+        self.assertIs(data, timing.iterate(data, 'request'))
+        with timing.phase('request'):
+            pass
+        stream = io.StringIO()
+        timing.print_report(stream)
+        self.assertEqual('', stream.getvalue())
+
+    @mock.patch('atexit.register')
+    def test_enabled(self, mock_register):
+        timing.enable()
+        mock_register.assert_called_once_with(timing.print_report)
+
+        self.assertEqual([1, 2], list(timing.iterate(
+            itertools.islice(itertools.count(1), 2), 'request')))
+        with timing.phase('format'):
+            pass
+
+        stream = io.StringIO()
+        timing.print_report(stream)
+        report = stream.getvalue().splitlines()
+        self.assertEqual('Phase timing:', report[0])
+        self.assertEqual(['request', 'format', 'other', 'total'],
+                         [line.split()[0] for line in report[1:]])
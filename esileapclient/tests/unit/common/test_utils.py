@@ -1,4 +1,9 @@
+import argparse
 import unittest
+
+from esi.lease.v1 import lease as sdk_lease
+from osc_lib import exceptions
+
 from esileapclient.common import utils
 
 
@@ -89,3 +94,125 @@ class TestUtils(unittest.TestCase):
             self.assertTrue(any(
                 "Invalid property filter format: invalid_filter" in message
                 for message in c.output))
+
+    def test_get_resource_value(self):
+        node = {'uuid': 'fake-uuid', 'properties': {'cpus': '40'}}
+        self.assertEqual(utils.get_resource_value(node, 'uuid'), 'fake-uuid')
+        self.assertEqual(utils.get_resource_value(node, 'cpus'), '40')
+        self.assertIsNone(utils.get_resource_value(node, 'missing'))
+
+    def test_get_resource_value_sdk_resource(self):
+        lease = sdk_lease.Lease(resource='node1', resource_type='ironic_node',
+                                resource_properties={'cpus': '40'})
+        self.assertEqual(utils.get_resource_value(lease, 'resource'), 'node1')
+        self.assertEqual(utils.get_resource_value(lease, 'resource_type'),
+                         'ironic_node')
+        self.assertEqual(utils.get_resource_value(lease, 'cpus'), '40')
+
+    def test_select_fields(self):
+        fields = {'uuid': 'UUID', 'resource_class': 'Resource Class',
+                  'status': 'Status'}
+        self.assertEqual(utils.select_fields(fields, None), fields)
+        self.assertEqual(utils.select_fields(fields, ['Status', 'uuid']),
+                         {'uuid': 'UUID', 'status': 'Status'})
+        self.assertEqual(utils.select_fields(fields, ['resource_class']),
+                         {'resource_class': 'Resource Class'})
+        self.assertEqual(utils.select_fields(fields, ['missing']), fields)
+
+    def test_parse_sort_key(self):
+        self.assertEqual(utils.parse_sort_key('cpus'), ('cpus', False))
+        self.assertEqual(utils.parse_sort_key('cpus:asc'), ('cpus', False))
+        self.assertEqual(utils.parse_sort_key('cpus:desc'), ('cpus', True))
+        self.assertEqual(utils.parse_sort_key('a:b'), ('a:b', False))
+        self.assertRaises(ValueError, utils.parse_sort_key, ':desc')
+
+    def test_sort_resources(self):
+        nodes = self.nodes + [{'properties': {}}]
+
+        sorted_nodes = utils.sort_resources(nodes, 'cpus')
+        self.assertEqual(
+            [n['properties'].get('cpus') for n in sorted_nodes],
+            ['20', '40', '80', None])
+
+        # Values are compared as numbers, not strings
+        sorted_nodes = utils.sort_resources(nodes, 'memory_mb:desc')
+        self.assertEqual(
+            [n['properties'].get('memory_mb') for n in sorted_nodes],
+            ['262144', '131072', '65536', None])
+
+    def test_sort_resources_limit(self):
+        top_nodes = utils.sort_resources(iter(self.nodes), 'cpus:desc', 2)
+        self.assertEqual(
+            [n['properties']['cpus'] for n in top_nodes], ['80', '40'])
+
+        top_nodes = utils.sort_resources(iter(self.nodes), 'cpus', 1)
+        self.assertEqual(
+            [n['properties']['cpus'] for n in top_nodes], ['20'])
+
+        first_nodes = utils.sort_resources(iter(self.nodes), None, 2)
+        self.assertEqual(list(first_nodes), self.nodes[:2])
+
+        self.assertIs(utils.sort_resources(self.nodes), self.nodes)
+
+        for sort_key in (None, 'cpus'):
+            self.assertRaises(exceptions.CommandError, utils.sort_resources,
+                              self.nodes, sort_key, 0)
+
+    def test_positive_int(self):
+        self.assertEqual(utils.positive_int('3'), 3)
+        for value in ('0', '-1', 'x'):
+            self.assertRaises(argparse.ArgumentTypeError,
+                              utils.positive_int, value)
+
+    def test_positive_float(self):
+        self.assertEqual(utils.positive_float('0.5'), 0.5)
+        for value in ('0', '-1', 'nan', 'x'):
+            self.assertRaises(argparse.ArgumentTypeError,
+                              utils.positive_float, value)
+
+    def test_split_list_arguments(self):
+        self.assertEqual(utils.split_list_arguments(None), [])
+        self.assertEqual(utils.split_list_arguments('a, b'), ['a', 'b'])
+        self.assertEqual(utils.split_list_arguments(['a,b', 'c']),
+                         ['a', 'b', 'c'])
+
+    def test_aggregate_resources(self):
+        nodes = [
+            {'owner': 'p1', 'properties': {'cpus': '40', 'gpu': 'x'}},
+            {'owner': 'p2', 'properties': {'cpus': '80'}},
+            {'owner': 'p1', 'properties': {'cpus': '20'}},
+            {'owner': 'p2', 'properties': {}},
+        ]
+        columns, rows = utils.aggregate_resources(
+            iter(nodes), ['owner'], ['cpus', 'gpu'],
+            labels={'owner': 'Owner'})
+
+        self.assertEqual(columns, ['Owner', 'Count',
+                                   'Sum cpus', 'Min cpus', 'Max cpus',
+                                   'Sum gpu', 'Min gpu', 'Max gpu'])
+        self.assertEqual(rows, [('p1', 2, 60, 20, 40, '', '', ''),
+                                ('p2', 2, 80, 80, 80, '', '', '')])
+
+    def test_aggregate_resources_count_only(self):
+        columns, rows = utils.aggregate_resources(self.nodes, ['cpus'])
+        self.assertEqual(columns, ['cpus', 'Count'])
+        self.assertEqual(rows, [('20', 1), ('40', 1), ('80', 1)])
+
+    def test_iter_filter_nodes_by_properties(self):
+        consumed = []
+
+        def nodes():
+            for node in self.nodes:
+                consumed.append(node)
+                yield node
+
+        filtered_nodes = utils.iter_filter_nodes_by_properties(
+            nodes(), ['cpus>=40'])
+        self.assertEqual(consumed, [])
+        self.assertEqual(next(filtered_nodes), self.nodes[0])
+        self.assertEqual(consumed, self.nodes[:1])
+        self.assertEqual(list(filtered_nodes), self.nodes[1:2])
+
+        # Invalid filters are reported before any node is read
+        self.assertRaises(ValueError, utils.iter_filter_nodes_by_properties,
+                          nodes(), ['invalid_filter'])
@@ -0,0 +1,116 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from unittest import mock
+
+from osc_lib import exceptions
+import testtools
+
+from esileapclient.common import waiters
+
+
+class FakeLease(object):
+    def __init__(self, uuid, status):
+        self.uuid = uuid
+        self.status = status
+
+
+class FakeEvent(object):
+    def __init__(self, id, object_uuid):
+        self.id = id
+        self.object_uuid = object_uuid
+
+
+@mock.patch('esileapclient.common.waiters.time.sleep')
+class WaitForStatusTest(testtools.TestCase):
+
+    def setUp(self):
+        super(WaitForStatusTest, self).setUp()
+        self.client = mock.Mock()
+        self.client.events.return_value = []
+        self.statuses = {}
+        self.client.get_lease.side_effect = self._get_lease
+
+    def _get_lease(self, uuid):
+        status = self.statuses[uuid]
+        if isinstance(status, list):
+            status = status.pop(0) if len(status) > 1 else status[0]
+        return FakeLease(uuid, status)
+
+    def test_already_active(self, mock_sleep):
+        self.statuses = {'a': 'active', 'b': 'active'}
+
+        leases = waiters.wait_for_status(self.client, ['b', 'a'], 'active')
+
+        self.assertEqual(['b', 'a'], list(leases))
+        self.assertEqual('active', leases['a'].status)
+        mock_sleep.assert_not_called()
+        self.client.events.assert_not_called()
+
+    def test_polls_until_active(self, mock_sleep):
+        self.statuses = {'a': ['created', 'created', 'active']}
+
+        leases = waiters.wait_for_status(self.client, ['a'], 'active',
+                                         use_events=False)
+
+        self.assertEqual('active', leases['a'].status)
+        self.assertEqual(3, self.client.get_lease.call_count)
+        self.assertEqual(2, mock_sleep.call_count)
+        # Exponential backoff with jitter
+        first, second = [c[0][0] for c in mock_sleep.call_args_list]
+        self.assertTrue(1 <= first <= 2)
+        self.assertTrue(2 <= second <= 4)
+
+    def test_events_narrow_polling(self, mock_sleep):
+        self.statuses = {'a': ['created', 'active'],
+                         'b': ['created', 'active']}
+        self.client.events.side_effect = [
+            [FakeEvent(7, 'a')],
+            [FakeEvent(9, 'b')],
+        ]
+
+        leases = waiters.wait_for_status(self.client, ['a', 'b'], 'active')
+
+        self.assertEqual(['a', 'b'], list(leases))
+        self.assertEqual(
+            ['a', 'b', 'a', 'b'],
+            [c[0][0] for c in self.client.get_lease.call_args_list])
+        first, second = self.client.events.call_args_list
+        self.assertIn('last_event_time', first[1])
+        self.assertEqual({'last_event_id': 7}, second[1])
+
+    def test_events_failure_falls_back(self, mock_sleep):
+        self.statuses = {'a': ['created', 'active']}
+        self.client.events.side_effect = Exception('boom')
+
+        leases = waiters.wait_for_status(self.client, ['a'], 'active')
+
+        self.assertEqual('active', leases['a'].status)
+        self.assertEqual(2, self.client.get_lease.call_count)
+
+    def test_final_status(self, mock_sleep):
+        self.statuses = {'a': 'error'}
+
+        self.assertRaisesRegex(exceptions.CommandError, 'Lease a is error',
+                               waiters.wait_for_status,
+                               self.client, ['a'], 'active')
+
+    @mock.patch('esileapclient.common.waiters.time.monotonic')
+    def test_timeout(self, mock_monotonic, mock_sleep):
+        self.statuses = {'a': 'created'}
+        mock_monotonic.side_effect = [0, 5, 11]
+
+        self.assertRaisesRegex(exceptions.CommandError, 'Timed out',
+                               waiters.wait_for_status,
+                               self.client, ['a'], 'active', timeout=10,
+                               use_events=False)
+        self.assertEqual(2, self.client.get_lease.call_count)
@@ -10,10 +10,25 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import os
+
+import fixtures
 import mock
 
 from osc_lib.tests import utils
 
+from esileapclient.common import health
+
+
+class HealthCacheFixture(fixtures.Fixture):
+    """Keeps the health of fake clouds out of the user's cache."""
+
+    def _setUp(self):
+        self.path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                                 'health.json')
+        self.useFixture(fixtures.MockPatchObject(health, 'DEFAULT_PATH',
+                                                 self.path))
+
 
 class TestESILeapCommand(utils.TestCommand):
 
@@ -24,6 +39,14 @@ class TestESILeapCommand(utils.TestCommand):
         self.app.client_manager.lease = mock.Mock()
 
 
+class TestMDCCommand(TestESILeapCommand):
+
+    def setUp(self):
+        super(TestMDCCommand, self).setUp()
+
+        self.health_path = self.useFixture(HealthCacheFixture()).path
+
+
 class FakeResource(object):
     def __init__(self, info):
         self.__name__ = type(self).__name__
@@ -0,0 +1,139 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+
+from esi import connection
+
+from osc_lib import exceptions
+from osc_lib.tests import utils as osctestutils
+
+from esileapclient.common import cloud_config
+from esileapclient.osc.v1.mdc import mdc_event
+from esileapclient.tests.unit.osc.v1 import base
+from esileapclient.tests.unit.osc.v1 import fakes
+
+
+class FakeCloudRegion(object):
+    def __init__(self, name, region):
+        self.name = name
+        self.config = {'region_name': region}
+
+    def get_session(self):
+        return None
+
+
+def fake_event(event_id, event_time):
+    return base.FakeResource(dict(fakes.EVENT, id=event_id,
+                                  event_time=event_time))
+
+
+class TestMDCEventList(base.TestMDCCommand):
+
+    def setUp(self):
+        super(TestMDCEventList, self).setUp()
+
+        self.cloud1 = FakeCloudRegion('cloud1', 'regionOne')
+        self.cloud2 = FakeCloudRegion('cloud2', 'regionTwo')
+        self.clients = {'cloud1': mock.Mock(), 'cloud2': mock.Mock()}
+        self.clients['cloud1'].events.return_value = iter([
+            fake_event(11, '2024-01-01T00:00:01'),
+            fake_event(12, '2024-01-01T00:00:04'),
+            fake_event(13, '2024-01-01T00:00:05'),
+        ])
+        self.clients['cloud2'].events.return_value = iter([
+            fake_event(21, '2024-01-01T00:00:02'),
+            fake_event(22, '2024-01-01T00:00:03'),
+            fake_event(23, '2024-01-01T00:00:06'),
+        ])
+        self.cmd = mdc_event.MDCListEvent(self.app, None)
+
+    def _run(self, arglist, mock_conn, mock_clouds):
+        mock_clouds.return_value = [self.cloud1, self.cloud2]
+        mock_conn.side_effect = lambda config: mock.Mock(
+            lease=self.clients[config.name])
+        parsed_args = self.check_parser(self.cmd, arglist, [])
+        return self.cmd.take_action(parsed_args)
+
+    @mock.patch.object(cloud_config, 'get_cloud_regions')
+    @mock.patch.object(connection, 'ESIConnection')
+    def test_mdc_event_list(self, mock_conn, mock_clouds):
+        columns, data = self._run([], mock_conn, mock_clouds)
+        data = tuple(data)
+
+        self.assertEqual(['Cloud', 'Region', 'ID', 'Event Type',
+                          'Event Time', 'Object Type', 'Object UUID',
+                          'Resource Type', 'Resource UUID', 'Lessee ID',
+                          'Owner ID'], list(columns))
+        self.assertEqual([('cloud1', 11), ('cloud2', 21), ('cloud2', 22),
+                          ('cloud1', 12), ('cloud1', 13), ('cloud2', 23)],
+                         [(row[0], row[2]) for row in data])
+        self.assertEqual(('cloud1', 'regionOne', 11, fakes.event_type,
+                          '2024-01-01T00:00:01', fakes.object_type,
+                          fakes.lease_uuid, fakes.lease_resource_type,
+                          fakes.lease_resource_uuid,
+                          fakes.lease_project_id, fakes.lease_owner_id),
+                         data[0])
+
+        for client in self.clients.values():
+            client.events.assert_called_once_with(
+                last_event_id=None, lessee_or_owner_id=None,
+                last_event_time=None, event_type=None, resource_type=None,
+                resource_uuid=None)
+
+    @mock.patch.object(cloud_config, 'get_cloud_regions')
+    @mock.patch.object(connection, 'ESIConnection')
+    def test_mdc_event_list_last_event_ids(self, mock_conn, mock_clouds):
+        columns, data = self._run(['--last-event-id', 'cloud2=21',
+                                   '--last-event-id', '5',
+                                   '--event-type', 'lease.create'],
+                                  mock_conn, mock_clouds)
+        list(data)
+
+        self.clients['cloud1'].events.assert_called_once_with(
+            last_event_id='5', lessee_or_owner_id=None,
+            last_event_time=None, event_type='lease.create',
+            resource_type=None, resource_uuid=None)
+        self.clients['cloud2'].events.assert_called_once_with(
+            last_event_id='21', lessee_or_owner_id=None,
+            last_event_time=None, event_type='lease.create',
+            resource_type=None, resource_uuid=None)
+
+    @mock.patch.object(cloud_config, 'get_cloud_regions')
+    @mock.patch.object(connection, 'ESIConnection')
+    def test_mdc_event_list_invalid_last_event_id(self, mock_conn,
+                                                  mock_clouds):
+        self.assertRaisesRegex(exceptions.CommandError,
+                               'Invalid --last-event-id',
+                               self._run, ['--last-event-id', 'cloud1='],
+                               mock_conn, mock_clouds)
+
+    @mock.patch.object(cloud_config, 'get_cloud_regions')
+    @mock.patch.object(connection, 'ESIConnection')
+    def test_mdc_event_list_failing_cloud(self, mock_conn, mock_clouds):
+        def failing_events():
+            yield fake_event(11, '2024-01-01T00:00:01')
+            raise ConnectionError('connection reset')
+
+        self.clients['cloud1'].events.return_value = failing_events()
+
+        columns, data = self._run([], mock_conn, mock_clouds)
+
+        self.assertEqual([('cloud1', 11), ('cloud2', 21), ('cloud2', 22),
+                          ('cloud2', 23)],
+                         [(row[0], row[2]) for row in data])
+
+    def test_mdc_event_list_invalid_prefetch(self):
+        for value in ('0', '-1'):
+            self.assertRaises(osctestutils.ParserException,
+                              self.check_parser, self.cmd,
+                              ['--prefetch', value], [])
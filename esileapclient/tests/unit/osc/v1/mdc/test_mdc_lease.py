@@ -14,13 +14,16 @@ import copy
 import mock
 
 from esi import connection
+from openstack import exceptions as sdk_exceptions
 
+from esileapclient.common import cloud_config
+from esileapclient.common import health
 from esileapclient.osc.v1.mdc import mdc_lease
 from esileapclient.tests.unit.osc.v1 import base
 from esileapclient.tests.unit.osc.v1 import fakes
 
 
-class TestMDCLease(base.TestESILeapCommand):
+class TestMDCLease(base.TestMDCCommand):
 
     def setUp(self):
         super(TestMDCLease, self).setUp()
@@ -47,7 +50,7 @@ class TestMDCLeaseList(TestMDCLease):
         self.lease2 = base.FakeResource(copy.deepcopy(fakes.LEASE))
         self.cmd = mdc_lease.MDCListLease(self.app, None)
 
-    @mock.patch('openstack.config.loader.OpenStackConfig.get_all_clouds')
+    @mock.patch.object(cloud_config, 'get_cloud_regions')
     @mock.patch.object(connection, 'ESIConnection')
     def test_mdc_lease_list(self, mock_conn, mock_clouds):
         mock_clouds.return_value = [self.cloud1, self.cloud2]
@@ -113,10 +116,10 @@ class TestMDCLeaseList(TestMDCLease):
                      ))
         self.assertEqual(datalist, tuple(data))
 
-    @mock.patch('openstack.config.loader.OpenStackConfig.get_all_clouds')
+    @mock.patch.object(cloud_config, 'get_cloud_regions')
     @mock.patch.object(connection, 'ESIConnection')
     def test_mdc_lease_list_filter(self, mock_conn, mock_clouds):
-        mock_clouds.return_value = [self.cloud1, self.cloud2]
+        mock_clouds.return_value = [self.cloud2]
         mock_conn.return_value.lease = self.client_mock
         self.client_mock.leases.return_value = [self.lease2]
 
@@ -125,6 +128,7 @@ class TestMDCLeaseList(TestMDCLease):
 
         parsed_args = self.check_parser(self.cmd, arglist, verifylist)
         columns, data = self.cmd.take_action(parsed_args)
+        mock_clouds.assert_called_once_with(['cloud2'])
 
         filters = {
             'status': parsed_args.status,
@@ -167,3 +171,26 @@ class TestMDCLeaseList(TestMDCLease):
                      fakes.lease_purpose,
                      ),)
         self.assertEqual(datalist, tuple(data))
+
+    @mock.patch.object(cloud_config, 'get_cloud_regions')
+    @mock.patch.object(connection, 'ESIConnection')
+    def test_mdc_lease_list_client_error(self, mock_conn, mock_clouds):
+        mock_clouds.return_value = [self.cloud1, self.cloud2]
+        mock_conn.return_value.lease = self.client_mock
+
+        def rejected_leases(**filters):
+            raise sdk_exceptions.HttpException('Invalid time range',
+                                               http_status=400)
+            yield
+
+        self.client_mock.leases.side_effect = rejected_leases
+
+        parsed_args = self.check_parser(self.cmd, [], [])
+        columns, data = self.cmd.take_action(parsed_args)
+
+        # The error is the user's, so it fails the command and does not
+        # count against the health of the cloud
+        self.assertRaisesRegex(sdk_exceptions.HttpException,
+                               'Invalid time range', list, data)
+        cache = health.HealthCache()
+        self.assertEqual(0.0, cache.failure_rate('cloud1:regionOne'))
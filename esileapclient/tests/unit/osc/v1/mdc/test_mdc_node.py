@@ -0,0 +1,119 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+
+from esi import connection
+from osc_lib.tests import utils as osctestutils
+
+from esileapclient.common import cloud_config
+from esileapclient.osc.v1.mdc import mdc_node
+from esileapclient.tests.unit.osc.v1 import base
+from esileapclient.tests.unit.osc.v1 import fakes
+
+
+class FakeCloudRegion(object):
+    def __init__(self, name, region):
+        self.name = name
+        self.config = {'region_name': region}
+
+    def get_session(self):
+        return None
+
+
+class FakeNode(dict):
+    """A node with both item and attribute access, like SDK resources."""
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+
+def fake_node(name, cpus):
+    return FakeNode(fakes.NODE, name=name,
+                    properties=dict(fakes.node_properties, cpus=cpus))
+
+
+class TestMDCNodeList(base.TestMDCCommand):
+
+    def setUp(self):
+        super(TestMDCNodeList, self).setUp()
+
+        self.cloud1 = FakeCloudRegion('cloud1', 'regionOne')
+        self.cloud2 = FakeCloudRegion('cloud2', 'regionTwo')
+        self.clients = {'cloud1': mock.Mock(), 'cloud2': mock.Mock()}
+        self.clients['cloud1'].nodes.return_value = iter([
+            fake_node('node1', '16'), fake_node('node2', '64')])
+        self.clients['cloud2'].nodes.return_value = iter([
+            fake_node('node3', '32'), fake_node('node4', '8')])
+        self.cmd = mdc_node.MDCListNode(self.app, None)
+
+    def _run(self, arglist, mock_conn, mock_clouds, clouds=None):
+        mock_clouds.return_value = clouds or [self.cloud1, self.cloud2]
+        mock_conn.side_effect = lambda config: mock.Mock(
+            lease=self.clients[config.name])
+        parsed_args = self.check_parser(self.cmd, arglist, [])
+        return self.cmd.take_action(parsed_args)
+
+    @mock.patch.object(cloud_config, 'get_cloud_regions')
+    @mock.patch.object(connection, 'ESIConnection')
+    def test_mdc_node_list(self, mock_conn, mock_clouds):
+        columns, data = self._run(['--owner', fakes.node_owner],
+                                  mock_conn, mock_clouds)
+
+        self.assertEqual(['Cloud', 'Region', 'Name', 'Owner', 'Lessee',
+                          'Resource Class', 'Provision State',
+                          'Maintenance', 'Offer UUID', 'Lease UUID'],
+                         list(columns))
+        self.assertEqual(
+            (('cloud1', 'regionOne', 'node1', fakes.node_owner, '',
+              fakes.lease_resource_class, '', '', '', ''),
+             ('cloud1', 'regionOne', 'node2', fakes.node_owner, '',
+              fakes.lease_resource_class, '', '', '', ''),
+             ('cloud2', 'regionTwo', 'node3', fakes.node_owner, '',
+              fakes.lease_resource_class, '', '', '', ''),
+             ('cloud2', 'regionTwo', 'node4', fakes.node_owner, '',
+              fakes.lease_resource_class, '', '', '', '')),
+            tuple(data))
+        for client in self.clients.values():
+            client.nodes.assert_called_once_with(
+                resource_class=None, owner=fakes.node_owner, lessee=None)
+
+    @mock.patch.object(cloud_config, 'get_cloud_regions')
+    @mock.patch.object(connection, 'ESIConnection')
+    def test_mdc_node_list_property_filter(self, mock_conn, mock_clouds):
+        columns, data = self._run(['--property', 'cpus>=32',
+                                   '-c', 'Cloud', '-c', 'Name'],
+                                  mock_conn, mock_clouds)
+
+        self.assertEqual(['Cloud', 'Name'], list(columns))
+        self.assertEqual((('cloud1', 'node2'), ('cloud2', 'node3')),
+                         tuple(data))
+
+    @mock.patch.object(cloud_config, 'get_cloud_regions')
+    @mock.patch.object(connection, 'ESIConnection')
+    def test_mdc_node_list_long(self, mock_conn, mock_clouds):
+        columns, data = self._run(['--long', '--clouds', 'cloud2'],
+                                  mock_conn, mock_clouds, [self.cloud2])
+
+        self.assertEqual(['Cloud', 'Region', 'UUID', 'Name'],
+                         list(columns)[:4])
+        self.assertEqual(['node3', 'node4'], [row[3] for row in data])
+        mock_clouds.assert_called_once_with(['cloud2'])
+
+    def test_mdc_node_list_invalid_prefetch(self):
+        for value in ('0', '-1'):
+            self.assertRaises(osctestutils.ParserException,
+                              self.check_parser, self.cmd,
+                              ['--prefetch', value], [])
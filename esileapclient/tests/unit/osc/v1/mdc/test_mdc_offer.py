@@ -13,17 +13,20 @@
 import copy
 import json
 import mock
+import threading
 
 from esi import connection
 
 from osc_lib import exceptions
 
+from esileapclient.common import cloud_config
+from esileapclient.common import health
 from esileapclient.osc.v1.mdc import mdc_offer
 from esileapclient.tests.unit.osc.v1 import base
 from esileapclient.tests.unit.osc.v1 import fakes
 
 
-class TestMDCOffer(base.TestESILeapCommand):
+class TestMDCOffer(base.TestMDCCommand):
 
     def setUp(self):
         super(TestMDCOffer, self).setUp()
@@ -50,7 +53,7 @@ class TestMDCOfferList(TestMDCOffer):
         self.offer2 = base.FakeResource(copy.deepcopy(fakes.OFFER))
         self.cmd = mdc_offer.MDCListOffer(self.app, None)
 
-    @mock.patch('openstack.config.loader.OpenStackConfig.get_all_clouds')
+    @mock.patch.object(cloud_config, 'get_cloud_regions')
     @mock.patch.object(connection, 'ESIConnection')
     def test_mdc_offer_list(self, mock_conn, mock_clouds):
         mock_clouds.return_value = [self.cloud1, self.cloud2]
@@ -117,10 +120,81 @@ class TestMDCOfferList(TestMDCOffer):
                      ))
         self.assertEqual(datalist, tuple(data))
 
-    @mock.patch('openstack.config.loader.OpenStackConfig.get_all_clouds')
+    @mock.patch.object(cloud_config, 'get_cloud_regions')
     @mock.patch.object(connection, 'ESIConnection')
-    def test_mdc_offer_list_filter(self, mock_conn, mock_clouds):
+    def test_mdc_offer_list_unhealthy_cloud(self, mock_conn, mock_clouds):
+        mock_clouds.return_value = [self.cloud1, self.cloud2]
+        mock_conn.return_value.lease = self.client_mock
+
+        def failing_offers(**filters):
+            raise ConnectionError('connection refused')
+            yield
+
+        cache = health.HealthCache()
+        for _ in range(health.FAILURE_THRESHOLD - 1):
+            cache.record_failure('cloud1:regionOne')
+        cache.save()
+
+        # cloud1 has failed before, so it is queried last; its failure is
+        # logged and the results of cloud2 are still listed
+        self.client_mock.offers.side_effect = [[self.offer2],
+                                               failing_offers()]
+        parsed_args = self.check_parser(self.cmd, [], [])
+        columns, data = self.cmd.take_action(parsed_args)
+        self.assertEqual(['cloud2'], [row[0] for row in data])
+
+        # Its circuit is now open, so it is not queried at all, and the
+        # command fails after listing the offers of cloud2
+        self.client_mock.offers.reset_mock()
+        self.client_mock.offers.side_effect = [[self.offer2]]
+        self.assertEqual(1, self.cmd.run(parsed_args))
+        self.assertEqual(1, self.client_mock.offers.call_count)
+
+        # Unless asked to
+        self.client_mock.offers.reset_mock()
+        self.client_mock.offers.side_effect = [[self.offer2],
+                                               [self.offer1]]
+        parsed_args = self.check_parser(self.cmd, ['--ignore-health'],
+                                        [('ignore_health', True)])
+        columns, data = self.cmd.take_action(parsed_args)
+        self.assertEqual(['cloud2', 'cloud1'], [row[0] for row in data])
+
+    @mock.patch.object(cloud_config, 'get_cloud_regions')
+    @mock.patch.object(connection, 'ESIConnection')
+    def test_mdc_offer_list_hedge(self, mock_conn, mock_clouds):
         mock_clouds.return_value = [self.cloud1, self.cloud2]
+        clients = {'cloud1': mock.Mock(), 'cloud2': mock.Mock()}
+        mock_conn.side_effect = lambda config: mock.Mock(
+            lease=clients[config.name])
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def slow_offers(**filters):
+            release.wait(5)
+            yield self.offer1
+
+        cache = health.HealthCache()
+        cache.record_success('cloud1:regionOne', 0.01)
+        cache.save()
+
+        # The first request to cloud1 hangs past its usual latency, so a
+        # second one is sent and answers first
+        clients['cloud1'].offers.side_effect = [slow_offers(),
+                                                [self.offer1]]
+        clients['cloud2'].offers.return_value = [self.offer2]
+
+        parsed_args = self.check_parser(self.cmd, ['--hedge'],
+                                        [('hedge', True)])
+        columns, data = self.cmd.take_action(parsed_args)
+
+        self.assertEqual(2, clients['cloud1'].offers.call_count)
+        self.assertEqual(1, clients['cloud2'].offers.call_count)
+        self.assertEqual(['cloud2', 'cloud1'], [row[0] for row in data])
+
+    @mock.patch.object(cloud_config, 'get_cloud_regions')
+    @mock.patch.object(connection, 'ESIConnection')
+    def test_mdc_offer_list_filter(self, mock_conn, mock_clouds):
+        mock_clouds.return_value = [self.cloud2]
         mock_conn.return_value.lease = self.client_mock
         self.client_mock.offers.return_value = [self.offer2]
 
@@ -129,6 +203,7 @@ class TestMDCOfferList(TestMDCOffer):
 
         parsed_args = self.check_parser(self.cmd, arglist, verifylist)
         columns, data = self.cmd.take_action(parsed_args)
+        mock_clouds.assert_called_once_with(['cloud2'])
 
         filters = {
             'status': parsed_args.status,
@@ -196,7 +271,7 @@ class TestMDCOfferClaim(TestMDCOffer):
         self.lease3 = base.FakeResource(copy.deepcopy(fakes.LEASE))
         self.cmd = mdc_offer.MDCClaimOffer(self.app, None)
 
-    @mock.patch('openstack.config.loader.OpenStackConfig.get_all_clouds')
+    @mock.patch.object(cloud_config, 'get_cloud_regions')
     @mock.patch.object(connection, 'ESIConnection')
     def test_mdc_offer_claim(self, mock_conn, mock_clouds):
         mock_clouds.return_value = [self.cloud1, self.cloud2]
@@ -271,10 +346,10 @@ class TestMDCOfferClaim(TestMDCOffer):
         self.assertEqual(2, parsed_data.count(cloud1_lease))
         self.assertEqual(1, parsed_data.count(cloud2_lease))
 
-    @mock.patch('openstack.config.loader.OpenStackConfig.get_all_clouds')
+    @mock.patch.object(cloud_config, 'get_cloud_regions')
     @mock.patch.object(connection, 'ESIConnection')
     def test_mdc_offer_claim_filter(self, mock_conn, mock_clouds):
-        mock_clouds.return_value = [self.cloud1, self.cloud2]
+        mock_clouds.return_value = [self.cloud1]
         mock_conn.return_value.lease = self.client_mock
         self.client_mock.offers.return_value = [self.offer1, self.offer2]
         self.client_mock.claim_offer.side_effect = [self.lease1, self.lease2]
@@ -285,6 +360,7 @@ class TestMDCOfferClaim(TestMDCOffer):
 
         parsed_args = self.check_parser(self.cmd, arglist, verifylist)
         columns, data = self.cmd.take_action(parsed_args)
+        mock_clouds.assert_called_once_with(['cloud1'])
 
         list_filters = {
             'status': 'available',
@@ -332,7 +408,7 @@ class TestMDCOfferClaim(TestMDCOffer):
         self.assertEqual(2, len(parsed_data))
         self.assertEqual(2, parsed_data.count(cloud1_lease))
 
-    @mock.patch('openstack.config.loader.OpenStackConfig.get_all_clouds')
+    @mock.patch.object(cloud_config, 'get_cloud_regions')
     @mock.patch.object(connection, 'ESIConnection')
     def test_mdc_offer_claim_not_enough_offers(self, mock_conn, mock_clouds):
         mock_clouds.return_value = [self.cloud1, self.cloud2]
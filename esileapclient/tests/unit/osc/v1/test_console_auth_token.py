@@ -12,6 +12,8 @@
 
 import copy
 
+from osc_lib import exceptions
+
 from esileapclient.osc.v1 import console_auth_token
 from esileapclient.tests.unit.osc.v1 import base
 from esileapclient.tests.unit.osc.v1 import fakes
@@ -68,3 +70,76 @@ class TestConsoleAuthTokenDelete(TestConsoleAuthToken):
 
         self.client_mock.delete_console_auth_token.assert_called_once_with(
             fakes.node_uuid)
+
+
+class TestConsoleAuthTokenBulkCreate(TestConsoleAuthToken):
+    def setUp(self):
+        super(TestConsoleAuthTokenBulkCreate, self).setUp()
+
+        def create(node_uuid_or_name):
+            if node_uuid_or_name == 'broken':
+                raise Exception('Console is disabled')
+            return base.FakeResource({
+                'node_uuid': node_uuid_or_name,
+                'token': 'token-%s' % node_uuid_or_name,
+                'access_url': 'ws://console/%s' % node_uuid_or_name,
+            })
+
+        self.client_mock.create_console_auth_token.side_effect = create
+        self.client_mock.nodes.return_value = [
+            dict(fakes.NODE, uuid='n2'),
+            dict(fakes.NODE, uuid='n3', properties={'cpus': '8'}),
+            copy.deepcopy(fakes.NODE),
+        ]
+
+        self.cmd = console_auth_token.BulkCreateConsoleAuthToken(
+            self.app, None)
+
+    def test_console_auth_token_bulk_create(self):
+        arglist = [fakes.node_uuid, 'broken', '--owner', fakes.node_owner,
+                   '--property', 'cpus>=40', '--concurrency', '2']
+        verifylist = [('nodes', [fakes.node_uuid, 'broken']),
+                      ('owner', fakes.node_owner),
+                      ('concurrency', 2)]
+
+        parsed_args = self.check_parser(self.cmd, arglist, verifylist)
+        columns, data = self.cmd.take_action(parsed_args)
+
+        self.client_mock.nodes.assert_called_once_with(
+            resource_class=None, owner=fakes.node_owner, lessee=None)
+        self.assertEqual(['Node UUID', 'Token', 'Access URL', 'Error'],
+                         columns)
+        self.assertEqual(
+            [(fakes.node_uuid, 'token-%s' % fakes.node_uuid,
+              'ws://console/%s' % fakes.node_uuid, ''),
+             ('broken', '', '', 'Console is disabled'),
+             ('n2', 'token-n2', 'ws://console/n2', '')],
+            list(data))
+
+    def test_console_auth_token_bulk_create_no_nodes(self):
+        parsed_args = self.check_parser(self.cmd, [], [])
+        self.assertRaises(exceptions.CommandError,
+                          self.cmd.take_action, parsed_args)
+
+
+class TestConsoleAuthTokenBulkDelete(TestConsoleAuthToken):
+    def setUp(self):
+        super(TestConsoleAuthTokenBulkDelete, self).setUp()
+
+        self.client_mock.delete_console_auth_token.side_effect = [
+            None, Exception('Node not found')]
+
+        self.cmd = console_auth_token.BulkDeleteConsoleAuthToken(
+            self.app, None)
+
+    def test_console_auth_token_bulk_delete(self):
+        arglist = [fakes.node_uuid, 'missing', '--concurrency', '1']
+        verifylist = [('nodes', [fakes.node_uuid, 'missing'])]
+
+        parsed_args = self.check_parser(self.cmd, arglist, verifylist)
+        columns, data = self.cmd.take_action(parsed_args)
+
+        self.assertEqual(['Node', 'Error'], columns)
+        self.assertEqual([(fakes.node_uuid, ''),
+                          ('missing', 'Node not found')], list(data))
+        self.client_mock.nodes.assert_not_called()
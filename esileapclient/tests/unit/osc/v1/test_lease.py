@@ -12,6 +12,10 @@
 
 import copy
 import json
+import os
+
+import fixtures
+from osc_lib import exceptions
 from osc_lib.tests import utils as osctestutils
 from unittest import mock
 
@@ -82,6 +86,30 @@ class TestCreateLease(TestLease):
 
         self.client_mock.create_lease.assert_called_once_with(**args)
 
+    @mock.patch('esileapclient.common.waiters.wait_for_status',
+                autospec=True)
+    def test_lease_create_wait(self, mock_wait):
+        active = base.FakeResource(dict(fakes.LEASE, status='active'))
+        mock_wait.return_value = {fakes.lease_uuid: active}
+
+        arglist = [
+            fakes.lease_resource_uuid,
+            fakes.lease_project_id,
+            '--wait',
+            '--timeout', '30',
+        ]
+        verifylist = [
+            ('wait', True),
+            ('timeout', 30),
+        ]
+
+        parsed_args = self.check_parser(self.cmd, arglist, verifylist)
+        columns, data = self.cmd.take_action(parsed_args)
+
+        mock_wait.assert_called_once_with(
+            self.client_mock, [fakes.lease_uuid], 'active', timeout=30)
+        self.assertEqual('active', dict(zip(columns, data))['status'])
+
 
 class TestUpdateLease(TestLease):
 
@@ -182,7 +210,8 @@ class TestLeaseList(TestLease):
                      ),)
         self.assertEqual(datalist, tuple(data))
 
-    @mock.patch('esileapclient.common.utils.filter_nodes_by_properties')
+    @mock.patch(
+        'esileapclient.common.utils.iter_filter_nodes_by_properties')
     def test_lease_list_with_property_filter(self, mock_filter_nodes):
         arglist = ['--property', 'cpus>=40']
         verifylist = [('properties', ['cpus>=40'])]
@@ -209,6 +238,58 @@ class TestLeaseList(TestLease):
         self.client_mock.leases.assert_called_with(**filters)
         mock_filter_nodes.assert_called_with(mock.ANY, parsed_args.properties)
 
+    def _sweep(self, arglist):
+        def leases(project_id=None, owner_id=None, **filters):
+            # p1 and p2 hold different leases; 'p1-name' is p1 by name
+            uuid = {'p1': 'lease-1', 'p1-name': 'lease-1',
+                    'p2': 'lease-2'}[project_id]
+            return [base.FakeResource(dict(fakes.LEASE, uuid=uuid,
+                                           project_id=project_id))]
+
+        self.client_mock.leases.side_effect = leases
+        parsed_args = self.check_parser(self.cmd, arglist, [])
+        return self.cmd.take_action(parsed_args)
+
+    def test_lease_list_projects(self):
+        columns, data = self._sweep(['--projects', 'p1,p2',
+                                     '--projects', 'p1-name',
+                                     '-c', 'Project Query', '-c', 'UUID'])
+
+        self.assertEqual(['Project Query', 'UUID'], list(columns))
+        self.assertEqual((('p1', 'lease-1'), ('p2', 'lease-2')),
+                         tuple(data))
+        self.assertEqual(
+            {('p1', None), ('p2', None), ('p1-name', None)},
+            {(c.kwargs['project_id'], c.kwargs['owner_id'])
+             for c in self.client_mock.leases.call_args_list})
+
+    def test_lease_list_projects_and_owners(self):
+        columns, data = self._sweep(['--projects', 'p2',
+                                     '--project', 'p1',
+                                     '--owners', 'o1,o2',
+                                     '-c', 'Project Query',
+                                     '-c', 'Owner Query', '-c', 'UUID'])
+
+        self.assertEqual(['Project Query', 'Owner Query', 'UUID'],
+                         list(columns))
+        self.assertEqual((('p2', 'o1', 'lease-2'), ('p1', 'o1', 'lease-1')),
+                         tuple(data))
+        self.assertEqual(
+            {('p1', 'o1'), ('p1', 'o2'), ('p2', 'o1'), ('p2', 'o2')},
+            {(c.kwargs['project_id'], c.kwargs['owner_id'])
+             for c in self.client_mock.leases.call_args_list})
+
+    def test_lease_list_columns(self):
+        arglist = ['-c', 'UUID', '-c', 'resource_class', '-c', 'Status']
+        verifylist = [('columns', ['UUID', 'resource_class', 'Status'])]
+
+        parsed_args = self.check_parser(self.cmd, arglist, verifylist)
+        columns, data = self.cmd.take_action(parsed_args)
+
+        self.assertEqual(['UUID', 'Resource Class', 'Status'], list(columns))
+        self.assertEqual(((fakes.lease_uuid, fakes.lease_resource_class,
+                           fakes.lease_status),), tuple(data))
+
     def test_lease_list_long(self):
         arglist = ['--long']
         verifylist = [('long', True)]
@@ -270,7 +351,8 @@ class TestLeaseList(TestLease):
                      ),)
         self.assertEqual(datalist, tuple(data))
 
-    @mock.patch('esileapclient.common.utils.filter_nodes_by_properties')
+    @mock.patch(
+        'esileapclient.common.utils.iter_filter_nodes_by_properties')
     def test_lease_list_long_with_property_filter(self, mock_filter_nodes):
         arglist = ['--long', '--property', 'memory_mb<=262144']
         verifylist = [('long', True), ('properties', ['memory_mb<=262144'])]
@@ -365,6 +447,17 @@ class TestLeaseShow(TestLease):
                     )
         self.assertEqual(datalist, tuple(data))
 
+    def test_lease_show_columns(self):
+        arglist = [fakes.lease_uuid, '-c', 'status', '-c', 'uuid']
+        verifylist = [('uuid', fakes.lease_uuid),
+                      ('columns', ['status', 'uuid'])]
+
+        parsed_args = self.check_parser(self.cmd, arglist, verifylist)
+        columns, data = self.cmd.take_action(parsed_args)
+
+        self.assertEqual(('status', 'uuid'), columns)
+        self.assertEqual((fakes.lease_status, fakes.lease_uuid), data)
+
     def test_lease_show_no_id(self):
         arglist = []
         verifylist = []
@@ -395,3 +488,176 @@ class TestLeaseDelete(TestLease):
         self.assertRaises(osctestutils.ParserException,
                           self.check_parser,
                           self.cmd, arglist, verifylist)
+
+
+class TestLeaseBulkShow(TestLease):
+    def setUp(self):
+        super(TestLeaseBulkShow, self).setUp()
+
+        def get_lease(uuid):
+            if uuid == 'missing':
+                raise Exception('No Lease found for missing')
+            return base.FakeResource(dict(fakes.LEASE, uuid=uuid))
+
+        self.client_mock.get_lease.side_effect = get_lease
+
+        self.cmd = lease.BulkShowLease(self.app, None)
+
+    def test_lease_bulk_show(self):
+        arglist = [fakes.lease_uuid, 'missing', 'other', '--concurrency', '2',
+                   '-c', 'uuid', '-c', 'status', '-c', 'error']
+        verifylist = [('uuids', [fakes.lease_uuid, 'missing', 'other']),
+                      ('concurrency', 2)]
+
+        parsed_args = self.check_parser(self.cmd, arglist, verifylist)
+        columns, data = self.cmd.take_action(parsed_args)
+
+        self.assertEqual(['Status', 'UUID', 'Error'], list(columns))
+        self.assertEqual(
+            [(fakes.lease_status, fakes.lease_uuid, ''),
+             ('', 'missing', 'No Lease found for missing'),
+             (fakes.lease_status, 'other', '')],
+            list(data))
+        self.assertEqual(
+            [mock.call(fakes.lease_uuid), mock.call('missing'),
+             mock.call('other')],
+            self.client_mock.get_lease.call_args_list)
+
+    def test_lease_bulk_show_no_id(self):
+        self.assertRaises(osctestutils.ParserException,
+                          self.check_parser, self.cmd, [], [])
+
+
+class TestLeaseDiff(TestLease):
+    def setUp(self):
+        super(TestLeaseDiff, self).setUp()
+
+        self.dir = self.useFixture(fixtures.TempDir()).path
+        self.cmd = lease.DiffLease(self.app, None)
+
+    def _write(self, name, content):
+        path = os.path.join(self.dir, name)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def test_lease_diff_snapshots(self):
+        old = self._write('old.json', json.dumps([
+            {'UUID': 'a', 'Status': 'active', 'End Time': 't1'},
+            {'UUID': 'b', 'Status': 'active'},
+        ]))
+        new = self._write('new.ndjson',
+                          '{"UUID": "a", "Status": "expired"}\n'
+                          '{"UUID": "c", "Status": "created"}\n')
+        arglist = [old, new]
+        verifylist = [('snapshot', old), ('other', new), ('live', False)]
+
+        parsed_args = self.check_parser(self.cmd, arglist, verifylist)
+        columns, data = self.cmd.take_action(parsed_args)
+
+        self.assertEqual(('Change', 'UUID', 'Field', 'Old Value',
+                          'New Value'), columns)
+        self.assertEqual(
+            [('changed', 'a', 'status', 'active', 'expired'),
+             ('added', 'c', '', '', ''),
+             ('removed', 'b', '', '', '')],
+            list(data))
+        self.client_mock.leases.assert_not_called()
+
+    def test_lease_diff_live(self):
+        old = self._write('old.json', json.dumps(
+            [dict(fakes.LEASE, status='created')]))
+        self.client_mock.leases.return_value = iter(
+            [base.FakeResource(copy.deepcopy(fakes.LEASE))])
+        arglist = [old, '--live'] + ['--all']
+        verifylist = [('live', True), ('all', True)]
+
+        parsed_args = self.check_parser(self.cmd, arglist, verifylist)
+        columns, data = self.cmd.take_action(parsed_args)
+
+        self.assertEqual(
+            [('changed', fakes.LEASE['uuid'], 'status', 'created',
+              fakes.LEASE['status'])],
+            list(data))
+        self.client_mock.leases.assert_called_once_with(
+            status='any', view='all')
+
+    def test_lease_diff_other_or_live(self):
+        old = self._write('old.json', '[]')
+        for arglist in ([old], [old, old, '--live']):
+            parsed_args = self.check_parser(self.cmd, arglist, [])
+            self.assertRaisesRegex(exceptions.CommandError,
+                                   'second snapshot or --live',
+                                   self.cmd.take_action, parsed_args)
+
+
+class TestLeasePlanApply(TestLease):
+    def setUp(self):
+        super(TestLeasePlanApply, self).setUp()
+
+        self.path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                                 'desired.yaml')
+        with open(self.path, 'w') as f:
+            f.write('leases:\n'
+                    '- name: %s\n'
+                    '  resource_uuid: %s\n'
+                    '  project_id: %s\n'
+                    '  end_time: "2100-01-01T00:00:00"\n'
+                    '- name: new\n'
+                    '  resource_uuid: node2\n'
+                    '  project_id: %s\n' %
+                    (fakes.lease_name, fakes.lease_resource_uuid,
+                     fakes.lease_project_id, fakes.lease_project_id))
+
+        self.client_mock.leases.return_value = iter([
+            base.FakeResource(copy.deepcopy(fakes.LEASE)),
+            base.FakeResource(dict(fakes.LEASE, uuid='other',
+                                   name='unwanted')),
+        ])
+
+    def test_lease_plan(self):
+        cmd = lease.PlanLease(self.app, None)
+        arglist = [self.path, '--prune']
+        verifylist = [('file', self.path), ('prune', True), ('all', False)]
+
+        parsed_args = self.check_parser(cmd, arglist, verifylist)
+        columns, data = cmd.take_action(parsed_args)
+
+        self.assertEqual(('Action', 'Name', 'UUID', 'Changes'), columns)
+        self.assertEqual(
+            [('delete', 'unwanted', 'other', ''),
+             ('create', 'new', '', ''),
+             ('update', fakes.lease_name, fakes.lease_uuid,
+              'end_time: %s -> 2100-01-01T00:00:00' % fakes.lease_end_time)],
+            list(data))
+        self.client_mock.leases.assert_called_once_with(view=None)
+        self.client_mock.create_lease.assert_not_called()
+        self.client_mock.update_lease.assert_not_called()
+        self.client_mock.delete_lease.assert_not_called()
+
+    def test_lease_apply(self):
+        cmd = lease.ApplyLease(self.app, None)
+        self.client_mock.create_lease.return_value = \
+            base.FakeResource({'uuid': 'new-uuid'})
+        arglist = [self.path, '--all', '--concurrency', '2']
+        verifylist = [('file', self.path), ('prune', False), ('all', True),
+                      ('concurrency', 2)]
+
+        parsed_args = self.check_parser(cmd, arglist, verifylist)
+        columns, data = cmd.take_action(parsed_args)
+
+        self.assertEqual(('Action', 'Name', 'UUID', 'Changes', 'Error'),
+                         columns)
+        self.assertEqual(
+            [('create', 'new', 'new-uuid', '', ''),
+             ('update', fakes.lease_name, fakes.lease_uuid,
+              'end_time: %s -> 2100-01-01T00:00:00' % fakes.lease_end_time,
+              '')],
+            list(data))
+        self.client_mock.leases.assert_called_once_with(view='all')
+        self.client_mock.create_lease.assert_called_once_with(
+            name='new', resource_uuid='node2',
+            project_id=fakes.lease_project_id)
+        self.client_mock.update_lease.assert_called_once_with(
+            fakes.lease_uuid, end_time='2100-01-01T00:00:00')
+        self.client_mock.delete_lease.assert_not_called()
@@ -127,7 +127,103 @@ class TestNodeList(TestNode):
                      ),)
         self.assertEqual(datalist, tuple(data))
 
-    @mock.patch('esileapclient.common.utils.filter_nodes_by_properties')
+    def test_node_list_sort_limit(self):
+        node1 = copy.deepcopy(fakes.NODE)
+        node2 = copy.deepcopy(fakes.NODE)
+        node2['name'] = 'fake-node-2'
+        node2['properties'] = dict(node2['properties'], memory_mb='262144')
+        self.client_mock.nodes.return_value = [base.FakeResource(node1),
+                                               base.FakeResource(node2)]
+
+        arglist = ['--sort-key', 'memory_mb:desc', '--limit', '1']
+        verifylist = [('sort_key', 'memory_mb:desc'), ('limit', 1)]
+
+        parsed_args = self.check_parser(self.cmd, arglist, verifylist)
+        columns, data = self.cmd.take_action(parsed_args)
+
+        data = tuple(data)
+        self.assertEqual(1, len(data))
+        self.assertEqual('fake-node-2', data[0][0])
+
+    def test_node_list_group_by(self):
+        arglist = ['--group-by', 'resource_class,owner',
+                   '--aggregate', 'cpus']
+        verifylist = [('group_by', ['resource_class,owner']),
+                      ('aggregate', ['cpus'])]
+
+        parsed_args = self.check_parser(self.cmd, arglist, verifylist)
+        columns, data = self.cmd.take_action(parsed_args)
+
+        self.assertEqual(['Resource Class', 'Owner', 'Count',
+                          'Sum cpus', 'Min cpus', 'Max cpus'], columns)
+        self.assertEqual([(fakes.lease_resource_class, fakes.node_owner,
+                           1, 40, 40, 40)], data)
+
+    def test_node_list_with_leases_and_offers(self):
+        leased = dict(fakes.NODE, name='leased',
+                      lease_uuid=fakes.lease_uuid, offer_uuid='missing')
+        self.client_mock.nodes.return_value = [
+            base.FakeResource(copy.deepcopy(fakes.NODE)),
+            base.FakeResource(leased),
+        ]
+        self.client_mock.leases.return_value = [
+            base.FakeResource(copy.deepcopy(fakes.LEASE))]
+        self.client_mock.offers.return_value = [
+            base.FakeResource(copy.deepcopy(fakes.OFFER))]
+
+        arglist = ['--with-leases', '--with-offers',
+                   '-c', 'Name', '-c', 'Lease End Time', '-c', 'lease_status',
+                   '-c', 'Offer Status']
+        verifylist = [('with_leases', True), ('with_offers', True)]
+
+        parsed_args = self.check_parser(self.cmd, arglist, verifylist)
+        columns, data = self.cmd.take_action(parsed_args)
+
+        self.client_mock.leases.assert_called_once_with()
+        self.client_mock.offers.assert_called_once_with()
+        self.assertEqual(['Name', 'Lease End Time', 'Lease Status',
+                          'Offer Status'], list(columns))
+        self.assertEqual(
+            ((fakes.node_name, '', '', ''),
+             ('leased', fakes.lease_end_time, fakes.lease_status, '')),
+            tuple(data))
+
+    def test_node_list_with_leases_all(self):
+        leased = dict(fakes.NODE, lease_uuid=fakes.lease_uuid)
+        self.client_mock.nodes.return_value = [base.FakeResource(leased)]
+
+        # The lease belongs to another project, so only view=all has it
+        def leases(view=None):
+            if view != 'all':
+                return []
+            return [base.FakeResource(copy.deepcopy(fakes.LEASE))]
+
+        self.client_mock.leases.side_effect = leases
+
+        arglist = ['--with-leases', '-c', 'Lease Project']
+        parsed_args = self.check_parser(self.cmd, arglist, [('all', False)])
+        columns, data = self.cmd.take_action(parsed_args)
+        self.assertEqual((('',),), tuple(data))
+
+        arglist = ['--with-leases', '--all', '-c', 'Lease Project']
+        parsed_args = self.check_parser(self.cmd, arglist, [('all', True)])
+        columns, data = self.cmd.take_action(parsed_args)
+        self.assertEqual(((fakes.lease_project,),), tuple(data))
+        self.client_mock.leases.assert_called_with(view='all')
+
+    def test_node_list_with_leases_not_selected(self):
+        arglist = ['--with-leases', '-c', 'Name']
+        verifylist = [('with_leases', True)]
+
+        parsed_args = self.check_parser(self.cmd, arglist, verifylist)
+        columns, data = self.cmd.take_action(parsed_args)
+
+        self.assertEqual(['Name'], list(columns))
+        self.assertEqual(((fakes.node_name,),), tuple(data))
+        self.client_mock.leases.assert_not_called()
+
+    @mock.patch(
+        'esileapclient.common.utils.iter_filter_nodes_by_properties')
     def test_node_list_with_property_filter(self, mock_filter_nodes):
         arglist = ['--property', 'cpus>=40']
         verifylist = [('properties', ['cpus>=40'])]
@@ -144,7 +240,8 @@ class TestNodeList(TestNode):
         self.client_mock.nodes.assert_called_with(**filters)
         mock_filter_nodes.assert_called_with(mock.ANY, parsed_args.properties)
 
-    @mock.patch('esileapclient.common.utils.filter_nodes_by_properties')
+    @mock.patch(
+        'esileapclient.common.utils.iter_filter_nodes_by_properties')
     def test_node_list_long_with_property_filter(self, mock_filter_nodes):
         arglist = ['--long', '--property', 'memory_mb>=131072']
         verifylist = [('long', True), ('properties', ['memory_mb>=131072'])]
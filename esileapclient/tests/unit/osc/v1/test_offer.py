@@ -12,6 +12,11 @@
 
 import copy
 import json
+import os
+
+from esi.lease.v1 import lease as sdk_lease
+import fixtures
+from osc_lib import exceptions
 from osc_lib.tests import utils as osctestutils
 from unittest import mock
 
@@ -138,7 +143,33 @@ class TestOfferList(TestOffer):
                      ),)
         self.assertEqual(datalist, tuple(data))
 
-    @mock.patch('esileapclient.common.utils.filter_nodes_by_properties')
+    def test_offer_list_sort_limit(self):
+        offer1 = copy.deepcopy(fakes.OFFER)
+        offer2 = copy.deepcopy(fakes.OFFER)
+        offer2['uuid'] = 'offer-2'
+        offer2['resource_properties'] = dict(
+            offer2['resource_properties'], cpus='80')
+        self.client_mock.offers.return_value = [base.FakeResource(offer1),
+                                                base.FakeResource(offer2)]
+
+        arglist = ['--sort-key', 'cpus:desc', '--limit', '1']
+        verifylist = [('sort_key', 'cpus:desc'), ('limit', 1)]
+
+        parsed_args = self.check_parser(self.cmd, arglist, verifylist)
+        columns, data = self.cmd.take_action(parsed_args)
+
+        data = tuple(data)
+        self.assertEqual(1, len(data))
+        self.assertEqual('offer-2', data[0][0])
+
+    def test_offer_list_invalid_limit(self):
+        for limit in ('0', '-1'):
+            self.assertRaises(osctestutils.ParserException,
+                              self.check_parser, self.cmd,
+                              ['--limit', limit], [])
+
+    @mock.patch(
+        'esileapclient.common.utils.iter_filter_nodes_by_properties')
     def test_offer_list_with_property_filter(self, mock_filter_nodes):
         arglist = ['--property', 'cpus>=40']
         verifylist = [('properties', ['cpus>=40'])]
@@ -220,7 +251,8 @@ class TestOfferList(TestOffer):
                      ),)
         self.assertEqual(datalist, tuple(data))
 
-    @mock.patch('esileapclient.common.utils.filter_nodes_by_properties')
+    @mock.patch(
+        'esileapclient.common.utils.iter_filter_nodes_by_properties')
     def test_offer_list_long_with_property_filter(self, mock_filter_nodes):
         arglist = ['--long', '--property', 'memory_mb>=131072']
         verifylist = [('long', True), ('properties', ['memory_mb>=131072'])]
@@ -373,9 +405,145 @@ class TestOfferClaim(TestOffer):
         self.client_mock.claim_offer.assert_called_once_with(
             fakes.offer_uuid, **lease_args)
 
+    @mock.patch('esileapclient.common.waiters.wait_for_status',
+                autospec=True)
+    def test_offer_claim_wait(self, mock_wait):
+        self.client_mock.claim_offer.return_value = dict(fakes.LEASE)
+        mock_wait.return_value = {
+            fakes.lease_uuid: dict(fakes.LEASE, status='active')}
+
+        arglist = [fakes.offer_uuid, '--wait']
+        verifylist = [('wait', True)]
+
+        parsed_args = self.check_parser(self.cmd, arglist, verifylist)
+        columns, data = self.cmd.take_action(parsed_args)
+
+        mock_wait.assert_called_once_with(
+            self.client_mock, [fakes.lease_uuid], 'active',
+            timeout=600)
+        self.assertEqual('active', dict(zip(columns, data))['status'])
+
+    @mock.patch('esileapclient.common.waiters.wait_for_status',
+                autospec=True)
+    def test_offer_claim_wait_sdk_lease(self, mock_wait):
+        self.client_mock.claim_offer.return_value = dict(fakes.LEASE)
+        mock_wait.return_value = {
+            fakes.lease_uuid: sdk_lease.Lease(
+                uuid=fakes.lease_uuid, status='active',
+                resource_name=fakes.lease_resource)}
+
+        parsed_args = self.check_parser(
+            self.cmd, [fakes.offer_uuid, '--wait'], [('wait', True)])
+        columns, data = self.cmd.take_action(parsed_args)
+
+        data = dict(zip(columns, data))
+        self.assertEqual(fakes.lease_resource, data['resource'])
+        self.assertEqual('active', data['status'])
+
     def test_offer_claim_no_id(self):
         arglist = []
         verifylist = []
         self.assertRaises(osctestutils.ParserException,
                           self.check_parser,
                           self.cmd, arglist, verifylist)
+
+
+class TestOfferBulkShow(TestOffer):
+    def setUp(self):
+        super(TestOfferBulkShow, self).setUp()
+
+        def get_offer(uuid):
+            if uuid == 'missing':
+                raise Exception('No Offer found for missing')
+            return base.FakeResource(dict(fakes.OFFER, uuid=uuid))
+
+        self.client_mock.get_offer.side_effect = get_offer
+
+        self.cmd = offer.BulkShowOffer(self.app, None)
+
+    def test_offer_bulk_show(self):
+        arglist = [fakes.offer_uuid, 'missing', 'other', '--concurrency', '2',
+                   '-c', 'uuid', '-c', 'status', '-c', 'error']
+        verifylist = [('uuids', [fakes.offer_uuid, 'missing', 'other']),
+                      ('concurrency', 2)]
+
+        parsed_args = self.check_parser(self.cmd, arglist, verifylist)
+        columns, data = self.cmd.take_action(parsed_args)
+
+        self.assertEqual(['Status', 'UUID', 'Error'], list(columns))
+        self.assertEqual(
+            [(fakes.lease_status, fakes.offer_uuid, ''),
+             ('', 'missing', 'No Offer found for missing'),
+             (fakes.lease_status, 'other', '')],
+            list(data))
+        self.assertEqual(
+            [mock.call(fakes.offer_uuid), mock.call('missing'),
+             mock.call('other')],
+            self.client_mock.get_offer.call_args_list)
+
+    def test_offer_bulk_show_no_id(self):
+        self.assertRaises(osctestutils.ParserException,
+                          self.check_parser, self.cmd, [], [])
+
+
+class TestOfferDiff(TestOffer):
+    def setUp(self):
+        super(TestOfferDiff, self).setUp()
+
+        self.dir = self.useFixture(fixtures.TempDir()).path
+        self.cmd = offer.DiffOffer(self.app, None)
+
+    def _write(self, name, content):
+        path = os.path.join(self.dir, name)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def test_offer_diff_snapshots(self):
+        old = self._write('old.json', json.dumps([
+            {'UUID': 'a', 'Status': 'active', 'End Time': 't1'},
+            {'UUID': 'b', 'Status': 'active'},
+        ]))
+        new = self._write('new.ndjson',
+                          '{"UUID": "a", "Status": "expired"}\n'
+                          '{"UUID": "c", "Status": "created"}\n')
+        arglist = [old, new]
+        verifylist = [('snapshot', old), ('other', new), ('live', False)]
+
+        parsed_args = self.check_parser(self.cmd, arglist, verifylist)
+        columns, data = self.cmd.take_action(parsed_args)
+
+        self.assertEqual(('Change', 'UUID', 'Field', 'Old Value',
+                          'New Value'), columns)
+        self.assertEqual(
+            [('changed', 'a', 'status', 'active', 'expired'),
+             ('added', 'c', '', '', ''),
+             ('removed', 'b', '', '', '')],
+            list(data))
+        self.client_mock.offers.assert_not_called()
+
+    def test_offer_diff_live(self):
+        old = self._write('old.json', json.dumps(
+            [dict(fakes.OFFER, status='created')]))
+        self.client_mock.offers.return_value = iter(
+            [base.FakeResource(copy.deepcopy(fakes.OFFER))])
+        arglist = [old, '--live'] + []
+        verifylist = [('live', True)]
+
+        parsed_args = self.check_parser(self.cmd, arglist, verifylist)
+        columns, data = self.cmd.take_action(parsed_args)
+
+        self.assertEqual(
+            [('changed', fakes.OFFER['uuid'], 'status', 'created',
+              fakes.OFFER['status'])],
+            list(data))
+        self.client_mock.offers.assert_called_once_with(
+            status='any')
+
+    def test_offer_diff_other_or_live(self):
+        old = self._write('old.json', '[]')
+        for arglist in ([old], [old, old, '--live']):
+            parsed_args = self.check_parser(self.cmd, arglist, [])
+            self.assertRaisesRegex(exceptions.CommandError,
+                                   'second snapshot or --live',
+                                   self.cmd.take_action, parsed_args)
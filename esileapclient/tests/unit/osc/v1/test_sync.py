@@ -0,0 +1,182 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import copy
+import os
+
+import fixtures
+from osc_lib import exceptions
+
+from esileapclient.common import mirror
+from esileapclient.osc.v1 import lease
+from esileapclient.osc.v1 import node
+from esileapclient.osc.v1 import sync
+from esileapclient.tests.unit.osc.v1 import base
+from esileapclient.tests.unit.osc.v1 import fakes
+
+
+class TestSync(base.TestESILeapCommand):
+
+    def setUp(self):
+        super(TestSync, self).setUp()
+
+        self.client_mock = self.app.client_manager.lease
+        self.client_mock.reset_mock()
+        self.client_mock.nodes.return_value = [
+            base.FakeResource(copy.deepcopy(fakes.NODE))]
+        self.client_mock.offers.return_value = [
+            base.FakeResource(copy.deepcopy(fakes.OFFER))]
+        self.client_mock.leases.return_value = [
+            base.FakeResource(dict(fakes.LEASE, status='active'))]
+        self.client_mock.events.return_value = []
+
+        self.path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                                 'mirror.sqlite')
+
+
+class TestSyncMirror(TestSync):
+
+    def setUp(self):
+        super(TestSyncMirror, self).setUp()
+
+        self.cmd = sync.SyncMirror(self.app, None)
+
+    def test_sync(self):
+        arglist = ['--mirror', self.path, '--all']
+        verifylist = [('mirror', self.path), ('all', True), ('full', False)]
+
+        parsed_args = self.check_parser(self.cmd, arglist, verifylist)
+        columns, data = self.cmd.take_action(parsed_args)
+
+        result = dict(zip(columns, data))
+        self.assertEqual('snapshot', result['sync'])
+        self.assertEqual(3, result['applied'])
+        self.assertEqual(1, result['leases'])
+        self.client_mock.leases.assert_called_once_with(status='any',
+                                                        view='all')
+
+        # A second sync applies events
+        columns, data = self.cmd.take_action(parsed_args)
+
+        result = dict(zip(columns, data))
+        self.assertEqual('events', result['sync'])
+        self.assertEqual(0, result['applied'])
+        self.assertEqual(1, self.client_mock.leases.call_count)
+
+
+class TestListLeaseMirror(TestSync):
+
+    def setUp(self):
+        super(TestListLeaseMirror, self).setUp()
+
+        self.cmd = lease.ListLease(self.app, None)
+
+    def test_lease_list_offline(self):
+        with mirror.Mirror(self.path) as local:
+            local.snapshot(self.client_mock)
+        self.client_mock.reset_mock()
+
+        arglist = ['--offline', '--mirror', self.path]
+        verifylist = [('offline', True), ('mirror', self.path)]
+
+        parsed_args = self.check_parser(self.cmd, arglist, verifylist)
+        columns, data = self.cmd.take_action(parsed_args)
+
+        self.assertEqual(
+            [(fakes.lease_uuid, fakes.lease_resource,
+              fakes.lease_resource_class, fakes.lease_project,
+              fakes.lease_start_time, fakes.lease_end_time,
+              fakes.offer_uuid, 'active', fakes.lease_purpose)],
+            list(data))
+        self.client_mock.leases.assert_not_called()
+
+    def test_lease_list_offline_no_mirror(self):
+        arglist = ['--offline', '--mirror', self.path]
+        verifylist = [('offline', True)]
+
+        parsed_args = self.check_parser(self.cmd, arglist, verifylist)
+        self.assertRaises(exceptions.CommandError,
+                          self.cmd.take_action, parsed_args)
+
+    def test_lease_list_max_staleness(self):
+        arglist = ['--max-staleness', '60', '--mirror', self.path]
+        verifylist = [('max_staleness', 60)]
+
+        parsed_args = self.check_parser(self.cmd, arglist, verifylist)
+        self.cmd.take_action(parsed_args)
+        columns, data = self.cmd.take_action(parsed_args)
+
+        self.assertEqual(1, len(list(data)))
+        # The first call snapshots the mirror; the second answers from it
+        self.client_mock.leases.assert_called_once_with(status='any',
+                                                        view=None)
+
+    def test_lease_list_offline_view(self):
+        with mirror.Mirror(self.path) as local:
+            local.snapshot(self.client_mock, view='all')
+
+        parsed_args = self.check_parser(
+            self.cmd, ['--offline', '--mirror', self.path], [])
+        self.assertRaisesRegex(exceptions.CommandError, 'all projects',
+                               self.cmd.take_action, parsed_args)
+
+        parsed_args = self.check_parser(
+            self.cmd, ['--offline', '--all', '--mirror', self.path],
+            [('all', True)])
+        columns, data = self.cmd.take_action(parsed_args)
+        self.assertEqual(1, len(list(data)))
+
+    def test_lease_list_max_staleness_view(self):
+        with mirror.Mirror(self.path) as local:
+            local.snapshot(self.client_mock)
+        self.client_mock.reset_mock()
+
+        parsed_args = self.check_parser(
+            self.cmd, ['--max-staleness', '60', '--all', '--mirror',
+                       self.path], [('all', True)])
+        columns, data = self.cmd.take_action(parsed_args)
+
+        # A mirror of another view is snapshotted again
+        self.assertEqual(1, len(list(data)))
+        self.client_mock.leases.assert_called_once_with(status='any',
+                                                        view='all')
+
+
+class TestListNodeMirror(TestSync):
+
+    def setUp(self):
+        super(TestListNodeMirror, self).setUp()
+
+        self.cmd = node.ListNode(self.app, None)
+
+    def test_node_list_offline_with_leases(self):
+        self.client_mock.nodes.return_value = [base.FakeResource(
+            dict(fakes.NODE, lease_uuid=fakes.lease_uuid,
+                 offer_uuid=fakes.offer_uuid))]
+        self.client_mock.offers.return_value = [
+            base.FakeResource(dict(fakes.OFFER, status='available'))]
+        with mirror.Mirror(self.path) as local:
+            local.snapshot(self.client_mock)
+        self.client_mock.reset_mock()
+
+        arglist = ['--offline', '--mirror', self.path, '--with-leases',
+                   '--with-offers', '-c', 'Lease Status', '-c',
+                   'Offer Status']
+        verifylist = [('offline', True), ('with_leases', True),
+                      ('with_offers', True)]
+
+        parsed_args = self.check_parser(self.cmd, arglist, verifylist)
+        columns, data = self.cmd.take_action(parsed_args)
+
+        self.assertEqual([('active', 'available')], list(data))
+        self.client_mock.leases.assert_not_called()
+        self.client_mock.offers.assert_not_called()